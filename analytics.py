@@ -0,0 +1,120 @@
+import numpy as np
+
+# Columns of a holder table, one row per holder
+COLUMNS = ("market", "wallet", "side", "growth", "pnl", "pos_size", "account", "is_bot")
+
+
+def holder_table(market_data, market=0):
+    """
+    Flattens the per-group lists returned by `search.get_market_data` into a columnar holder table.
+
+    Args:
+        market_data (dict): Output of `search.get_market_data` for one market.
+        market (int, optional): Index of the market, stored in the "market" column so tables can be concatenated.
+
+    Returns:
+        dict: One NumPy array per name in `COLUMNS`. "side" is 0 for the first (yes) group and 1 for the second (no).
+    """
+    rows = {k: [] for k in COLUMNS}
+    wallets = market_data.get("wallets") or [[None] * len(g) for g in market_data["growth_rates"]]
+    for side, group_wallets in enumerate(wallets):
+        rows["wallet"].extend(group_wallets)
+        rows["side"].extend([side] * len(group_wallets))
+        rows["growth"].extend(market_data["growth_rates"][side])
+        rows["pnl"].extend(market_data["PNLs"][side])
+        rows["pos_size"].extend(market_data["pos_size"][side])
+        rows["account"].extend(market_data["account_size"][side])
+        rows["is_bot"].extend(market_data["is_bot"][side])
+    rows["market"] = [market] * len(rows["side"])
+
+    return {
+        "market": np.asarray(rows["market"], dtype=np.int64),
+        "wallet": np.asarray(rows["wallet"], dtype=object),
+        "side": np.asarray(rows["side"], dtype=np.int64),
+        "growth": np.asarray(rows["growth"], dtype=np.int64),
+        "pnl": np.asarray(rows["pnl"], dtype=np.int64),
+        "pos_size": np.asarray(rows["pos_size"], dtype=np.int64),
+        "account": np.asarray(rows["account"], dtype=np.int64),
+        "is_bot": np.asarray(rows["is_bot"], dtype=bool),
+    }
+
+
+def concat_tables(tables):
+    """Concatenates holder tables of several markets, renumbering the "market" column by position in `tables`."""
+    tables = list(tables)
+    if not tables:
+        return holder_table({"growth_rates": [], "PNLs": [], "pos_size": [], "account_size": [], "is_bot": []})
+    out = {k: np.concatenate([t[k] for t in tables]) for k in COLUMNS}
+    out["market"] = np.repeat(np.arange(len(tables)), [len(t["side"]) for t in tables])
+    return out
+
+
+def _group_sum(keys, values, n_groups):
+    """Sum `values` per group. np.add.at accumulates in row order, so float sums match Python's sum() exactly."""
+    out = np.zeros(n_groups, dtype=values.dtype)
+    np.add.at(out, keys, values)
+    return out
+
+
+def compute_stats(table, n_markets=None):
+    """
+    Computes the holder statistics of every market in a holder table in one vectorized pass.
+
+    Per market and side:
+        - Scaled Growth/PNL Avg: sum(value * pos_size) / (sum(pos_size) * holders), 0 when the divisor is 0, rounded.
+        - Avg Prop of Account: sum(pos_size / account for account != 0) / holders, 0 when sum(account) is 0,
+          rounded to 3 decimals.
+        - Number of Bots: count of holders flagged as bots.
+
+    Args:
+        table (dict): A holder table from `holder_table` or `concat_tables`.
+        n_markets (int, optional): Number of markets in the table. Defaults to the highest "market" index + 1.
+
+    Returns:
+        list[dict]: One dict per market with "Scaled Growth Avg", "Scaled PNL Avg", "Avg Prop of Account" and
+            "Number of Bots", each mapping "yes" and "no" to a Python number.
+    """
+    if n_markets is None:
+        n_markets = int(table["market"].max()) + 1 if len(table["market"]) else 0
+    n_groups = 2 * n_markets
+    keys = table["market"] * 2 + table["side"]
+
+    holders = np.bincount(keys, minlength=n_groups)
+    size_sum = _group_sum(keys, table["pos_size"], n_groups)
+    growth_sum = _group_sum(keys, table["growth"] * table["pos_size"], n_groups)
+    pnl_sum = _group_sum(keys, table["pnl"] * table["pos_size"], n_groups)
+    account_sum = _group_sum(keys, table["account"], n_groups)
+    bots = np.bincount(keys, weights=table["is_bot"], minlength=n_groups).astype(np.int64)
+
+    nonzero = table["account"] != 0
+    ratios = np.zeros(len(keys), dtype=np.float64)
+    ratios[nonzero] = table["pos_size"][nonzero] / table["account"][nonzero]
+    prop_sum = _group_sum(keys[nonzero], ratios[nonzero], n_groups)
+
+    divisor = size_sum * holders
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scaled_growth = np.where(divisor != 0, growth_sum / divisor, 0.0)
+        scaled_pnl = np.where(divisor != 0, pnl_sum / divisor, 0.0)
+        avg_prop = np.where(account_sum != 0, prop_sum / holders, 0.0)
+
+    def prop(group):
+        # the int 0 when the accounts sum to 0, as the per-holder loop this replaced returned
+        return round(float(avg_prop[group]), 3) if account_sum[group] != 0 else 0
+
+    stats = []
+    for m in range(n_markets):
+        yes, no = 2 * m, 2 * m + 1
+        stats.append(
+            {
+                "Scaled Growth Avg": {"yes": round(float(scaled_growth[yes])), "no": round(float(scaled_growth[no]))},
+                "Scaled PNL Avg": {"yes": round(float(scaled_pnl[yes])), "no": round(float(scaled_pnl[no]))},
+                "Avg Prop of Account": {"yes": prop(yes), "no": prop(no)},
+                "Number of Bots": {"yes": int(bots[yes]), "no": int(bots[no])},
+            }
+        )
+    return stats
+
+
+def market_stats(market_data):
+    """Computes the holder statistics of a single market from `search.get_market_data` output."""
+    return compute_stats(holder_table(market_data), n_markets=1)[0]
@@ -0,0 +1,283 @@
+"""
+Backtests flagging thresholds against stored market analyses and the markets' eventual resolutions.
+
+Every combination of the threshold grids is evaluated over every snapshot in one vectorized pass. A setting combination
+trades each market at most once, on the first snapshot it flags: it buys the flagged side at the snapshot's price
+and is scored by whether that side won. The rule generalizes `search.flag_market`: a side flags when its price is
+strictly inside the share price band and it leads the other side by more than each enabled difference threshold
+(YES is checked first). With the PnL, bot and prop thresholds off it flags exactly what `flag_market` does.
+
+    python -m backtest --fetch-resolutions
+    python -m backtest --growth 0:500:25 --pnl off,0,10000,25000 --bots off,0,5,10 --top 20
+    python -m backtest --snapshots scans/nightly.jsonl --resolutions storage/resolutions.json --csv grid.csv
+
+Snapshots come from the results history database (default) or from bulk_scan CSV/JSON-lines output.
+"""
+
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+import history
+import json_functs
+
+# Threshold grids, in the order of the columns of a settings matrix
+THRESHOLDS = ("min_share_price", "max_share_price", "min_growth_rate_diff", "min_pnl_diff", "min_bot_count_diff", "min_prop_diff")
+OFF = -np.inf  # a difference threshold every snapshot passes
+
+# Number of settings x snapshots evaluated per block, to bound memory
+BLOCK_CELLS = 4_000_000
+
+
+def load_history_snapshots(db_path, since=None, until=None):
+    """Loads snapshots from the results history database. Returns them as a dict of column arrays."""
+    rows = history.ResultsHistory(db_path).snapshots(since, until)
+    columns = list(zip(*rows)) if rows else [[] for _ in history.SNAPSHOT_COLUMNS]
+    return _to_arrays(dict(zip(history.SNAPSHOT_COLUMNS, columns)))
+
+
+def load_file_snapshots(path):
+    """Loads snapshots from bulk_scan CSV or JSON-lines output. Returns them as a dict of column arrays."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    columns = {name: [row.get(name) for row in rows] for name in history.SNAPSHOT_COLUMNS if name != "time"}
+    columns["time"] = [row.get("scanned_at") or 0 for row in rows]
+    return _to_arrays(columns)
+
+
+def _to_arrays(columns):
+    """Convert snapshot columns to NumPy arrays, sorted by market and then time, dropping rows without prices."""
+    out = {"condition_id": np.asarray(columns["condition_id"], dtype=object)}
+    for name in history.SNAPSHOT_COLUMNS[1:]:
+        out[name] = np.asarray([np.nan if v in (None, "") else float(v) for v in columns[name]], dtype=np.float64)
+    keep = ~(np.isnan(out["yes_price"]) | np.isnan(out["no_price"]))
+    order = np.lexsort((out["time"][keep], out["condition_id"][keep].astype(str)))
+    return {name: values[keep][order] for name, values in out.items()}
+
+
+def load_resolutions(path):
+    """Reads a {condition_id: "YES" | "NO"} JSON file; a missing file gives no resolutions."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+async def fetch_resolutions(condition_ids, known=None):
+    """
+    Looks up which side won for markets that have resolved since they were analyzed, from the Gamma API.
+
+    Args:
+        condition_ids (Iterable[str]): Markets to look up.
+        known (dict, optional): Resolutions already known; those markets are not looked up again.
+
+    Returns:
+        dict: {condition_id: "YES" | "NO"} for every resolved market, including `known`.
+    """
+    import search
+
+    resolutions = dict(known or {})
+    missing = [c for c in condition_ids if c not in resolutions]
+    try:
+        markets = await search.get_markets_by_condition_ids(missing, closed=True)
+    finally:
+        await search.close_session()
+    for condition_id, market in markets.items():
+        try:
+            prices = [float(p) for p in json.loads(market.get("outcomePrices") or "[]")]
+        except (TypeError, ValueError):
+            continue
+        if len(prices) == 2 and max(prices) >= 0.99:
+            resolutions[condition_id] = "YES" if prices[0] >= 0.99 else "NO"
+    return resolutions
+
+
+def settings_grid(**grids):
+    """
+    Builds the cartesian product of threshold grids.
+
+    Args:
+        **grids (Iterable[float]): One grid per name in `THRESHOLDS`; a missing grid is taken as [OFF].
+
+    Returns:
+        np.ndarray: A (combinations, len(THRESHOLDS)) float array.
+    """
+    axes = [np.asarray(list(grids.get(name, [OFF])), dtype=np.float64) for name in THRESHOLDS]
+    return np.array(list(itertools.product(*axes)), dtype=np.float64).reshape(-1, len(THRESHOLDS))
+
+
+def backtest(snapshots, resolutions, grid):
+    """
+    Evaluates every settings combination in `grid` over the snapshots of resolved markets.
+
+    Args:
+        snapshots (dict): Column arrays from `load_history_snapshots` or `load_file_snapshots`.
+        resolutions (dict): {condition_id: "YES" | "NO"}.
+        grid (np.ndarray): Settings matrix from `settings_grid`.
+
+    Returns:
+        dict: Arrays with one entry per combination: "trades", "wins", "hit_rate", "total_return" (profit per 1 staked
+            on each trade, summed) and "avg_return", plus "markets", the number of resolved markets evaluated.
+    """
+    resolved = np.array([c in resolutions for c in snapshots["condition_id"]], dtype=bool)
+    snap = {name: values[resolved] for name, values in snapshots.items()}
+    n = len(snap["condition_id"])
+    n_settings = len(grid)
+    out = {k: np.zeros(n_settings) for k in ("trades", "wins", "total_return")}
+    if n == 0:
+        out.update(hit_rate=np.zeros(n_settings), avg_return=np.zeros(n_settings), markets=0)
+        return out
+
+    # one segment of consecutive snapshots per market
+    ids = snap["condition_id"]
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    yes_won = np.array([resolutions[c] == "YES" for c in ids[starts]], dtype=bool)
+
+    py, pn = snap["yes_price"], snap["no_price"]
+    diffs = {
+        "min_growth_rate_diff": snap["growth_yes"] - snap["growth_no"],
+        "min_pnl_diff": snap["pnl_yes"] - snap["pnl_no"],
+        "min_bot_count_diff": snap["bots_no"] - snap["bots_yes"],  # fewer bots on the flagged side
+        "min_prop_diff": snap["prop_yes"] - snap["prop_no"],
+    }
+    diffs = {k: np.nan_to_num(v, nan=0.0) for k, v in diffs.items()}
+    index = np.arange(n)
+
+    block = max(1, BLOCK_CELLS // n)
+    for lo in range(0, n_settings, block):
+        g = grid[lo : lo + block]
+        low, high = g[:, [0]], g[:, [1]]
+        yes = (py > low) & (py < high)
+        no = (pn > low) & (pn < high)
+        for col, name in enumerate(THRESHOLDS[2:], start=2):
+            threshold = g[:, [col]]
+            yes &= diffs[name] > threshold
+            no &= -diffs[name] > threshold
+        no &= ~yes  # flag_market checks YES first
+
+        # first snapshot of each market that flags, n if none
+        first = np.minimum.reduceat(np.where(yes | no, index, n), starts, axis=1)
+        traded = first < n
+        at = np.where(traded, first, 0)
+        bought_yes = yes[np.arange(len(g))[:, None], at]
+        price = np.where(bought_yes, py[at], pn[at])
+        won = traded & (bought_yes == yes_won)
+        profit = np.where(won, 1 / np.maximum(price, 1e-9) - 1, -1.0) * traded
+
+        out["trades"][lo : lo + block] = traded.sum(axis=1)
+        out["wins"][lo : lo + block] = won.sum(axis=1)
+        out["total_return"][lo : lo + block] = profit.sum(axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out["hit_rate"] = np.where(out["trades"] > 0, out["wins"] / out["trades"], 0.0)
+        out["avg_return"] = np.where(out["trades"] > 0, out["total_return"] / out["trades"], 0.0)
+    out["markets"] = len(starts)
+    return out
+
+
+def parse_grid(text):
+    """
+    Parses a threshold grid: comma-separated values and start:stop:step ranges (stop included), where "off"
+    disables a difference threshold, e.g. "off,0,1000:5000:1000".
+    """
+    values = []
+    for part in text.split(","):
+        part = part.strip()
+        if part == "off":
+            values.append(OFF)
+        elif ":" in part:
+            start, stop, step = (float(x) for x in part.split(":"))
+            values.extend(np.arange(start, stop + step / 2, step).tolist())
+        elif part:
+            values.append(float(part))
+    return values
+
+
+def report(grid, result, top=20, sort="total_return", min_trades=1):
+    """Returns the `top` settings combinations by `sort` (with at least `min_trades` trades) as printable lines."""
+    order = [i for i in np.argsort(-result[sort], kind="stable") if result["trades"][i] >= min_trades][:top]
+    fmt = lambda v: "off" if v == OFF else f"{v:g}"
+    header = "min_price max_price growth  pnl      bots  prop   | trades hit_rate avg_ret total_ret"
+    lines = [f"{result['markets']} resolved markets, {len(grid)} settings combinations", header]
+    for i in order:
+        s = grid[i]
+        lines.append(
+            f"{fmt(s[0]):<9} {fmt(s[1]):<9} {fmt(s[2]):<7} {fmt(s[3]):<8} {fmt(s[4]):<5} {fmt(s[5]):<6} | "
+            f"{int(result['trades'][i]):<6} {result['hit_rate'][i]:<8.3f} {result['avg_return'][i]:<7.3f} "
+            f"{result['total_return'][i]:.2f}"
+        )
+    return lines
+
+
+def write_csv(path, grid, result):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(list(THRESHOLDS) + ["trades", "wins", "hit_rate", "avg_return", "total_return"])
+        for i, s in enumerate(grid):
+            writer.writerow(
+                ["off" if v == OFF else v for v in s]
+                + [int(result["trades"][i]), int(result["wins"][i]), result["hit_rate"][i], result["avg_return"][i], result["total_return"][i]]
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=None, help="results history database (default: 'history_db')")
+    parser.add_argument("--snapshots", help="bulk_scan CSV/JSON-lines output to use instead of the database")
+    parser.add_argument("--since", type=float, help="only analyses at or after this unix time")
+    parser.add_argument("--resolutions", default="storage/resolutions.json", help="JSON of condition_id -> YES/NO")
+    parser.add_argument("--fetch-resolutions", action="store_true", help="look up new resolutions on the Gamma API")
+    parser.add_argument("--min-price", default=None, help="min_share_price grid (default: current setting)")
+    parser.add_argument("--max-price", default=None, help="max_share_price grid (default: current setting)")
+    parser.add_argument("--growth", default="0:500:25", help="min_growth_rate_diff grid")
+    parser.add_argument("--pnl", default="off", help="min_pnl_diff grid")
+    parser.add_argument("--bots", default="off", help="min_bot_count_diff grid")
+    parser.add_argument("--prop", default="off", help="min_prop_diff grid")
+    parser.add_argument("--sort", default="total_return", choices=("total_return", "avg_return", "hit_rate", "trades"))
+    parser.add_argument("--min-trades", type=int, default=5, help="hide combinations with fewer trades")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--csv", help="write every combination's results to this CSV file")
+    args = parser.parse_args()
+
+    settings = json_functs.read()
+    if args.snapshots:
+        snapshots = load_file_snapshots(args.snapshots)
+    else:
+        snapshots = load_history_snapshots(args.db or settings.get("history_db", "storage/history.db"), since=args.since)
+
+    resolutions = load_resolutions(args.resolutions)
+    if args.fetch_resolutions:
+        resolutions = asyncio.run(fetch_resolutions(set(snapshots["condition_id"]), known=resolutions))
+        with open(args.resolutions, "w", encoding="utf-8") as f:
+            json.dump(resolutions, f)
+
+    grid = settings_grid(
+        min_share_price=parse_grid(args.min_price or str(settings.get("min_share_price", 0.05))),
+        max_share_price=parse_grid(args.max_price or str(settings.get("max_share_price", 0.75))),
+        min_growth_rate_diff=parse_grid(args.growth),
+        min_pnl_diff=parse_grid(args.pnl),
+        min_bot_count_diff=parse_grid(args.bots),
+        min_prop_diff=parse_grid(args.prop),
+    )
+    started = time.perf_counter()
+    result = backtest(snapshots, resolutions, grid)
+    elapsed = time.perf_counter() - started
+
+    print("\n".join(report(grid, result, top=args.top, sort=args.sort, min_trades=args.min_trades)))
+    print(f"Evaluated {len(grid)} combinations over {len(snapshots['condition_id'])} snapshots in {elapsed:.2f}s", file=sys.stderr)
+    if args.csv:
+        write_csv(args.csv, grid, result)
+
+
+if __name__ == "__main__":
+    main()
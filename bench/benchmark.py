@@ -0,0 +1,178 @@
+"""
+End-to-end scan benchmark against the local mock Polymarket API.
+
+Runs the scanner's discovery -> analysis -> output pipeline (market cursor, `search.organize_market_data`,
+`search.flag_market`) over every fixture market, then repeats the sweep with warm caches, and reports
+markets/minute, API calls per market, p50/p99 per-market latency and peak memory for each pass.
+
+    python -m bench.benchmark --markets 50 --latency 0.05 --workers 4
+    python -m bench.benchmark --fixtures bench/fixtures.json --error-rate 0.02 --rate-429 0.01 --json
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+import tracemalloc
+
+import market_cursor
+import pipeline
+import pnl_store
+import request_policy
+import search
+import wallet_cache
+from bench import mock_api
+
+# Flagging thresholds used when storage/config.json cannot be read
+DEFAULT_SETTINGS = {"min_volume": 0, "min_growth_rate_diff": 100, "min_share_price": 0.05, "max_share_price": 0.75}
+
+
+def percentile(values, pct):
+    """Return the `pct` percentile of `values` (nearest-rank), or 0 for no values."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+async def run_pass(server, settings, workers):
+    """
+    Sweeps every market once through the scan pipeline.
+
+    Returns:
+        dict: Throughput, API call and latency figures for the pass.
+    """
+    server.calls.clear()
+    server.errors.clear()
+    server.not_modified.clear()
+    cursor = market_cursor.MarketCursor(settings["min_volume"], 0, page_size=settings.get("market_page_size", 100))
+    latencies, flagged, errors, done = [], [], [], asyncio.Event()
+    expected = len(server.fixtures["markets"])
+
+    async def discover():
+        market = await cursor.next()
+        if market is not None:
+            market["_started"] = time.perf_counter()
+        return market
+
+    async def analyze(market):
+        _, msg, results = await search.organize_market_data(market["conditionId"], market)
+        flag = await search.flag_market(results, settings)
+        return market, flag
+
+    async def publish(result):
+        market, flag = result
+        latencies.append(time.perf_counter() - market["_started"])
+        if flag:
+            flagged.append(market["conditionId"])
+        if len(latencies) + len(errors) >= expected:
+            done.set()
+
+    async def on_error(stage, error):
+        errors.append(f"{stage}: {error}")
+        if len(latencies) + len(errors) >= expected:
+            done.set()
+
+    scan = pipeline.ScanPipeline(discover, analyze, publish, on_error=on_error, workers=workers, idle_delay=0.05)
+    started = time.perf_counter()
+    scan.start()
+    await done.wait()
+    elapsed = time.perf_counter() - started
+    await scan.stop()
+
+    scanned = len(latencies)
+    api_calls = sum(server.calls.values())
+    return {
+        "markets": scanned,
+        "errors": len(errors),
+        "flagged": len(flagged),
+        "seconds": round(elapsed, 3),
+        "markets_per_minute": round(scanned / elapsed * 60, 1) if elapsed else 0,
+        "api_calls": api_calls,
+        "api_calls_per_market": round(api_calls / scanned, 1) if scanned else 0,
+        "calls_by_endpoint": dict(server.calls),
+        "not_modified": dict(server.not_modified),
+        "injected_errors": {str(k): v for k, v in server.errors.items()},
+        "p50_latency": round(percentile(latencies, 50), 3),
+        "p99_latency": round(percentile(latencies, 99), 3),
+        "wallet_cache": wallet_cache.CACHE.stats(),
+    }
+
+
+async def run(args):
+    fixtures = mock_api.load_fixtures(args.fixtures) if args.fixtures else mock_api.generate_fixtures(markets=args.markets)
+    server = mock_api.MockPolymarket(fixtures, args.latency, args.jitter, args.error_rate, args.rate_429, seed=args.seed)
+    urls = await server.start()
+
+    try:
+        with open("storage/config.json", "r", encoding="utf-8") as f:
+            settings = {**DEFAULT_SETTINGS, **json.load(f)}
+    except (OSError, json.JSONDecodeError):
+        settings = dict(DEFAULT_SETTINGS)
+    settings["min_volume"] = 0
+    if args.rate_limit:
+        settings["rate_limit_per_host"] = args.rate_limit
+        settings["rate_limit_burst"] = args.rate_limit
+
+    # Point the scanner at the mock and give it fresh, throwaway state
+    search.BASE_GAMMA, search.BASE_DATA, search.BASE_PNL = urls["gamma"], urls["data"], urls["pnl"]
+    search.configure_concurrency(settings.get("max_concurrency"), settings.get("max_per_host"))
+    request_policy.configure(settings)
+    wallet_cache.CACHE = wallet_cache.WalletCache(max_size=settings.get("wallet_cache_size", 5000))
+    store_dir = tempfile.TemporaryDirectory()
+    pnl_store.STORE_DIR = store_dir.name
+
+    report = {"config": vars(args), "passes": []}
+    try:
+        tracemalloc.start()
+        for name in ("cold", "warm")[: args.passes]:
+            tracemalloc.reset_peak()
+            result = await run_pass(server, settings, args.workers)
+            result["pass"] = name
+            result["peak_memory_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+            report["passes"].append(result)
+        tracemalloc.stop()
+    finally:
+        await search.close_session()
+        await server.stop()
+        store_dir.cleanup()
+    return report
+
+
+def print_report(report):
+    for p in report["passes"]:
+        print(
+            f"{p['pass']:>5}: {p['markets']} markets in {p['seconds']}s | {p['markets_per_minute']} markets/min | "
+            f"{p['api_calls_per_market']} API calls/market | p50 {p['p50_latency']}s p99 {p['p99_latency']}s | "
+            f"peak {p['peak_memory_mb']} MB | {p['errors']} errors"
+        )
+        print(f"       calls: {p['calls_by_endpoint']}")
+        if p["not_modified"]:
+            print(f"       304s:  {p['not_modified']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="fixtures file (default: generate synthetic fixtures)")
+    parser.add_argument("--markets", type=int, default=50, help="number of synthetic markets")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent analysis workers")
+    parser.add_argument("--passes", type=int, default=2, choices=(1, 2), help="1 = cold only, 2 = cold then warm")
+    parser.add_argument("--latency", type=float, default=0.05, help="mean added latency per request (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="max random extra latency per request (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a 502 response")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="probability of a 429 response")
+    parser.add_argument("--rate-limit", type=float, help="override rate_limit_per_host from config.json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=4))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
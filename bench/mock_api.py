@@ -0,0 +1,297 @@
+"""
+Local stand-in for the Polymarket gamma, data and user-pnl APIs, for measuring scan throughput offline.
+
+The server answers the endpoints the scanner uses (/markets, /holders, /positions, /value, /activity, /user-pnl)
+from a fixtures file, with configurable latency, error rate and 429 rate. Responses are compressed when the client
+accepts it and carry ETags, so conditional requests can be answered with 304. Fixtures can be generated synthetically
+or recorded from the live APIs:
+
+    python -m bench.mock_api --generate bench/fixtures.json --markets 50
+    python -m bench.mock_api --record bench/fixtures.json --markets 20
+    python -m bench.mock_api --fixtures bench/fixtures.json --latency 0.05
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from collections import Counter
+
+from aiohttp import web
+
+SERVICES = ("gamma", "data", "pnl")
+DAY = 86400
+
+
+def generate_fixtures(markets=50, holders=20, wallets=400, pnl_points=200, seed=0):
+    """
+    Generates deterministic synthetic fixtures shaped like the live API responses.
+
+    Args:
+        markets (int, optional): Number of markets.
+        holders (int, optional): Holders per outcome of each market.
+        wallets (int, optional): Size of the wallet universe holders are drawn from, so wallets recur across markets.
+        pnl_points (int, optional): Maximum length of a wallet's PnL history.
+        seed (int, optional): Random seed.
+
+    Returns:
+        dict: Fixtures with "markets", "holders", "positions" and "wallets" keys.
+    """
+    rng = random.Random(seed)
+    now = int(time.time())
+    wallet_ids = [f"0x{rng.getrandbits(160):040x}" for _ in range(wallets)]
+
+    fixtures = {"markets": [], "holders": {}, "positions": {}, "wallets": {}}
+    for wallet in wallet_ids:
+        n_points = rng.randint(0, pnl_points)
+        start = now - n_points * DAY // 2
+        pnl, history = 0.0, []
+        for i in range(n_points):
+            pnl += rng.gauss(50, 500)
+            history.append({"t": start + i * DAY // 2, "p": round(pnl, 2)})
+        n_trades = rng.choice([rng.randint(0, 499), rng.randint(500, 2000)])
+        trade_gap = rng.choice([600, 4 * 3600, DAY])
+        fixtures["wallets"][wallet] = {
+            "value": round(rng.uniform(100, 2_000_000), 2),
+            "pnl": history,
+            "trades": n_trades,
+            "trade_gap": trade_gap,
+        }
+
+    for m in range(markets):
+        condition_id = f"0x{rng.getrandbits(256):064x}"
+        yes = round(rng.uniform(0.02, 0.98), 3)
+        fixtures["markets"].append(
+            {
+                "conditionId": condition_id,
+                "question": f"Benchmark market {m}?",
+                "volume": str(round(rng.uniform(2_000_000, 50_000_000), 2)),
+                "outcomePrices": json.dumps([str(yes), str(round(1 - yes, 3))]),
+                "endDate": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now + rng.randint(1, 120) * DAY)),
+                "events": [{"ticker": f"benchmark-market-{m}"}],
+            }
+        )
+        groups = []
+        for _ in range(2):
+            group = rng.sample(wallet_ids, holders)
+            groups.append({"token": f"{condition_id}-{len(groups)}", "holders": [{"proxyWallet": w} for w in group]})
+            for wallet in group:
+                fixtures["positions"][f"{wallet}:{condition_id}"] = {
+                    "conditionId": condition_id,
+                    "currentValue": round(rng.uniform(10, 200_000), 2),
+                    "cashPnl": round(rng.gauss(0, 5000), 2),
+                }
+        fixtures["holders"][condition_id] = groups
+    return fixtures
+
+
+async def record_fixtures(markets=20, min_volume=2_000_000):
+    """
+    Records fixtures from the live Polymarket APIs for the first `markets` markets above `min_volume`.
+    Activity is stored as a trade count and average gap, which is all the bot classification looks at.
+    """
+    import search
+
+    fixtures = {"markets": [], "holders": {}, "positions": {}, "wallets": {}}
+    page = await search.get_markets(min_volume, 0, limit=markets) or []
+    for market in page:
+        condition_id = market["conditionId"]
+        fixtures["markets"].append(market)
+        groups = await search._get(f"{search.BASE_DATA}/holders", market=condition_id) or []
+        fixtures["holders"][condition_id] = groups
+        for group in groups:
+            for holder in group["holders"]:
+                wallet = holder["proxyWallet"]
+                position = await search._get(f"{search.BASE_DATA}/positions", user=wallet, market=condition_id)
+                if position:
+                    fixtures["positions"][f"{wallet}:{condition_id}"] = position[0]
+                if wallet in fixtures["wallets"]:
+                    continue
+                history = await search._get(f"{search.BASE_PNL}/user-pnl", user_address=wallet, interval="max", fidelity="12h")
+                value = await search._get(f"{search.BASE_DATA}/value", user=wallet)
+                trades = await search._get(f"{search.BASE_DATA}/activity", user=wallet, limit=500, sortDirection="DESC", type="TRADE")
+                trades = trades or []
+                gap = (trades[0]["timestamp"] - trades[-1]["timestamp"]) / max(1, len(trades) - 1) if trades else DAY
+                fixtures["wallets"][wallet] = {
+                    "value": value[0]["value"] if value else 0,
+                    "pnl": history or [],
+                    "trades": len(trades),
+                    "trade_gap": max(1, round(gap)),
+                }
+    await search.close_session()
+    return fixtures
+
+
+class MockPolymarket:
+    """
+    Serves fixtures on three local ports, one per Polymarket API host, and counts every request.
+
+    Attributes:
+        calls (Counter): Number of requests per endpoint path.
+        errors (Counter): Number of injected error responses per status.
+    """
+
+    def __init__(self, fixtures, latency=0.0, jitter=0.0, error_rate=0.0, rate_429=0.0, seed=0, etags=True):
+        """
+        Args:
+            fixtures (dict): Output of `generate_fixtures` or `record_fixtures`.
+            latency (float, optional): Mean seconds added to every response.
+            jitter (float, optional): Maximum seconds of uniform random latency added on top of `latency`.
+            error_rate (float, optional): Probability of answering 502 instead of the fixture.
+            rate_429 (float, optional): Probability of answering 429 with a Retry-After of 1 second.
+            seed (int, optional): Random seed for latency and fault injection.
+            etags (bool, optional): Send ETags and answer matching If-None-Match requests with 304.
+        """
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.etags = etags
+        self.rng = random.Random(seed)
+        self.calls = Counter()
+        self.errors = Counter()
+        self.not_modified = Counter()
+        self.urls = {}
+        self._runners = []
+        self._markets_by_id = {m["conditionId"]: m for m in fixtures["markets"]}
+
+    @web.middleware
+    async def _faults(self, request, handler):
+        self.calls[request.path] += 1
+        delay = self.latency + self.rng.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        roll = self.rng.random()
+        if roll < self.rate_429:
+            self.errors[429] += 1
+            return web.Response(status=429, headers={"Retry-After": "1"})
+        if roll < self.rate_429 + self.error_rate:
+            self.errors[502] += 1
+            return web.Response(status=502)
+        response = await handler(request)
+        if self.etags and response.body:
+            etag = f'"{hashlib.sha1(response.body).hexdigest()}"'
+            if request.headers.get("If-None-Match") == etag:
+                self.not_modified[request.path] += 1
+                return web.Response(status=304, headers={"ETag": etag})
+            response.headers["ETag"] = etag
+        response.enable_compression()
+        return response
+
+    async def markets(self, request):
+        q = request.query
+        condition_ids = q.getall("condition_ids", [])
+        if condition_ids:
+            return web.json_response([self._markets_by_id[c] for c in condition_ids if c in self._markets_by_id])
+        min_volume = float(q.get("volume_num_min", 0))
+        matching = [m for m in self.fixtures["markets"] if float(m.get("volume", 0)) >= min_volume]
+        offset, limit = int(q.get("offset", 0)), int(q.get("limit", 20))
+        return web.json_response(matching[offset : offset + limit])
+
+    async def holders(self, request):
+        return web.json_response(self.fixtures["holders"].get(request.query.get("market"), []))
+
+    async def positions(self, request):
+        user, market = request.query.get("user"), request.query.get("market")
+        if market:
+            position = self.fixtures["positions"].get(f"{user}:{market}")
+            return web.json_response([position] if position else [])
+        prefix = f"{user}:"
+        return web.json_response([p for k, p in self.fixtures["positions"].items() if k.startswith(prefix)])
+
+    async def value(self, request):
+        wallet = self.fixtures["wallets"].get(request.query.get("user"))
+        return web.json_response([{"user": request.query.get("user"), "value": wallet["value"]}] if wallet else [])
+
+    async def activity(self, request):
+        wallet = self.fixtures["wallets"].get(request.query.get("user"))
+        if wallet is None:
+            return web.json_response([])
+        offset, limit = int(request.query.get("offset", 0)), int(request.query.get("limit", 100))
+        newest = int(time.time()) - wallet["trade_gap"]
+        indexes = range(offset, min(wallet["trades"], offset + limit))
+        return web.json_response([{"type": "TRADE", "timestamp": newest - i * wallet["trade_gap"]} for i in indexes])
+
+    async def user_pnl(self, request):
+        wallet = self.fixtures["wallets"].get(request.query.get("user_address"))
+        history = wallet["pnl"] if wallet else []
+        window = {"1d": DAY, "1w": 7 * DAY, "1m": 30 * DAY}.get(request.query.get("interval"))
+        if window and history:
+            history = [p for p in history if p["t"] >= time.time() - window]
+        return web.json_response(history)
+
+    async def start(self, host="127.0.0.1"):
+        """Starts one server per API host on free local ports. Returns the base URL of each service."""
+        routes = {
+            "gamma": [web.get("/markets", self.markets)],
+            "data": [
+                web.get("/holders", self.holders),
+                web.get("/positions", self.positions),
+                web.get("/value", self.value),
+                web.get("/activity", self.activity),
+            ],
+            "pnl": [web.get("/user-pnl", self.user_pnl)],
+        }
+        for service in SERVICES:
+            app = web.Application(middlewares=[self._faults])
+            app.add_routes(routes[service])
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            site = web.TCPSite(runner, host, 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            self.urls[service] = f"http://{host}:{port}"
+            self._runners.append(runner)
+        return self.urls
+
+    async def stop(self):
+        for runner in self._runners:
+            await runner.cleanup()
+        self._runners = []
+
+
+def load_fixtures(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+async def _serve(args):
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else generate_fixtures(markets=args.markets)
+    server = MockPolymarket(fixtures, args.latency, args.jitter, args.error_rate, args.rate_429)
+    urls = await server.start()
+    for service, url in urls.items():
+        print(f"{service}: {url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="fixtures file to serve (default: generate in memory)")
+    parser.add_argument("--generate", metavar="PATH", help="write synthetic fixtures to PATH and exit")
+    parser.add_argument("--record", metavar="PATH", help="record fixtures from the live APIs to PATH and exit")
+    parser.add_argument("--markets", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.generate or args.record:
+        fixtures = generate_fixtures(markets=args.markets) if args.generate else asyncio.run(record_fixtures(args.markets))
+        with open(args.generate or args.record, "w", encoding="utf-8") as f:
+            json.dump(fixtures, f)
+        return
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
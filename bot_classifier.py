@@ -0,0 +1,49 @@
+# A wallet is classified as a bot if its last TRADE_WINDOW trades all happened within MAX_SPAN_DAYS days
+TRADE_WINDOW = 500
+MAX_SPAN_DAYS = 50
+
+
+def is_bot(newest_timestamp, boundary_timestamp):
+    """
+    Returns the bot verdict for a wallet from the timestamps of its newest trade and its TRADE_WINDOW-th newest trade.
+
+    Args:
+        newest_timestamp (int): Unix time of the wallet's newest trade.
+        boundary_timestamp (int or None): Unix time of its TRADE_WINDOW-th newest trade, or None if it has fewer trades.
+
+    Returns:
+        bool: True if the wallet made TRADE_WINDOW trades in less than MAX_SPAN_DAYS days.
+    """
+    if boundary_timestamp is None:
+        return False
+    return (newest_timestamp - boundary_timestamp) / 86400 < MAX_SPAN_DAYS
+
+
+async def classify(wallet, fetch_trade):
+    """
+    Classifies a wallet as a bot or not. Callers cache the verdict (see `search.get_wallet_metrics`).
+
+    Instead of downloading the last TRADE_WINDOW trades, only the boundary trade (the TRADE_WINDOW-th newest) is
+    fetched. Most wallets have fewer trades than that and are settled by that one request; otherwise the newest trade
+    is fetched too and the span between the two is compared. The verdict is the same as comparing the first and last
+    timestamps of a TRADE_WINDOW-trade page.
+
+    Args:
+        wallet (str): The proxy wallet.
+        fetch_trade (Callable[[str, int], Awaitable[list or None]]): Fetches the trade at an offset (newest first) of
+            a wallet's activity, as a list of at most one trade: [] past the last trade, None if the request failed.
+
+    Returns:
+        bool or None: The verdict, or None if the activity could not be fetched.
+    """
+    boundary = await fetch_trade(wallet, TRADE_WINDOW - 1)
+    if boundary is None:
+        return None
+    if not boundary:
+        verdict = False
+    else:
+        newest = await fetch_trade(wallet, 0)
+        if not newest:
+            return None
+        verdict = is_bot(newest[0]["timestamp"], boundary[0]["timestamp"])
+    return verdict
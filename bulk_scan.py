@@ -0,0 +1,352 @@
+"""
+Headless bulk scan: analyzes every active market above min_volume and streams the results to a file, without Discord
+or Google Sheets. Rows are written as markets finish, so memory stays flat however many markets there are, and an
+interrupted scan picks up where it stopped when run again with the same output path.
+
+    python -m bulk_scan --out scans/2025-07-20.jsonl
+    python -m bulk_scan --out scans/nightly.csv --min-volume 500000 --workers 8
+    python -m bulk_scan --out scans/nightly.parquet --holders
+
+Parquet output needs pyarrow and is written as a directory of part files, one per --batch-size rows.
+"""
+
+import argparse
+import asyncio
+import csv
+import glob
+import json
+import os
+import sys
+import time
+
+import json_functs
+import market_cursor
+import pipeline
+import request_policy
+import search
+import wallet_cache
+
+# Columns of every output format, one row per market
+COLUMNS = (
+    "condition_id",
+    "question",
+    "ticker",
+    "volume",
+    "resolves",
+    "yes_price",
+    "no_price",
+    "growth_yes",
+    "growth_no",
+    "pnl_yes",
+    "pnl_no",
+    "prop_yes",
+    "prop_no",
+    "bots_yes",
+    "bots_no",
+    "flag",
+    "scanned_at",
+)
+STATS = {
+    "growth": "Scaled Growth Avg",
+    "pnl": "Scaled PNL Avg",
+    "prop": "Avg Prop of Account",
+    "bots": "Number of Bots",
+}
+
+
+def to_row(condition_id, results, flag):
+    """Flattens the results of `search.organize_market_data` and the flag verdict into one row of `COLUMNS`."""
+    prices = results.get("prices") or [None, None]
+    row = {
+        "condition_id": condition_id,
+        "question": results.get("question"),
+        "ticker": results.get("ticker"),
+        "volume": results.get("volume"),
+        "resolves": results.get("resolves"),
+        "yes_price": prices[0],
+        "no_price": prices[1] if len(prices) > 1 else None,
+        "flag": flag or "",
+        "scanned_at": round(time.time()),
+    }
+    for prefix, name in STATS.items():
+        row[f"{prefix}_yes"] = results[name]["yes"]
+        row[f"{prefix}_no"] = results[name]["no"]
+    return row
+
+
+def _trim_partial_line(path):
+    """Cut a line left half-written by an interrupted run off the end of a text file."""
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+        # walk back to the last complete line
+        position = end
+        while position > 0:
+            step = min(4096, position)
+            position -= step
+            f.seek(position)
+            chunk = f.read(step)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                f.truncate(position + newline + 1)
+                return
+        f.truncate(0)
+
+
+class JsonlWriter:
+    """Appends one JSON object per market to a JSON-lines file."""
+
+    def __init__(self, path, holders=False):
+        self.path = path
+        self.holders = holders
+        self._file = None
+
+    def done(self):
+        """Returns the condition IDs already in the file."""
+        if not os.path.exists(self.path):
+            return set()
+        _trim_partial_line(self.path)
+        with open(self.path, "r", encoding="utf-8") as f:
+            return {json.loads(line)["condition_id"] for line in f if line.strip()}
+
+    def write(self, row, holders):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        if self.holders:
+            row = {**row, "holders": holders}
+        self._file.write(json.dumps(row) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class CsvWriter:
+    """Appends one CSV row per market, writing the header when the file is new."""
+
+    def __init__(self, path, holders=False):
+        if holders:
+            raise SystemExit("--holders is only supported for JSON-lines and Parquet output")
+        self.path = path
+        self._file = None
+        self._writer = None
+
+    def done(self):
+        if not os.path.exists(self.path):
+            return set()
+        _trim_partial_line(self.path)
+        with open(self.path, "r", encoding="utf-8", newline="") as f:
+            return {row["condition_id"] for row in csv.DictReader(f)}
+
+    def write(self, row, holders):
+        if self._file is None:
+            new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            self._file = open(self.path, "a", encoding="utf-8", newline="")
+            self._writer = csv.DictWriter(self._file, fieldnames=COLUMNS)
+            if new:
+                self._writer.writeheader()
+        self._writer.writerow(row)
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ParquetWriter:
+    """
+    Writes markets to a directory of Parquet part files, `batch_size` rows each. Only complete part files are ever
+    visible (each is written to a temporary name and renamed), so an interruption loses at most the current batch.
+    """
+
+    def __init__(self, path, holders=False, batch_size=500):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+        self.pa, self.pq = pyarrow, pyarrow.parquet
+        self.path = path
+        self.holders = holders
+        self.batch_size = batch_size
+        self._rows = []
+
+    def _parts(self):
+        return sorted(glob.glob(os.path.join(self.path, "part-*.parquet")))
+
+    def done(self):
+        if not os.path.isdir(self.path):
+            return set()
+        done = set()
+        for part in self._parts():
+            done.update(self.pq.read_table(part, columns=["condition_id"]).column("condition_id").to_pylist())
+        return done
+
+    def write(self, row, holders):
+        if self.holders:
+            row = {**row, "holders": json.dumps(holders)}
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        part = os.path.join(self.path, f"part-{len(self._parts()):05d}.parquet")
+        table = self.pa.Table.from_pylist(self._rows)
+        self.pq.write_table(table, f"{part}.tmp")
+        os.replace(f"{part}.tmp", part)
+        self._rows = []
+
+    def close(self):
+        self.flush()
+
+
+WRITERS = {"jsonl": JsonlWriter, "csv": CsvWriter, "parquet": ParquetWriter}
+
+
+def output_format(path, requested=None):
+    """Returns the output format: `requested`, or the one matching the file extension of `path`."""
+    if requested:
+        return requested
+    extension = os.path.splitext(path.rstrip("/"))[1].lstrip(".").lower()
+    if extension in ("json", "jsonl", "ndjson"):
+        return "jsonl"
+    if extension in WRITERS:
+        return extension
+    raise SystemExit(f"Cannot tell the output format of {path}; pass --format")
+
+
+async def bulk_scan(writer, settings, workers=8, page_size=100, log=print, retry_delay=5):
+    """
+    Scans every active market above settings["min_volume"] that is not already in the output, writing each result
+    as soon as it is ready.
+
+    Args:
+        writer: One of the `WRITERS`.
+        settings (dict): The bot configuration, for "min_volume" and the flagging thresholds.
+        workers (int, optional): Markets analyzed at once.
+        page_size (int, optional): Markets requested per Gamma API call.
+        log (Callable[[str], None], optional): Progress output.
+        retry_delay (float, optional): Seconds to wait before reading the market list again after it failed.
+
+    Returns:
+        dict: Counts of "skipped" (already in the output or listed twice), "written" and "failed" markets. A market failed if its
+            analysis or its write failed; failures to read the market list are retried and not counted.
+    """
+    done = set(writer.done())  # also holds every market handed to the pipeline, so duplicates are scanned once
+    counts = {"skipped": 0, "written": 0, "failed": 0}
+    cursor = market_cursor.MarketCursor(settings["min_volume"], 0, page_size=page_size)
+    discovered, finished, exhausted = 0, asyncio.Event(), False
+    started = time.monotonic()
+
+    def check_finished():
+        if exhausted and counts["written"] + counts["failed"] >= discovered:
+            finished.set()
+
+    async def discover():
+        nonlocal discovered, exhausted
+        if not search.host_available(search.BASE_DATA):  # wait out the outage instead of failing every market
+            return None
+        while True:
+            market = await cursor.next()
+            if market is None:
+                exhausted = cursor.exhausted
+                check_finished()
+                return None
+            if market["conditionId"] in done:
+                counts["skipped"] += 1
+                continue
+            done.add(market["conditionId"])
+            discovered += 1
+            return market
+
+    async def analyze(market):
+        condition_id = market["conditionId"]
+        _, _, results = await search.organize_market_data(condition_id, market)
+        holders = results.pop("holders", [])
+        flag = await search.flag_market(results, settings)
+        return to_row(condition_id, results, flag), holders
+
+    async def publish(result):
+        writer.write(*result)
+        counts["written"] += 1
+        if counts["written"] % 25 == 0:
+            rate = counts["written"] / (time.monotonic() - started) * 60
+            log(f"{counts['written']} markets written ({rate:.1f}/min), {counts['failed']} failed")
+        check_finished()
+
+    async def on_error(stage, error):
+        if stage == "discovery":  # nothing was taken from the market list; it is read again after retry_delay
+            log(f"Reading the market list failed, retrying: {error}")
+            return
+        counts["failed"] += 1
+        check_finished()
+
+    scan = pipeline.ScanPipeline(discover, analyze, publish, on_error=on_error, workers=workers, idle_delay=retry_delay)
+    scan.start()
+    try:
+        await finished.wait()
+    finally:
+        await scan.stop()
+        writer.close()
+    return counts
+
+
+async def _main(args):
+    settings = json_functs.read()
+    if args.min_volume is not None:
+        settings["min_volume"] = args.min_volume
+    search.configure_concurrency(settings.get("max_concurrency"), settings.get("max_per_host"))
+    request_policy.configure(settings)
+    wallet_cache.configure(settings)
+    await search.open_session(
+        limit=settings.get("http_limit", 100),
+        limit_per_host=settings.get("http_limit_per_host", 20),
+        total_timeout=settings.get("http_total_timeout", 30),
+        connect_timeout=settings.get("http_connect_timeout", 10),
+    )
+
+    fmt = output_format(args.out, args.format)
+    writer = WRITERS[fmt](args.out, holders=args.holders, **({"batch_size": args.batch_size} if fmt == "parquet" else {}))
+    log = lambda msg: print(msg, file=sys.stderr)
+    try:
+        counts = await bulk_scan(
+            writer,
+            settings,
+            workers=args.workers or settings.get("scan_workers", 4),
+            page_size=settings.get("market_page_size", 100),
+            log=log,
+        )
+    finally:
+        await search.close_session()
+        wallet_cache.CACHE.save()
+    log(f"Done: {counts['written']} written, {counts['skipped']} already in {args.out}, {counts['failed']} failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="output file (.csv, .jsonl) or directory (.parquet)")
+    parser.add_argument("--format", choices=sorted(WRITERS), help="output format (default: from the extension)")
+    parser.add_argument("--min-volume", type=int, help="minimum market volume (default: 'min_volume')")
+    parser.add_argument("--workers", type=int, help="markets analyzed at once (default: 'scan_workers')")
+    parser.add_argument("--holders", action="store_true", help="include per-holder rows (JSON-lines and Parquet)")
+    parser.add_argument("--batch-size", type=int, default=500, help="rows per Parquet part file")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
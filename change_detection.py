@@ -0,0 +1,135 @@
+import hashlib
+import json
+import math
+import os
+import time
+
+import fast_json
+
+
+def fingerprint(market, holders, price_decimals=2):
+    """
+    Returns a fingerprint of the inputs that drive a market's analysis.
+
+    Two scans with the same fingerprint have the same top holders on each side, outcome prices equal to
+    `price_decimals` places and volume in the same quarter-decade bucket (each bucket ~1.78x the previous one).
+
+    Args:
+        market (dict): The market as returned by the Gamma API.
+        holders (list[list[str]]): Holder wallets per outcome, as returned by `search.get_holders`.
+        price_decimals (int, optional): Decimal places outcome prices are rounded to.
+
+    Returns:
+        str: A hex digest.
+    """
+    prices = [round(p, price_decimals) for p in fast_json.outcome_prices(market) or ()]
+    try:
+        volume = float(str(market.get("volume") or 0).replace(",", ""))
+        volume_bucket = math.floor(math.log10(volume) * 4) if volume > 0 else None
+    except ValueError:
+        volume_bucket = None
+
+    payload = json.dumps([sorted(group) for group in holders] + [prices, volume_bucket])
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class FingerprintStore:
+    """
+    Remembers the fingerprint and analysis output of each market's last full analysis, keyed by condition ID.
+    Persisted to a JSON file so unchanged markets are still skipped after a restart.
+    """
+
+    def __init__(self, file_path=None, max_age=6 * 60 * 60, save_interval=300):
+        """
+        Args:
+            file_path (str, optional): JSON file the store is persisted to. None disables persistence.
+            max_age (float, optional): Seconds after which a market is fully re-analyzed even if unchanged, since
+                holder PnL and account values keep moving.
+            save_interval (float, optional): Minimum seconds between automatic saves from `maybe_save`.
+        """
+        self.file_path = file_path
+        self.max_age = max_age
+        self.save_interval = save_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._dirty = False
+        self._last_save = time.time()
+
+    def lookup(self, condition_id, fp):
+        """
+        Returns the stored (sheets_data, msg, results) of a market if its fingerprint still matches and the analysis
+        is younger than `max_age`, otherwise None.
+        """
+        entry = self._entries.get(condition_id)
+        if entry is None or entry["fingerprint"] != fp or time.time() - entry["time"] > self.max_age:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return list(entry["sheets_data"]), entry["msg"], entry["results"]
+
+    def store(self, condition_id, fp, sheets_data, msg, results):
+        """Stores the fingerprint and output of a full analysis of a market."""
+        self._entries[condition_id] = {
+            "fingerprint": fp,
+            "time": time.time(),
+            "sheets_data": list(sheets_data),
+            "msg": msg,
+            "results": results,
+        }
+        self._dirty = True
+
+    def load(self):
+        """Loads persisted entries from `file_path`."""
+        if not self.file_path or not os.path.exists(self.file_path):
+            return
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Could not load market fingerprints from {self.file_path}: {e}")
+
+    def save(self):
+        """Writes all entries to `file_path`, replacing the previous file atomically."""
+        if not self.file_path:
+            return
+        # may run on a worker thread (see loop_watchdog.offload): entries are only ever replaced, never mutated, so a
+        # copy of the dict is consistent, and an expired entry is only dropped if it has not been replaced meanwhile
+        now = time.time()
+        self._dirty = False
+        self._last_save = now
+        entries = dict(self._entries)
+        for condition_id, entry in list(entries.items()):
+            if now - entry["time"] > self.max_age:
+                del entries[condition_id]
+                if self._entries.get(condition_id) is entry:
+                    self._entries.pop(condition_id, None)
+        tmp_path = f"{self.file_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.file_path)
+
+    def maybe_save(self):
+        """Saves the store if it has changed and `save_interval` seconds have passed since the last save."""
+        if self._dirty and time.time() - self._last_save >= self.save_interval:
+            self.save()
+
+
+# Shared store used by the scanner; replaced by `configure` with the bot's settings
+STORE = FingerprintStore()
+
+
+def configure(settings):
+    """
+    Replaces the shared store with one built from the bot settings and loads any persisted entries.
+
+    Args:
+        settings (dict): The bot configuration. Reads "fingerprint_max_age".
+
+    Returns:
+        FingerprintStore: The new shared store.
+    """
+    global STORE
+    STORE = FingerprintStore(file_path="storage/fingerprints.json", max_age=settings.get("fingerprint_max_age", 6 * 60 * 60))
+    STORE.load()
+    return STORE
@@ -0,0 +1,167 @@
+import asyncio
+import time
+
+import discord
+
+import helper_functs
+import stats
+
+MESSAGE_LIMIT = 2000  # Discord's maximum characters per message
+SEPARATOR = "\n"  # placed between market summaries coalesced into one message
+
+
+class DiscordDispatcher:
+    """
+    Posts scanner output to Discord from a background task so analysis never waits on Discord.
+
+    Each channel has its own queue. When a channel may post again, everything queued for it is coalesced into as few
+    messages as fit within Discord's character limit. Channels with a higher priority (e.g. flagged buys) are served
+    first, and each channel keeps at least `min_interval` seconds between its messages, longer after a 429.
+    """
+
+    def __init__(self, min_interval=1.0, max_pending=500, max_retries=3):
+        """
+        Args:
+            min_interval (float, optional): Minimum seconds between two messages to the same channel.
+            max_pending (int, optional): Maximum queued summaries per channel; the oldest are dropped beyond it.
+            max_retries (int, optional): Attempts per message before it is dropped.
+        """
+        self.min_interval = min_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self._queues = {}  # channel id -> {"channel", "priority", "blocks", "next_send"}
+        self._wakeup = None
+        self._task = None
+        self._stopping = False
+
+    def enqueue(self, channel, content, priority=0):
+        """
+        Queues `content` to be posted to `channel`.
+
+        Args:
+            channel (discord.abc.Messageable): Destination channel.
+            content (str): Message text. Consecutive items for the same channel may be merged into one message.
+            priority (int, optional): Channels with a higher priority are posted to first.
+        """
+        queue = self._queues.get(channel.id)
+        if queue is None:
+            queue = self._queues[channel.id] = {"channel": channel, "priority": priority, "blocks": [], "next_send": 0}
+        queue["priority"] = max(queue["priority"], priority)
+        queue["blocks"].append(content)
+        if len(queue["blocks"]) > self.max_pending:
+            del queue["blocks"][0]
+            stats.incr("discord_dropped_total")
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def pending(self):
+        """Returns the number of queued items across all channels."""
+        return sum(len(q["blocks"]) for q in self._queues.values())
+
+    @staticmethod
+    def _pack(blocks):
+        """Take as many leading blocks as fit in one message. Returns (message, number of blocks used)."""
+        if len(blocks[0]) > MESSAGE_LIMIT:
+            return helper_functs.split_message([blocks[0]], MESSAGE_LIMIT)[0], 0
+        message, used = blocks[0], 1
+        for block in blocks[1:]:
+            if len(message) + len(SEPARATOR) + len(block) > MESSAGE_LIMIT:
+                break
+            message += SEPARATOR + block
+            used += 1
+        return message, used
+
+    async def _send(self, queue):
+        """Posts the next coalesced message of a channel's queue."""
+        blocks = queue["blocks"]
+        message, used = self._pack(blocks)
+        for attempt in range(self.max_retries):
+            try:
+                with stats.timer("discord_post"):
+                    await queue["channel"].send(message)
+                stats.incr("discord_messages_total")
+                break
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    queue["next_send"] = time.monotonic() + float(getattr(e, "retry_after", None) or 5)
+                    return  # keep the blocks; retried once the channel's rate limit resets
+                if e.status < 500 or attempt == self.max_retries - 1:
+                    print(f"Discord post to channel {queue['channel'].id} failed: {e}")
+                    break
+                await asyncio.sleep(2**attempt)
+
+        if used:
+            del blocks[:used]
+        else:  # an oversized block: drop the part that was sent
+            blocks[0] = blocks[0][MESSAGE_LIMIT:]
+        queue["next_send"] = time.monotonic() + self.min_interval
+        if not blocks:
+            queue["priority"] = 0
+
+    def _ready(self, now):
+        """Returns the highest-priority channel queue that has work and may post now, or None."""
+        ready = [q for q in self._queues.values() if q["blocks"] and q["next_send"] <= now]
+        return max(ready, key=lambda q: q["priority"]) if ready else None
+
+    async def _run(self):
+        while not self._stopping:
+            now = time.monotonic()
+            queue = self._ready(now)
+            if queue is not None:
+                await self._send(queue)
+                continue
+
+            waiting = [q["next_send"] for q in self._queues.values() if q["blocks"]]
+            timeout = max(0.0, min(waiting) - now) if waiting else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def flush(self):
+        """Posts everything still queued, ignoring `min_interval` (discord.py still honours Discord's rate limits)."""
+        for queue in sorted(self._queues.values(), key=lambda q: -q["priority"]):
+            while queue["blocks"]:
+                queue["next_send"] = 0
+                await self._send(queue)
+                if queue["next_send"] - time.monotonic() > self.min_interval:  # rate limited; give up on this channel
+                    break
+
+    def start(self):
+        """Starts the background posting task on the running event loop."""
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the background posting task and posts whatever is still queued."""
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task  # lets an in-progress post finish
+            self._task = None
+        await self.flush()
+
+
+# Shared dispatcher used by the scanner; replaced by `configure` with the bot's settings
+DISPATCHER = DiscordDispatcher()
+
+
+def configure(settings):
+    """
+    Replaces the shared dispatcher with one built from the bot settings.
+
+    Args:
+        settings (dict): The bot configuration. Reads "discord_min_interval" and "discord_max_pending".
+
+    Returns:
+        DiscordDispatcher: The new shared dispatcher.
+    """
+    global DISPATCHER
+    DISPATCHER = DiscordDispatcher(
+        min_interval=settings.get("discord_min_interval", 1.0),
+        max_pending=settings.get("discord_max_pending", 500),
+    )
+    return DISPATCHER
@@ -0,0 +1,33 @@
+import json
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:  # optional; the standard library decoder is used without it
+    orjson = None
+
+
+def loads(data):
+    """Decodes JSON from bytes or str with orjson when it is installed, otherwise with the json module."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@lru_cache(maxsize=8192)
+def _parse_prices(raw):
+    return tuple(float(p) for p in loads(raw))
+
+
+def outcome_prices(market):
+    """
+    Returns a market's outcome prices as a tuple of floats, or None if it has none or they cannot be parsed.
+    The parsed prices are cached by their raw "outcomePrices" string, so each distinct string is only decoded once.
+    """
+    raw = market.get("outcomePrices")
+    if not raw:
+        return None
+    try:
+        return _parse_prices(raw) or None
+    except (TypeError, ValueError):
+        return None
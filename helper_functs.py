@@ -1,65 +1,40 @@
-import gspread
+import sheets_writer
 from datetime import datetime, time, timedelta
-from oauth2client.service_account import ServiceAccountCredentials
 
 
 async def insert_row_at_top(insert):
     """
-    Inserts a row at the top (index 3) of a specified Google Sheets spreadsheet.
+    Queues a row to be inserted at the top (index 3) of the Google Sheets spreadsheet.
     Args:
         insert (list): The list of values to insert as a new row.
-    Raises:
-        gspread.exceptions.APIError: If there is an error communicating with the Google Sheets API.
-        FileNotFoundError: If the credentials file is not found.
     Note:
-        - Requires a valid Google Sheets API credentials JSON file at 'storage/my_sheets_key.json'.
-        - The spreadsheet is accessed via its URL.
+        - Rows are written in batches by `sheets_writer.WRITER` from a worker thread, so this returns immediately.
+        - Requires a valid Google Sheets API credentials JSON file at 'storage/sheets_key.json'.
         - The row is inserted at index 3 (after the header rows).
     """
-    # 1) Define the scopes
-    SCOPES = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-    creds = ServiceAccountCredentials.from_json_keyfile_name("storage/sheets_key.json", SCOPES)
-    client = gspread.authorize(creds)
+    sheets_writer.WRITER.enqueue(insert)
 
-    # 3) Open your spreadsheet by URL
-    spreadsheet = client.open_by_url("https://docs.google.com/spreadsheets/d/13DQJk0G1Dgw8Jcae0vQbqhzrNXjShquQByw0mQMAeDE/edit?gid=0#gid=0")
-    sheet = spreadsheet.sheet1
 
-    # 5) Insert at the very top
-    sheet.insert_row(insert, index=3, value_input_option="USER_ENTERED")
-
-
-async def scaled_avg(vals, sizes):
-    """
-    Calculates the scaled average of values, weighted by corresponding sizes.
-
-    Args:
-        vals (Iterable[float]): The values to be averaged.
-        sizes (Iterable[float]): The weights or sizes corresponding to each value.
-
-    Returns:
-        float: The scaled average, or 0 if the sum of sizes or the number of values is zero.
-    """
-    if (sum(sizes) * len(vals)) == 0:
-        return 0
-    return sum(v * s for v, s in zip(vals, sizes)) / (sum(sizes) * len(vals))
-
-
-async def avg_prop(sizes, accounts):
+def split_message(blocks, limit=2000):
     """
-    Calculates the average proportion of sizes to accounts.
+    Packs message blocks into as few Discord messages as possible without exceeding the character limit.
 
     Args:
-        sizes (Iterable[float]): A sequence of size values.
-        accounts (Iterable[float]): A sequence of account values corresponding to sizes.
+        blocks (Iterable[str]): Message parts that should not be split, in order.
+        limit (int, optional): Maximum characters per message. Defaults to Discord's 2000.
 
     Returns:
-        float: The average of the ratios (size/account) for each pair where account is not zero.
-               Returns 0 if the sum of accounts is zero.
+        list[str]: The messages to send, in order. A block longer than `limit` is cut into `limit`-sized pieces.
     """
-    if sum(accounts) == 0:
-        return 0
-    return sum(s / a for s, a in zip(sizes, accounts) if a != 0) / len(sizes)
+    messages = [""]
+    for block in blocks:
+        while len(block) > limit:
+            messages.append(block[:limit])
+            block = block[limit:]
+        if len(messages[-1]) + len(block) > limit:
+            messages.append("")
+        messages[-1] += block
+    return [m for m in messages if m]
 
 
 async def is_allowed_time(anchor_hour=None) -> bool:
@@ -0,0 +1,239 @@
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    condition_id TEXT NOT NULL,
+    time REAL NOT NULL,
+    question TEXT,
+    volume REAL,
+    yes_price REAL,
+    no_price REAL,
+    growth_yes REAL,
+    growth_no REAL,
+    pnl_yes REAL,
+    pnl_no REAL,
+    prop_yes REAL,
+    prop_no REAL,
+    bots_yes INTEGER,
+    bots_no INTEGER,
+    flag TEXT,
+    results TEXT NOT NULL,
+    msg TEXT
+);
+CREATE INDEX IF NOT EXISTS analyses_condition_time ON analyses (condition_id, time);
+CREATE INDEX IF NOT EXISTS analyses_time ON analyses (time);
+CREATE TABLE IF NOT EXISTS holders (
+    analysis_id INTEGER NOT NULL REFERENCES analyses (id) ON DELETE CASCADE,
+    wallet TEXT,
+    side INTEGER NOT NULL,
+    growth REAL,
+    pnl REAL,
+    pos_size REAL,
+    account REAL,
+    is_bot INTEGER
+);
+CREATE INDEX IF NOT EXISTS holders_analysis ON holders (analysis_id);
+CREATE INDEX IF NOT EXISTS holders_wallet ON holders (wallet);
+"""
+
+# Per-holder columns, in the order of the rows in `results["holders"]`
+HOLDER_COLUMNS = ("wallet", "side", "growth", "pnl", "pos_size", "account", "is_bot")
+
+# Analysis columns returned by `ResultsHistory.snapshots`
+SNAPSHOT_COLUMNS = (
+    "condition_id",
+    "time",
+    "yes_price",
+    "no_price",
+    "growth_yes",
+    "growth_no",
+    "pnl_yes",
+    "pnl_no",
+    "prop_yes",
+    "prop_no",
+    "bots_yes",
+    "bots_no",
+)
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ResultsHistory:
+    """
+    SQLite history of every market analysis: one row per analysis in `analyses` (prices, volume, every statistic, the
+    flag verdict and the posted message) and one row per holder in `holders`.
+
+    The connection is shared between the event loop and worker threads and guarded by a lock; callers on the event
+    loop should run `record` through `asyncio.to_thread`.
+    """
+
+    def __init__(self, db_path=":memory:"):
+        """
+        Args:
+            db_path (str, optional): Path to the SQLite database file, created if it does not exist.
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+
+    def record(self, condition_id, results, flag=None, msg=None, holders=None, timestamp=None):
+        """
+        Stores one analysis of a market.
+
+        Args:
+            condition_id (str): The market's condition ID.
+            results (dict): The results of `search.organize_market_data`, without the "holders" rows.
+            flag (str, optional): The flag verdict ("YES", "NO") or None.
+            msg (str, optional): The Discord summary of the analysis.
+            holders (list[list], optional): Per-holder rows in `HOLDER_COLUMNS` order.
+            timestamp (float, optional): Unix time of the analysis. Defaults to now.
+
+        Returns:
+            int: The id of the new analysis row.
+        """
+        prices = results.get("prices") or [None, None]
+        stat = lambda name, side: _number(results.get(name, {}).get(side))
+        row = (
+            condition_id,
+            timestamp or time.time(),
+            results.get("question"),
+            _number(results.get("volume")),
+            _number(prices[0]),
+            _number(prices[1]) if len(prices) > 1 else None,
+            stat("Scaled Growth Avg", "yes"),
+            stat("Scaled Growth Avg", "no"),
+            stat("Scaled PNL Avg", "yes"),
+            stat("Scaled PNL Avg", "no"),
+            stat("Avg Prop of Account", "yes"),
+            stat("Avg Prop of Account", "no"),
+            stat("Number of Bots", "yes"),
+            stat("Number of Bots", "no"),
+            flag or None,
+            json.dumps(results),
+            msg,
+        )
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO analyses (condition_id, time, question, volume, yes_price, no_price, growth_yes, growth_no, "
+                "pnl_yes, pnl_no, prop_yes, prop_no, bots_yes, bots_no, flag, results, msg) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                row,
+            )
+            analysis_id = cur.lastrowid
+            if holders:
+                self._conn.executemany(
+                    "INSERT INTO holders (analysis_id, wallet, side, growth, pnl, pos_size, account, is_bot) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(analysis_id, *h) for h in holders],
+                )
+        return analysis_id
+
+    def _rows(self, sql, params):
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        out = []
+        for row in rows:
+            entry = dict(row)
+            if "results" in entry:
+                entry["results"] = json.loads(entry["results"])
+            out.append(entry)
+        return out
+
+    def latest(self, condition_id, max_age=None):
+        """
+        Returns the most recent analysis of a market as a dict of the `analyses` columns ("results" decoded), or
+        None if there is none, or none younger than `max_age` seconds.
+        """
+        since = time.time() - max_age if max_age is not None else 0
+        rows = self._rows(
+            "SELECT * FROM analyses WHERE condition_id = ? AND time >= ? ORDER BY time DESC LIMIT 1",
+            (condition_id, since),
+        )
+        return rows[0] if rows else None
+
+    def history(self, condition_id=None, since=None, until=None, limit=None):
+        """
+        Returns analyses in time order, optionally limited to one market and a time window.
+
+        Args:
+            condition_id (str, optional): Only analyses of this market.
+            since (float, optional): Unix time of the start of the window.
+            until (float, optional): Unix time of the end of the window.
+            limit (int, optional): Maximum number of analyses, the most recent ones.
+
+        Returns:
+            list[dict]: The analyses, oldest first.
+        """
+        clauses, params = [], []
+        if condition_id is not None:
+            clauses.append("condition_id = ?")
+            params.append(condition_id)
+        if since is not None:
+            clauses.append("time >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("time <= ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT * FROM analyses {where} ORDER BY time DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return self._rows(sql, params)[::-1]
+
+    def snapshots(self, since=None, until=None):
+        """
+        Returns the statistics of every analysis in a time window as tuples of `SNAPSHOT_COLUMNS`, ordered by market
+        and then time, for bulk analysis (see backtest.py).
+        """
+        sql = f"SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM analyses WHERE time >= ? AND time <= ? ORDER BY condition_id, time"
+        with self._lock:
+            return self._conn.execute(sql, (since or 0, until or float("inf"))).fetchall()
+
+    def holders(self, analysis_id):
+        """Returns the holder rows of one analysis as dicts of `HOLDER_COLUMNS`."""
+        return self._rows(
+            f"SELECT {', '.join(HOLDER_COLUMNS)} FROM holders WHERE analysis_id = ? ORDER BY rowid", (analysis_id,)
+        )
+
+    def prune(self, max_age):
+        """Deletes analyses (and their holders) older than `max_age` seconds. Returns the number deleted."""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM analyses WHERE time < ?", (time.time() - max_age,)).rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Shared history used by the scanner; replaced by `configure` with the bot's settings
+HISTORY = ResultsHistory()
+
+
+def configure(settings):
+    """
+    Replaces the shared history with one stored in the bot's database file.
+
+    Args:
+        settings (dict): The bot configuration. Reads "history_db".
+
+    Returns:
+        ResultsHistory: The new shared history.
+    """
+    global HISTORY
+    HISTORY = ResultsHistory(settings.get("history_db", "storage/history.db"))
+    return HISTORY
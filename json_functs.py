@@ -1,9 +1,109 @@
+import atexit
+import copy
 import json
+import os
+import threading
+import time
+
+# In-memory store of every JSON file read through this module, keyed by file path.
+# Reads are served from memory; changes are written back by a debounced background timer.
+_STORE = {}
+_LOCK = threading.RLock()
+_IO_LOCK = threading.Lock()  # serializes file writes, which happen outside `_LOCK`
+_TIMERS = {}
+WRITE_DELAY = 1.0  # seconds to wait for further changes before writing a file
+MTIME_CHECK_INTERVAL = 1.0  # seconds between checks for external edits of a file
+
+
+def _mtime(file_path):
+    return os.stat(file_path).st_mtime_ns
+
+
+def _load(file_path):
+    """
+    Returns the in-memory data for a JSON file, loading it on first use and reloading it if the file was changed
+    on disk by something else. A file with unwritten changes is never reloaded.
+    """
+    with _LOCK:
+        entry = _STORE.get(file_path)
+        now = time.monotonic()
+        if entry is not None and (entry["dirty"] or now - entry["checked"] < MTIME_CHECK_INTERVAL):
+            return entry["data"]
+
+        mtime = _mtime(file_path)
+        if entry is None or entry["mtime"] != mtime:
+            with open(file_path, "r", encoding="utf-8") as f:
+                entry = {"data": json.load(f), "mtime": mtime, "dirty": False, "version": 0, "written": 0}
+            _STORE[file_path] = entry
+        entry["checked"] = now
+        return entry["data"]
+
+
+def _write(file_path):
+    """
+    Writes the in-memory data for a file to disk atomically (write to a temporary file, then rename).
+    The data is serialized under the lock, but the file is written and synced without holding it, so reads and
+    updates on the event loop never wait for the disk.
+    """
+    with _LOCK:
+        entry = _STORE.get(file_path)
+        _TIMERS.pop(file_path, None)
+        if entry is None or not entry["dirty"]:
+            return
+        text = json.dumps(entry["data"], indent=4)
+        version = entry["version"]
+
+    with _IO_LOCK:
+        if entry["written"] >= version:  # a newer snapshot was written first
+            return
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+        entry["written"] = version
+        mtime = _mtime(file_path)
+
+    with _LOCK:
+        entry["mtime"] = mtime
+        if entry["version"] == version:  # otherwise changed while writing; its own timer writes it again
+            entry["dirty"] = False
+
+
+def _mark_dirty(file_path):
+    """Schedules a write of the file on a background thread, restarting the delay if one is already pending."""
+    with _LOCK:
+        entry = _STORE[file_path]
+        entry["dirty"] = True
+        entry["version"] += 1
+        timer = _TIMERS.get(file_path)
+        if timer is not None:
+            timer.cancel()
+        timer = threading.Timer(WRITE_DELAY, _write, args=(file_path,))
+        timer.daemon = True
+        _TIMERS[file_path] = timer
+        timer.start()
+
+
+def flush():
+    """Writes every file with pending changes immediately. Called on shutdown."""
+    with _LOCK:
+        for timer in _TIMERS.values():
+            timer.cancel()
+        file_paths = list(_STORE)
+    for file_path in file_paths:
+        _write(file_path)
+
+
+atexit.register(flush)
 
 
 def read(key=None, file_path="storage/config.json"):
     """
     Reads data from a JSON file and optionally retrieves the value for a specified key.
+    Served from memory; the file is only re-parsed when it has been changed on disk by something else. The returned
+    value is a copy, so changing it does not change the stored data; use `update` for that.
 
     Args:
         key (str, optional): The key whose value should be retrieved from the JSON data. If None, returns the entire data.
@@ -16,14 +116,15 @@ def read(key=None, file_path="storage/config.json"):
         FileNotFoundError: If the specified file does not exist.
         json.JSONDecodeError: If the file is not valid JSON.
     """
-    with open(file_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-        return data.get(key) if key else data
+    with _LOCK:
+        data = _load(file_path)
+        return copy.deepcopy(data.get(key) if key else data)
 
 
 def update(key, value, file_path="storage/config.json"):
     """
     Updates the value associated with a given key in a JSON file.
+    The in-memory data changes immediately; the file is rewritten atomically in the background shortly after.
 
     Args:
         key (str): The key to update in the JSON data.
@@ -37,18 +138,18 @@ def update(key, value, file_path="storage/config.json"):
         FileNotFoundError: If the specified JSON file does not exist.
         json.JSONDecodeError: If the file contains invalid JSON.
     """
-    with open(file_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    if key:
-        data[key] = value
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
-    return data
+    with _LOCK:
+        data = _load(file_path)
+        if key:
+            data[key] = value
+            _mark_dirty(file_path)
+        return copy.deepcopy(data)
 
 
 def iterate(key, iteration, file_path="storage/config.json"):
     """
     Increments the value of a specified key in the JSON file by a given iteration amount.
+    The in-memory data changes immediately; the file is rewritten atomically in the background shortly after.
 
     Args:
         key (str): The key to update in the JSON data.
@@ -62,13 +163,12 @@ def iterate(key, iteration, file_path="storage/config.json"):
         FileNotFoundError: If the specified JSON file does not exist.
         json.JSONDecodeError: If the file contains invalid JSON.
     """
-    with open(file_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    if type(data[key]) == int:
-        data[key] = data[key] + iteration
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
-    return data
+    with _LOCK:
+        data = _load(file_path)
+        if type(data[key]) == int:
+            data[key] = data[key] + iteration
+            _mark_dirty(file_path)
+        return copy.deepcopy(data)
 
 
 def append_flagged_markets(value, file_path="storage/flagged_markets.json"):
@@ -86,13 +186,12 @@ def append_flagged_markets(value, file_path="storage/flagged_markets.json"):
         FileNotFoundError: If the specified JSON file does not exist.
         json.JSONDecodeError: If the JSON file contains invalid JSON.
     """
-    with open(file_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    if value:
-        data.get("markets", []).append(value)
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
-    return data
+    with _LOCK:
+        data = _load(file_path)
+        if value:
+            data.get("markets", []).append(value)
+            _mark_dirty(file_path)
+        return copy.deepcopy(data)
 
 
 def remove_flagged_markets(value, file_path="storage/flagged_markets.json"):
@@ -110,13 +209,12 @@ def remove_flagged_markets(value, file_path="storage/flagged_markets.json"):
         FileNotFoundError: If the specified JSON file does not exist.
         json.JSONDecodeError: If the JSON file contains invalid JSON.
     """
-    with open(file_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    if value:
-        data.get("markets", []).remove(value)
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
-    return data
+    with _LOCK:
+        data = _load(file_path)
+        if value:
+            data.get("markets", []).remove(value)
+            _mark_dirty(file_path)
+        return copy.deepcopy(data)
 
 
 async def set_setting(key, value):
@@ -125,9 +223,11 @@ async def set_setting(key, value):
 
     Parameters:
         key (str): The name of the setting to update. Must be one of the valid keys:
-            ['offset', 'min_volume', 'min_growth_rate_diff', 'min_pnl_diff', 'min_bot_count_diff', 'min_share_price', 'max_share_price'].
+            ['offset', 'min_volume', 'min_growth_rate_diff', 'min_pnl_diff', 'min_bot_count_diff', 'min_share_price', 'max_share_price',
+            'scan_workers', 'weight_volume', 'weight_movement', 'weight_end_date', 'weight_staleness'].
         value (float or int): The new value to set for the specified key. For 'min_share_price' and 'max_share_price', must be a float between 0.0 and 1.0.
             For other keys, must be an integer greater than 0. For 'min_bot_count_diff', must be an integer between 0 and 20.
+            For 'scan_workers', must be an integer between 1 and 32. The scheduler weights ('weight_*') must be floats of at least 0.
 
     Returns:
         str: A formatted message indicating the result of the operation, including validation errors or confirmation of the update.
@@ -142,6 +242,11 @@ async def set_setting(key, value):
         "min_bot_count_diff",
         "min_share_price",
         "max_share_price",
+        "scan_workers",
+        "weight_volume",
+        "weight_movement",
+        "weight_end_date",
+        "weight_staleness",
     ]
     if key not in valid_keys:
         return "```Invalid setting. Valid settings are: \n" + ", ".join(valid_keys) + "```"
@@ -155,6 +260,15 @@ async def set_setting(key, value):
                 return f"```Setting '{key}' updated from {old_setting} to: {value}```"
             except ValueError:
                 return "```Invalid value for share price settings. Please provide a valid float value.```"
+        elif key.startswith("weight_"):
+            try:
+                value = float(value)
+                if value < 0.0:
+                    return f"```{key} must be 0.0 or greater```"
+                update(key, value)
+                return f"```Setting '{key}' updated from {old_setting} to: {value}```"
+            except ValueError:
+                return "```Invalid value for scheduler weights. Please provide a valid float value.```"
         else:
             try:
                 value = int(value)
@@ -164,6 +278,8 @@ async def set_setting(key, value):
                     return "```Minimum bot count difference must be between 0 and 20.```"
                 if key == "rundown_time" and (value < 0 or value > 24):
                     return "```Rundown time must be between 0 and 24 (military time)```"
+                if key == "scan_workers" and value > 32:
+                    return "```Scan workers must be between 1 and 32.```"
 
                 update(key, value)
                 return f"```Setting '{key}' updated from {old_setting} to: {value}```"
@@ -0,0 +1,204 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from datetime import datetime
+
+import stats
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+STACK_DEPTH = 8  # innermost frames kept per offender
+
+
+def _site(frame):
+    """Formats a frame as "file:line in function", with paths relative to the repository."""
+    if frame.filename.startswith(REPO_DIR):
+        path = os.path.relpath(frame.filename, REPO_DIR)
+    else:
+        path = os.path.basename(frame.filename)
+    return f"{path}:{frame.lineno} in {frame.name}"
+
+
+def _blame(stack):
+    """
+    Returns (site, call) for a sampled stack: the innermost frame in the bot's own code, which made the blocking
+    call, and the innermost frame overall, where the loop actually was.
+    """
+    own = [f for f in stack if f.filename.startswith(REPO_DIR) and not f.filename.endswith("loop_watchdog.py")]
+    call = _site(stack[-1]) if stack else "?"
+    return (_site(own[-1]) if own else call), call
+
+
+class LoopWatchdog:
+    """
+    Measures event-loop lag and finds the code that blocks the loop.
+
+    A heartbeat task on the loop wakes up every `interval` seconds and records how late it woke (the loop's lag).
+    A monitor thread watches the heartbeat; while it is overdue by more than `threshold` seconds, the thread samples
+    the loop thread's stack. Once the loop recovers, the stall is charged to the most frequently sampled call site,
+    appended to `log_path` and kept in a table of the worst offenders.
+    """
+
+    def __init__(self, threshold=0.25, interval=0.1, sample_interval=0.05, max_offenders=100, log_path=None):
+        """
+        Args:
+            threshold (float, optional): Seconds the loop has to be blocked before it counts as a stall.
+            interval (float, optional): Seconds between heartbeats.
+            sample_interval (float, optional): Seconds between stack samples while the loop is blocked.
+            max_offenders (int, optional): Call sites kept in the offender table; the least costly are dropped.
+            log_path (str, optional): File every stall is appended to. None disables the log.
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.sample_interval = sample_interval
+        self.max_offenders = max_offenders
+        self.log_path = log_path
+        self.stalls = 0
+        self.max_lag = 0.0
+        self._lags = deque(maxlen=max(1, int(600 / interval)))  # last ten minutes of heartbeats
+        self._offenders = {}  # (site, call) -> {"count", "total", "max", "stack"}
+        self._lock = threading.Lock()
+        self._beat = time.monotonic()
+        self._loop_thread = None
+        self._task = None
+        self._thread = None
+        self._stopping = threading.Event()
+
+    async def _heartbeat(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+            lag = max(0.0, self._beat - started - self.interval)
+            self._lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            stats.observe("event_loop_lag_seconds", "", lag)
+
+    def _monitor(self):
+        samples, stalled_since = [], None
+        while not self._stopping.wait(self.sample_interval):
+            beat = self._beat
+            if samples and beat != stalled_since:
+                # the loop has beaten again since the stall began
+                self._record(beat - stalled_since - self.interval, samples)
+                samples, stalled_since = [], None
+            if time.monotonic() - beat > self.interval + self.threshold:
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is not None:
+                    samples.append(traceback.extract_stack(frame))
+                    stalled_since = beat
+                del frame
+
+    def _record(self, seconds, samples):
+        """Charges a stall of `seconds` to the call site seen in most of its stack samples."""
+        blamed = Counter(_blame(stack) for stack in samples)
+        key = blamed.most_common(1)[0][0]
+        stack = next(s for s in reversed(samples) if _blame(s) == key)
+        lines = traceback.format_list(stack[-STACK_DEPTH:])
+        with self._lock:
+            self.stalls += 1
+            entry = self._offenders.setdefault(key, {"count": 0, "total": 0.0, "max": 0.0, "stack": lines})
+            entry["count"] += 1
+            entry["total"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+            entry["stack"] = lines
+            if len(self._offenders) > self.max_offenders:
+                del self._offenders[min(self._offenders, key=lambda k: self._offenders[k]["total"])]
+        stats.incr("event_loop_stalls_total")
+        stats.observe("event_loop_stall_seconds", "", seconds)
+        if self.log_path:
+            site, call = key
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(f"{datetime.now().isoformat(timespec='seconds')} loop blocked {seconds:.3f}s at {site} -> {call}\n")
+                    f.write("".join(lines))
+            except OSError as e:
+                print(f"Could not write to {self.log_path}: {e}")
+
+    def offenders(self, top=10):
+        """Returns the `top` call sites by total blocked time as (site, call, entry) tuples."""
+        with self._lock:
+            ranked = sorted(self._offenders.items(), key=lambda item: item[1]["total"], reverse=True)[:top]
+            return [(site, call, dict(entry)) for (site, call), entry in ranked]
+
+    def report(self, top=10):
+        """Returns a fixed-width text summary of the loop lag and the worst offenders for Discord."""
+        lags = sorted(self._lags)
+        pick = lambda q: lags[min(len(lags) - 1, int(q * len(lags)))] * 1000 if lags else 0
+        lines = [
+            f"Loop lag (last {len(lags) * self.interval:.0f}s): p50 {pick(0.5):.1f} ms, p99 {pick(0.99):.1f} ms",
+            f"Worst lag since start: {self.max_lag * 1000:.0f} ms",
+            f"Stalls over {self.threshold * 1000:.0f} ms: {self.stalls}",
+        ]
+        offenders = self.offenders(top)
+        if offenders:
+            lines += ["", "total(s)  count  max(s)  site -> blocking call"]
+        for site, call, entry in offenders:
+            lines.append(f"{entry['total']:<9.2f} {entry['count']:<6} {entry['max']:<7.2f} {site} -> {call}")
+        return "```" + "\n".join(lines) + "```"
+
+    def reset(self):
+        """Clears the offender table and the lag statistics."""
+        with self._lock:
+            self._offenders.clear()
+            self.stalls = 0
+        self._lags.clear()
+        self.max_lag = 0.0
+
+    def start(self):
+        """Starts the heartbeat on the running loop and the monitor thread. Must be called from the loop."""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._monitor, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Shared watchdog of the bot's loop; None until `configure` is called, and when the watchdog is turned off
+WATCHDOG = None
+OFFLOAD = False  # run the helpers passed to `offload` on a worker thread
+
+
+def configure(settings):
+    """
+    Replaces the shared watchdog with one built from the bot settings.
+
+    Args:
+        settings (dict): The bot configuration. Reads "loop_watchdog", "loop_lag_threshold", "loop_watchdog_log"
+            and "offload_blocking".
+
+    Returns:
+        LoopWatchdog or None: The new shared watchdog, or None if it is turned off.
+    """
+    global WATCHDOG, OFFLOAD
+    OFFLOAD = bool(settings.get("offload_blocking", False))
+    WATCHDOG = None
+    if settings.get("loop_watchdog", True):
+        WATCHDOG = LoopWatchdog(
+            threshold=settings.get("loop_lag_threshold", 0.25),
+            log_path=settings.get("loop_watchdog_log", "storage/loop_watchdog.log"),
+        )
+    return WATCHDOG
+
+
+async def offload(fn, *args, **kwargs):
+    """
+    Calls a synchronous helper that may block on file I/O. With 'offload_blocking' on it runs in the default thread
+    pool so the loop keeps serving commands; otherwise it is called inline.
+    """
+    if OFFLOAD:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return fn(*args, **kwargs)
@@ -2,14 +2,38 @@ from asyncio import tasks
 import discord
 from discord.ext import commands, tasks
 import asyncio
-import search, json_functs, helper_functs  # external modules
+import search, json_functs, helper_functs, wallet_cache, market_cursor, request_policy, sheets_writer, market_store, pipeline, stats, change_detection, scheduler, discord_dispatcher, history, price_feed, work_queue, loop_watchdog  # external modules
 from datetime import datetime
 import pytz
+import time
 
 
 # ——— Bot setup ———
+class ScanBot(commands.Bot):
+    """
+    Bot that posts queued Discord messages, flushes queued sheet rows and pending settings, releases the HTTP session
+    and persists caches on shutdown.
+    """
+
+    async def close(self):
+        if loop_watchdog.WATCHDOG is not None:
+            await loop_watchdog.WATCHDOG.stop()
+        if price_feed.FEED is not None:
+            await price_feed.FEED.stop()
+        await discord_dispatcher.DISPATCHER.stop()
+        await sheets_writer.WRITER.stop()
+        await search.close_session()
+        wallet_cache.CACHE.save()
+        change_detection.STORE.save()
+        history.HISTORY.close()
+        if WORK_QUEUE is not None:
+            WORK_QUEUE.close()
+        json_functs.flush()
+        await super().close()
+
+
 intents = discord.Intents.all()
-bot = commands.Bot(command_prefix="-", intents=intents)
+bot = ScanBot(command_prefix="-", intents=intents)
 
 # This will hold our channel reference after on_ready fires
 SCANNER_ALL = None
@@ -22,6 +46,13 @@ USER = None
 RUNDOWN_TIME = None
 RUNDOWN_FLAG = False
 SCAN_DOWN_TIME = 0  # Hour (0–23) to pause scanning for Google Apps Script maintenance; None to disable
+INITIALIZED = False  # on_ready fires again on every reconnect; one-time setup is guarded by this flag
+MARKET_CURSOR = None  # paged market sweep, rebuilt whenever 'offset' or 'min_volume' is changed with -set
+CHECKPOINT_EVERY = 10  # persist the sweep offset to config.json every N markets
+SCHEDULER = None  # priority scheduler used instead of the sweep when 'scan_order' is "priority"
+WORK_QUEUE = None  # queue shared with the scanner processes when 'scan_mode' is "sharded"
+RECENT_RESULTS = {}  # conditionId -> (unix time, msg) of the scanner's latest analysis, reused by the rundown, oldest first
+RECENT_RESULTS_MAX = 5000  # most analyses kept in RECENT_RESULTS
 
 
 # ——— Start Up Event ———
@@ -31,6 +62,7 @@ async def on_ready():
     Callback function executed when the bot is ready.
     Initializes global variables for various Discord channels and user settings by reading from a JSON configuration.
     Caches channel objects to avoid None returns from `get_channel()`.
+    Opens the shared HTTP session used for all Polymarket API calls.
     Sends a status message to the scanner channel indicating whether the scanner is enabled.
     Starts the scanner and position rundown loops if they are not already running.
     Globals:
@@ -47,6 +79,7 @@ async def on_ready():
     global DAILY_RUNDOWN
     global USER
     global RUNDOWN_TIME
+    global INITIALIZED
 
     # Try cache the channel so get_channel() won't return None later
     SCANNER_ALL = bot.get_channel(json_functs.read("scanner_unfiltered"))
@@ -58,6 +91,33 @@ async def on_ready():
     USER = json_functs.read("user")
     RUNDOWN_TIME = json_functs.read("rundown_time")
 
+    # open the pooled HTTP session once for the lifetime of the bot
+    settings = json_functs.read()
+    await search.open_session(
+        limit=settings.get("http_limit", 100),
+        limit_per_host=settings.get("http_limit_per_host", 20),
+        total_timeout=settings.get("http_total_timeout", 30),
+        connect_timeout=settings.get("http_connect_timeout", 10),
+    )
+
+    # one-time setup of long-lived state
+    if not INITIALIZED:
+        search.configure_concurrency(settings.get("max_concurrency"), settings.get("max_per_host"))
+        search.configure_http_cache(settings.get("http_revalidate_endpoints"), settings.get("http_cache_size"))
+        request_policy.configure(settings)
+        wallet_cache.configure(settings)
+        change_detection.configure(settings)
+        history.configure(settings)
+        sheets_writer.configure(settings).start()
+        discord_dispatcher.configure(settings).start()
+        feed = price_feed.configure(settings, band=share_price_band)
+        if feed is not None:
+            feed.start()
+        watchdog = loop_watchdog.configure(settings)
+        if watchdog is not None:
+            watchdog.start()
+        INITIALIZED = True
+
     print("Bot is ready!")
     if json_functs.read("scanner_on"):
         await SCANNER_ALL.send("**Starting Scanner...**")
@@ -67,6 +127,13 @@ async def on_ready():
         await SCANNER_ALL.send("**Scanner is not enabled. Use '-scan' to enable.**")
     if not position_rundown.is_running():
         position_rundown.start()
+    if not export_metrics.is_running():
+        export_metrics.start()
+
+
+def share_price_band():
+    """Returns the current (min_share_price, max_share_price) flagging band, read by the price feed."""
+    return json_functs.read("min_share_price"), json_functs.read("max_share_price")
 
 
 # ——— Change Settings Command ———
@@ -101,13 +168,41 @@ async def set(ctx, key=None, value=None):
             f"min_pnl_diff:           {settings.get('min_pnl_diff')}{((13 - len(str(settings.get('min_pnl_diff')))) * ' ')}<greater than 0, integer> \n"
             f"min_bot_count_diff:     {settings.get('min_bot_count_diff')}{((13 - len(str(settings.get('min_bot_count_diff')))) * ' ')}<between 0 and 20, integer> \n"
             f"min_share_price:        {settings.get('min_share_price')}{((13 - len(str(settings.get('min_share_price')))) * ' ')}<between 0.0 and 1.0, float> \n"
-            f"max_share_price:        {settings.get('max_share_price')}{((13 - len(str(settings.get('max_share_price')))) * ' ')}<between 0.0 and 1.0, float>```"
+            f"max_share_price:        {settings.get('max_share_price')}{((13 - len(str(settings.get('max_share_price')))) * ' ')}<between 0.0 and 1.0, float> \n"
+            f"scan_workers:           {settings.get('scan_workers')}{((13 - len(str(settings.get('scan_workers')))) * ' ')}<between 1 and 32, integer> \n"
+            f"weight_volume:          {settings.get('weight_volume')}{((13 - len(str(settings.get('weight_volume')))) * ' ')}<0.0 or greater, float> \n"
+            f"weight_movement:        {settings.get('weight_movement')}{((13 - len(str(settings.get('weight_movement')))) * ' ')}<0.0 or greater, float> \n"
+            f"weight_end_date:        {settings.get('weight_end_date')}{((13 - len(str(settings.get('weight_end_date')))) * ' ')}<0.0 or greater, float> \n"
+            f"weight_staleness:       {settings.get('weight_staleness')}{((13 - len(str(settings.get('weight_staleness')))) * ' ')}<0.0 or greater, float>```"
         )
     else:
         msg = await json_functs.set_setting(key, value)
         await SETTINGS.send(msg)
 
 
+# ——— Stats Command ———
+@bot.command(name="stats")
+async def stats_command(ctx):
+    """Posts a summary of API latency, error counts, pipeline stage timings and cache hit rates."""
+    await SETTINGS.send(stats.summary())
+
+
+# ——— Loop Lag Command ———
+@bot.command(name="lag")
+async def lag_command(ctx, action=None):
+    """
+    Posts the event loop's lag and the call sites that blocked it the longest, as measured by the loop watchdog.
+    Use '-lag reset' to clear the offender table. Full stacks are written to 'loop_watchdog_log'.
+    """
+    if loop_watchdog.WATCHDOG is None:
+        await SETTINGS.send("**The loop watchdog is off. Set 'loop_watchdog' to true in config.json to enable it.**")
+    elif action == "reset":
+        loop_watchdog.WATCHDOG.reset()
+        await SETTINGS.send("**Loop watchdog statistics cleared.**")
+    else:
+        await SETTINGS.send(loop_watchdog.WATCHDOG.report())
+
+
 # ——— Scan Command ———
 @bot.command()
 async def scan(ctx):
@@ -147,67 +242,275 @@ async def stop_scan(ctx):
         return
 
     json_functs.update("scanner_on", False)
+    if MARKET_CURSOR is not None:
+        json_functs.update("offset", MARKET_CURSOR.position)
+        MARKET_CURSOR.checkpoint = MARKET_CURSOR.position
     await SCANNER_ALL.send("**Stopping scan after current market scan…**")
     if scan_loop.is_running():
         scan_loop.stop()
 
 
 # ——— Market Scan Logic ———
+def get_cursor(settings):
+    """
+    Returns the market cursor for the current settings, starting a new sweep if 'offset' or 'min_volume'
+    no longer match what the cursor was created with or last persisted (e.g. after a '-set offset').
+    """
+    global MARKET_CURSOR
+    if (
+        MARKET_CURSOR is None
+        or MARKET_CURSOR.min_volume != settings["min_volume"]
+        or MARKET_CURSOR.checkpoint != settings["offset"]
+    ):
+        MARKET_CURSOR = market_cursor.MarketCursor(
+            settings["min_volume"], settings["offset"], page_size=settings.get("market_page_size", 100)
+        )
+    return MARKET_CURSOR
+
+
+def get_scheduler(settings):
+    """Returns the priority scheduler, creating it on first use and applying the current weights and 'min_volume'."""
+    global SCHEDULER
+    if SCHEDULER is None:
+        SCHEDULER = scheduler.MarketScheduler(
+            settings["min_volume"],
+            refresh_interval=settings.get("scheduler_refresh_interval", 900),
+            min_rescan=settings.get("min_rescan_interval", 600),
+            page_size=settings.get("market_page_size", 100),
+        )
+    SCHEDULER.configure(settings)
+    return SCHEDULER
+
+
+async def discover_market():
+    """
+    Discovery stage: return the next market that has not been flagged yet, or None if there is none right now.
+    While the data API's circuit breaker is open no market is handed out, so an outage does not use up markets.
+    Markets the price feed queued for a rescan come first. With 'scan_order' set to "priority" they are handed to the
+    priority scheduler as urgent and the other markets come from it; with "sweep" markets are walked by offset.
+    """
+    if not search.host_available(search.BASE_DATA):
+        return None
+    settings = json_functs.read()
+    if settings.get("scan_order", "priority") == "priority":
+        order = get_scheduler(settings)
+        if price_feed.FEED is not None:
+            while (market := price_feed.FEED.next_rescan(skip=market_store.FLAGGED)) is not None:
+                order.prioritize(market)
+        return await order.next(skip=market_store.FLAGGED)
+
+    if price_feed.FEED is not None:
+        market = price_feed.FEED.next_rescan(skip=market_store.FLAGGED)
+        if market is not None:
+            return market
+
+    cursor = get_cursor(settings)
+    market = await cursor.next(skip=market_store.FLAGGED)
+
+    # Check if the market is None (means every market has been scanned)
+    if market is None:
+        if cursor.exhausted:
+            cursor.seek(0)
+            json_functs.update("offset", 0)
+        return None
+
+    # Periodically persist the sweep position so a restart resumes close to where it stopped
+    if cursor.position - cursor.checkpoint >= CHECKPOINT_EVERY:
+        json_functs.update("offset", cursor.position)
+        cursor.checkpoint = cursor.position
+    return market
+
+
+async def record_analysis(condition_id, results, flag_market, msg):
+    """Stores a fresh analysis and its per-holder rows in the results history, off the event loop."""
+    holders = results.pop("holders", None)
+    try:
+        await asyncio.to_thread(history.HISTORY.record, condition_id, results, flag_market, msg, holders)
+    except Exception as e:  # history is best-effort; never lose the scan over it
+        print(f"Could not record analysis of {condition_id}: {e}")
+
+
+async def analyze_market(market):
+    """
+    Analysis stage: compute the market statistics and decide whether to flag it.
+    If the market's holders, prices and volume bucket are unchanged since its last analysis, the stored analysis is
+    reused instead of fetching every holder again; it is only re-posted if it now flags or 'repost_unchanged' is set.
+    Every fresh analysis is recorded in the results history.
+    Returns:
+        tuple or None: (condition_id, sheets_data, msg, flag_market) for the output stage, or None to post nothing.
+    """
+    settings = json_functs.read()
+    condition_id = market["conditionId"]
+    question = market["question"]
+    print(f"Question: {question}")
+
+    with stats.timer("holders_fetch"):
+        holders = await search.get_holders(condition_id)
+    fp = change_detection.fingerprint(market, holders)
+    cached = change_detection.STORE.lookup(condition_id, fp)
+
+    # unpack market data
+    if cached is not None:
+        stats.incr("markets_unchanged_total")
+        sheets_data, msg, results = search.with_current_prices(market, cached[0], cached[2])
+        holder_rows = None
+    else:
+        with stats.timer("analysis"):
+            sheets_data, msg, results = await search.organize_market_data(condition_id, market, holders=holders)
+        holder_rows = results.pop("holders")
+        change_detection.STORE.store(condition_id, fp, sheets_data, msg, results)
+        await loop_watchdog.offload(change_detection.STORE.maybe_save)
+
+    flag_market = await search.flag_market(results, settings)
+    post = cached is None or flag_market or settings.get("repost_unchanged")
+    return await finish_analysis(market, sheets_data, msg, results, flag_market, holder_rows=holder_rows, post=post)
+
+
+async def finish_analysis(market, sheets_data, msg, results, flag_market, holder_rows=None, post=True):
+    """
+    Shared end of the analysis stage for local and sharded scans: remembers the analysis for the rundown, records it
+    in the results history, updates the price feed and the flagged markets, and prepares the output stage's tuple.
+    Args:
+        holder_rows (list, optional): Per-holder rows of a fresh analysis; None for a reused one, which is not recorded.
+        post (bool, optional): Whether the analysis should be posted.
+    Returns:
+        tuple or None: (condition_id, sheets_data, msg, flag_market), or None if `post` is False.
+    """
+    condition_id = market["conditionId"]
+    remember_result(condition_id, msg)
+    if holder_rows is not None:
+        await record_analysis(condition_id, {**results, "holders": holder_rows}, flag_market, msg)
+
+    # watch the prices of markets that may still flag, so a price move triggers a rescan
+    if price_feed.FEED is not None:
+        if flag_market:
+            price_feed.FEED.unwatch(condition_id)
+        else:
+            price_feed.FEED.watch(market)
+    if not post:
+        return None
+    if flag_market:
+        market_store.FLAGGED.add(condition_id)
+        sheets_data.insert(0, f"BUY {flag_market}")
+    else:
+        sheets_data.insert(0, "NO FLAG")
+    return condition_id, sheets_data, msg, flag_market
+
+
+async def publish_market(result):
+    """
+    Output stage: queue an analyzed market for Discord and Google Sheets.
+    Discord posts go through the outbound dispatcher, flagged buys ahead of unfiltered output.
+    """
+    condition_id, sheets_data, msg, flag_market = result
+
+    # Send the message to the flagged-buys channel if the market meets the criteria
+    if flag_market:
+        discord_dispatcher.DISPATCHER.enqueue(
+            SCANNER_FLAGGED, f"** Buy {flag_market}**\n" + "----------------\n" + msg, priority=1
+        )
+
+    # send to unfiltered channel and google sheets regardless of flag
+    discord_dispatcher.DISPATCHER.enqueue(SCANNER_ALL, msg)
+
+    if condition_id not in market_store.IN_SHEETS:
+        await helper_functs.insert_row_at_top(sheets_data)
+        market_store.IN_SHEETS.add(condition_id)
+    elif flag_market:
+        await helper_functs.insert_row_at_top(sheets_data)
+
+
+async def report_scan_error(stage, error):
+    if isinstance(error, search.FetchError):  # an API outage, not a scanner bug; already logged by the pipeline
+        return
+    discord_dispatcher.DISPATCHER.enqueue(SCANNER_ALL, f"**Error during scan ({stage}): {error}**")
+
+
+PIPELINE = pipeline.ScanPipeline(discover_market, analyze_market, publish_market, on_error=report_scan_error)
+
+
+# ——— Sharded Scan Logic ———
+def get_work_queue(settings):
+    """Returns the work queue shared with the scanner processes (see scan_worker.py), opening it on first use."""
+    global WORK_QUEUE
+    if WORK_QUEUE is None:
+        WORK_QUEUE = work_queue.open_queue(settings)
+    return WORK_QUEUE
+
+
+async def fill_work_queue(settings):
+    """Tops the shared work queue up to 'work_queue_target' markets, in the usual discovery order."""
+    queue = get_work_queue(settings)
+    pending = await asyncio.to_thread(queue.pending)
+    markets = []
+    while pending + len(markets) < settings.get("work_queue_target", 50):
+        market = await discover_market()
+        if market is None:
+            break
+        markets.append(market)
+    if markets:
+        await asyncio.to_thread(queue.enqueue, markets)
+
+
+async def next_shard_result():
+    """Discovery stage of the sharded mode: return the next result a scanner process finished, or None."""
+    return await asyncio.to_thread(get_work_queue(json_functs.read()).take_result)
+
+
+async def apply_shard_result(payload):
+    """Analysis stage of the sharded mode: flag a market a scanner process analyzed, as `analyze_market` would."""
+    if payload.get("error"):
+        raise RuntimeError(f"{payload['conditionId']} failed on scanner {payload['worker']}: {payload['error']}")
+    settings = json_functs.read()
+    market, results = payload["market"], payload["results"]
+    print(f"Question: {market['question']}")
+    holder_rows = results.pop("holders", [])
+    flag_market = await search.flag_market(results, settings)
+    return await finish_analysis(market, payload["sheets_data"], payload["msg"], results, flag_market, holder_rows)
+
+
+SHARD_PIPELINE = pipeline.ScanPipeline(
+    next_shard_result, apply_shard_result, publish_market, on_error=report_scan_error, workers=1
+)
+
+
 @tasks.loop(seconds=5)
 async def scan_loop():
-    """Continuously scan markets and post results."""
+    """
+    Supervises the scan pipeline: keeps it running with the configured number of workers while scanning is
+    allowed, and pauses it during the daily maintenance window.
+    With 'scan_mode' set to "sharded", markets are analyzed by separate scanner processes instead: the loop keeps
+    their work queue filled and the pipeline only flags and posts their results.
+    """
+    settings = json_functs.read()
     if await helper_functs.is_allowed_time(SCAN_DOWN_TIME):
-        try:
-            # Load the settings from the JSON file
-            settings = json_functs.read()
-
-            # get market data and flagged markets
-            market = await search.get_market(settings["min_volume"], settings["offset"])
-            flagged = json_functs.read("markets", file_path="storage/flagged_markets.json")
-
-            # Check if the market is None or if its conditionId is in flagged markets (means every market has been scanned)
-            if market is None:
-                settings = json_functs.iterate("offset", -settings["offset"])
-                return
-
-            # If the market's conditionId is in flagged markets, skip it
-            if market.get("conditionId") in flagged:
-                settings = json_functs.iterate("offset", 1)
-                return
-
-            condition_id = market["conditionId"]
-            question = market["question"]
-            print(f"Question: {question}")
-
-            # unpack market data
-            sheets_data, msg, results = await search.organize_market_data(condition_id, market)
-
-            # Send the message to the flagged-buys channel if the market meets the criteria
-            flag_market = await search.flag_market(results, settings)
-            if flag_market:
-                json_functs.append_flagged_markets(condition_id)
-                await SCANNER_FLAGGED.send(f"** Buy {flag_market}**\n" + "----------------\n" + msg)
-                sheets_data.insert(0, f"BUY {flag_market}")
-            else:
-                sheets_data.insert(0, "NO FLAG")
-
-            # send to unfiltered channel and google sheets regardless of flag
-            await SCANNER_ALL.send(msg)
-
-            if condition_id not in json_functs.read("markets", file_path="storage/in_sheets.json"):
-                await helper_functs.insert_row_at_top(sheets_data)
-                json_functs.append_flagged_markets(condition_id, file_path="storage/in_sheets.json")
-            elif flag_market:
-                await helper_functs.insert_row_at_top(sheets_data)
-
-            # Update the offset for the next market and check if scanning should continue
-            settings = json_functs.iterate("offset", 1)
-
-        except asyncio.CancelledError:
-            await SCANNER_ALL.send("**Market scan stopped.**")
-        except Exception as e:
-            await SCANNER_ALL.send(f"**Error during scan: {e}**")
-            raise
+        if settings.get("scan_mode") == "sharded":
+            await fill_work_queue(settings)
+            SHARD_PIPELINE.start()
+        else:
+            PIPELINE.resize(settings.get("scan_workers") or PIPELINE.workers)
+            PIPELINE.start()
+    else:
+        for scan in (PIPELINE, SHARD_PIPELINE):
+            if scan.is_running():
+                await scan.stop()
+
+
+@scan_loop.after_loop
+async def stop_pipeline():
+    """Finish the markets already being scanned once the scan loop is stopped."""
+    await PIPELINE.stop()
+    await SHARD_PIPELINE.stop()
+    await SCANNER_ALL.send("**Market scan stopped.**")
+
+
+# ——— Metrics Export ———
+@tasks.loop(seconds=60)
+async def export_metrics():
+    """Writes all metrics in Prometheus text format to the 'metrics_file' path, if one is configured."""
+    file_path = json_functs.read("metrics_file")
+    if file_path:
+        await asyncio.to_thread(stats.write_prometheus, file_path)
 
 
 # ——— Position Rundown Logic ———
@@ -218,7 +521,9 @@ async def position_rundown():
     This asynchronous function checks the current time against a predefined rundown hour (`RUNDOWN_TIME`).
     If the rundown has not yet been sent for the day (`RUNDOWN_FLAG` is False), it retrieves the user's positions,
     formats a summary message including the date, time, and total positions, and sends it to the designated channel (`DAILY_RUNDOWN`).
-    For each position, it fetches and organizes market data to append to the message.
+    All position markets are fetched in one batched request and analyzed concurrently; analyses the scanner made
+    within the last 'rundown_reuse_age' seconds are reused. The rundown is split into as many messages as needed
+    to stay within Discord's 2000-character limit.
     After sending, it sets the rundown flag to prevent duplicate sends within the same hour.
     Resets the flag when the hour changes.
     Globals:
@@ -234,19 +539,64 @@ async def position_rundown():
 
     if now.hour == RUNDOWN_TIME and not RUNDOWN_FLAG:
         data = await search.get_position(user=USER, condition_id=None)
-        condition_ids = [item["conditionId"] for item in data if "conditionId" in item]
-        MESSAGE = "# ------- Daily Rundown ------\n" f"**Date: {now.date()}**\n" f"**Total Positions: {len(condition_ids)}**\n"
-        for condition_id in condition_ids:
-            market = await search.get_market(min_volume=None, offset=None, condition_ids=condition_id)
-            market = market[0] if isinstance(market, list) else market
-            _, msg, _ = await search.organize_market_data(condition_id, market)
-            MESSAGE += "**---------------------------------------------**\n" + msg
-        await DAILY_RUNDOWN.send(MESSAGE)
+        data = data if isinstance(data, list) else []
+        condition_ids = list(dict.fromkeys(item["conditionId"] for item in data if "conditionId" in item))
+        header = "# ------- Daily Rundown ------\n" f"**Date: {now.date()}**\n" f"**Total Positions: {len(condition_ids)}**\n"
+
+        # fetch every position's market in one batched request and analyze them concurrently
+        markets = await search.get_markets_by_condition_ids(condition_ids)
+        msgs = await asyncio.gather(
+            *(rundown_msg(condition_id, markets.get(condition_id)) for condition_id in condition_ids)
+        )
+
+        blocks = [header] + ["**---------------------------------------------**\n" + msg for msg in msgs]
+        for message in helper_functs.split_message(blocks):
+            await DAILY_RUNDOWN.send(message)
         RUNDOWN_FLAG = True
     elif now.hour != RUNDOWN_TIME and RUNDOWN_FLAG:
         RUNDOWN_FLAG = False
 
 
+async def rundown_msg(condition_id, market):
+    """
+    Returns the rundown message for one position, reusing the scanner's analysis of the market if it is fresh enough,
+    from memory or, after a restart, from the results history. Fresh analyses are recorded in the history.
+    """
+    settings = json_functs.read()
+    max_age = settings.get("rundown_reuse_age") or 0
+    recent = RECENT_RESULTS.get(condition_id)
+    if recent is not None and time.time() - recent[0] <= max_age:
+        return recent[1]
+    stored = await asyncio.to_thread(history.HISTORY.latest, condition_id, max_age)
+    if stored is not None and stored["msg"]:
+        return stored["msg"]
+    if market is None:
+        return f"**Market not found: {condition_id}**\n"
+    try:
+        _, msg, results = await search.organize_market_data(condition_id, market)
+    except Exception as e:
+        return f"**Error analyzing {market.get('question', condition_id)}: {e}**\n"
+    remember_result(condition_id, msg)
+    await record_analysis(condition_id, results, await search.flag_market(results, settings), msg)
+    return msg
+
+
+def remember_result(condition_id, msg):
+    """
+    Keeps the latest analysis message of a market for the rundown. Analyses older than 'rundown_reuse_age' can no
+    longer be reused and are evicted, as are the oldest ones beyond `RECENT_RESULTS_MAX`.
+    """
+    now = time.time()
+    RECENT_RESULTS.pop(condition_id, None)  # re-insert at the end, keeping the dict ordered by time
+    RECENT_RESULTS[condition_id] = (now, msg)
+    max_age = json_functs.read("rundown_reuse_age") or 0
+    while RECENT_RESULTS:
+        oldest = next(iter(RECENT_RESULTS))
+        if now - RECENT_RESULTS[oldest][0] <= max_age and len(RECENT_RESULTS) <= RECENT_RESULTS_MAX:
+            break
+        del RECENT_RESULTS[oldest]
+
+
 # ——— Run Bot ———
 if __name__ == "__main__":
     token = json_functs.read("Bot_Token")
@@ -0,0 +1,85 @@
+import asyncio
+from collections import deque
+
+import search
+
+
+class MarketCursor:
+    """
+    Walks the active market universe page by page instead of one market per request.
+
+    Markets are fetched `page_size` at a time into an in-memory buffer, and the next page is requested in the
+    background once fewer than `refill_at` markets remain buffered. `position` is the API offset of the next
+    market to be handed out, so it can be persisted and passed back as `offset` to resume the sweep.
+    """
+
+    def __init__(self, min_volume, offset=0, page_size=100, refill_at=20):
+        """
+        Args:
+            min_volume (int): Minimum market volume passed to the Gamma API.
+            offset (int, optional): API offset to start the sweep from.
+            page_size (int, optional): Number of markets requested per call.
+            refill_at (int, optional): Buffer size below which the next page is prefetched.
+        """
+        self.min_volume = min_volume
+        self.page_size = page_size
+        self.refill_at = refill_at
+        self.position = offset
+        self.checkpoint = offset  # last position persisted by the caller
+        self.exhausted = False
+        self._next_offset = offset
+        self._buffer = deque()
+        self._refill_task = None
+
+    async def _refill(self):
+        """Fetch the next page into the buffer. Marks the cursor exhausted when the last page has been read."""
+        markets = await search.get_markets(self.min_volume, self._next_offset, limit=self.page_size)
+        if markets is None:  # request failed; leave the offset as is so the page is retried
+            return
+        self._buffer.extend(markets)
+        self._next_offset += len(markets)
+        if len(markets) < self.page_size:
+            self.exhausted = True
+
+    def _prefetch(self):
+        """Start a background refill if the buffer is running low and no refill is already in flight."""
+        if self.exhausted or len(self._buffer) >= self.refill_at:
+            return
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+
+    async def next(self, skip=()):
+        """
+        Returns the next market of the sweep, skipping any whose conditionId is in `skip`.
+
+        Args:
+            skip (Container[str], optional): Condition IDs that should not be handed out (e.g. flagged markets).
+
+        Returns:
+            dict or None: The next market, or None if none is available. `exhausted` tells whether every market
+                has been handed out or the page request failed.
+        """
+        while True:
+            if not self._buffer:
+                self._prefetch()
+                if self._refill_task is not None:
+                    await self._refill_task
+                if not self._buffer:  # swept every market, or the page request failed
+                    return None
+
+            market = self._buffer.popleft()
+            self.position += 1
+            self._prefetch()
+            if market.get("conditionId") not in skip:
+                return market
+
+    def seek(self, offset):
+        """Discards the buffered markets and restarts the sweep at `offset`."""
+        if self._refill_task is not None and not self._refill_task.done():
+            self._refill_task.cancel()
+        self._refill_task = None
+        self._buffer.clear()
+        self.exhausted = False
+        self.position = offset
+        self.checkpoint = offset
+        self._next_offset = offset
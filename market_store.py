@@ -0,0 +1,114 @@
+import json
+import os
+
+
+class MarketSet:
+    """
+    Set of market condition IDs with O(1) membership and O(1) appends, persisted as an append-only journal.
+
+    Each line of the journal is "+<condition_id>" or "-<condition_id>". The journal is replayed into an in-memory set
+    when the store is opened and compacted (rewritten with one line per member) once it holds more than twice as
+    many lines as members. If the journal does not exist yet, it is created from the legacy JSON list file
+    (`{"markets": [...]}`), if there is one.
+    """
+
+    def __init__(self, journal_path, legacy_path=None, compact_slack=1000):
+        """
+        Args:
+            journal_path (str): Path to the append-only journal.
+            legacy_path (str, optional): Path to the JSON list file migrated on first open.
+            compact_slack (int, optional): Extra journal lines tolerated before compaction.
+        """
+        self.journal_path = journal_path
+        self.legacy_path = legacy_path
+        self.compact_slack = compact_slack
+        self._members = None
+        self._lines = 0
+        self._journal = None
+
+    def _open(self):
+        """Load the set on first use, migrating the legacy JSON file if there is no journal yet."""
+        if self._members is not None:
+            return
+        self._members = set()
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    self._lines += 1
+                    if line[0] == "+":
+                        self._members.add(line[1:])
+                    elif line[0] == "-":
+                        self._members.discard(line[1:])
+            if self._lines > 2 * len(self._members) + self.compact_slack:
+                self.compact()
+        else:
+            if self.legacy_path and os.path.exists(self.legacy_path):
+                with open(self.legacy_path, "r", encoding="utf-8") as f:
+                    self._members.update(m for m in json.load(f).get("markets", []) if m)
+            self.compact()
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    def _append(self, line):
+        self._journal.write(line + "\n")
+        self._journal.flush()
+        self._lines += 1
+
+    def __contains__(self, condition_id):
+        self._open()
+        return condition_id in self._members
+
+    def __len__(self):
+        self._open()
+        return len(self._members)
+
+    def __iter__(self):
+        self._open()
+        return iter(list(self._members))
+
+    def add(self, condition_id):
+        """Adds a condition ID to the set. Does nothing if it is already a member."""
+        self._open()
+        if condition_id and condition_id not in self._members:
+            self._members.add(condition_id)
+            self._append(f"+{condition_id}")
+
+    def remove(self, condition_id):
+        """Removes a condition ID from the set. Does nothing if it is not a member."""
+        self._open()
+        if condition_id in self._members:
+            self._members.discard(condition_id)
+            self._append(f"-{condition_id}")
+            if self._lines > 2 * len(self._members) + self.compact_slack:
+                self.compact()
+
+    def compact(self):
+        """Rewrites the journal atomically with one "+" line per member."""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        tmp_path = f"{self.journal_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for condition_id in self._members:
+                f.write(f"+{condition_id}\n")
+        os.replace(tmp_path, self.journal_path)
+        self._lines = len(self._members)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    def close(self):
+        """Closes the journal file handle. The set is reopened on next use."""
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = None
+        self._members = None
+        self._lines = 0
+
+
+# Markets that have been flagged as buys; these are skipped by the scanner
+FLAGGED = MarketSet("storage/flagged_markets.journal", legacy_path="storage/flagged_markets.json")
+
+# Markets that already have a row in the Google Sheet
+IN_SHEETS = MarketSet("storage/in_sheets.journal", legacy_path="storage/in_sheets.json")
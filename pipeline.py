@@ -0,0 +1,150 @@
+import asyncio
+
+
+class ScanPipeline:
+    """
+    Producer/consumer pipeline that scans several markets at once.
+
+    Three stages are connected by bounded queues, so a slow stage holds back the stages before it:
+        - discovery: one task calling `discover()` for the next market to scan,
+        - analysis: `workers` tasks calling `analyze(market)`,
+        - output: one task calling `publish(result)` for every non-None analysis result, in completion order.
+    A market is never analyzed by two workers at once.
+    """
+
+    def __init__(self, discover, analyze, publish, on_error=None, workers=4, queue_size=None, idle_delay=5):
+        """
+        Args:
+            discover (Callable[[], Awaitable[dict or None]]): Returns the next market, or None if there is none right now.
+            analyze (Callable[[dict], Awaitable[Any]]): Analyzes a market. A None result is not published.
+            publish (Callable[[Any], Awaitable[None]]): Posts an analysis result.
+            on_error (Callable[[str, Exception], Awaitable[None]], optional): Called with the stage name and the
+                exception when a stage fails for one item. The pipeline keeps running.
+            workers (int, optional): Number of concurrent analysis workers.
+            queue_size (int, optional): Capacity of each queue. Defaults to the number of workers.
+            idle_delay (float, optional): Seconds to wait after `discover` returns None.
+        """
+        self.discover = discover
+        self.analyze = analyze
+        self.publish = publish
+        self.on_error = on_error
+        self.workers = workers
+        self.queue_size = queue_size or workers
+        self.idle_delay = idle_delay
+        self.in_flight = set()
+        self._markets = None
+        self._results = None
+        self._discovery = None
+        self._workers = []
+        self._output = None
+
+    def is_running(self):
+        return self._discovery is not None
+
+    def start(self):
+        """Starts every stage on the running event loop. Does nothing if the pipeline is already running."""
+        if self.is_running():
+            return
+        self._markets = asyncio.Queue(maxsize=self.queue_size)
+        self._results = asyncio.Queue(maxsize=self.queue_size)
+        self._discovery = asyncio.create_task(self._discover_loop())
+        self._workers = []
+        self.resize(self.workers)
+        self._output = asyncio.create_task(self._publish_loop())
+
+    def resize(self, workers):
+        """
+        Changes the number of analysis workers. Extra workers finish the market they are on before exiting.
+
+        Args:
+            workers (int): The new number of workers, at least 1.
+        """
+        self.workers = max(1, int(workers))
+        if not self.is_running():
+            return
+        self._workers = [w for w in self._workers if not w.done()]
+        for index in range(len(self._workers), self.workers):
+            self._workers.append(asyncio.create_task(self._analyze_loop(index)))
+
+    async def stop(self):
+        """
+        Stops discovering new markets, lets the workers finish every market already discovered and waits until
+        all of their results have been published.
+        """
+        if not self.is_running():
+            return
+        self._discovery.cancel()
+        await asyncio.gather(self._discovery, return_exceptions=True)
+        self._discovery = None
+
+        await self._markets.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        await self._results.join()
+        self._output.cancel()
+        await asyncio.gather(self._output, return_exceptions=True)
+        self._output = None
+        self.in_flight.clear()
+
+    async def _report(self, stage, error):
+        print(f"Scan pipeline {stage} error: {error}")
+        if self.on_error is not None:
+            try:
+                await self.on_error(stage, error)
+            except Exception as e:
+                print(f"Scan pipeline error handler failed: {e}")
+
+    async def _discover_loop(self):
+        while True:
+            try:
+                market = await self.discover()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self._report("discovery", e)
+                market = None
+
+            if market is None:
+                await asyncio.sleep(self.idle_delay)
+                continue
+            if market.get("conditionId") in self.in_flight:
+                continue
+            self.in_flight.add(market.get("conditionId"))
+            try:
+                await self._markets.put(market)
+            except asyncio.CancelledError:  # stopped while waiting for room; the market was never queued
+                self.in_flight.discard(market.get("conditionId"))
+                raise
+
+    async def _analyze_loop(self, index):
+        while index < self.workers:
+            try:
+                market = await asyncio.wait_for(self._markets.get(), timeout=1)
+            except asyncio.TimeoutError:
+                continue
+            try:
+                result = await self.analyze(market)
+                if result is not None:
+                    await self._results.put(result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self._report("analysis", e)
+            finally:
+                self.in_flight.discard(market.get("conditionId"))
+                self._markets.task_done()
+
+    async def _publish_loop(self):
+        while True:
+            result = await self._results.get()
+            try:
+                await self.publish(result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self._report("output", e)
+            finally:
+                self._results.task_done()
@@ -0,0 +1,101 @@
+import os
+import struct
+import time
+from array import array
+
+# One file per wallet holding its PnL history as packed (timestamp, pnl) float64 pairs, oldest first
+STORE_DIR = "storage/pnl"
+_POINT = struct.Struct("dd")
+
+# user-pnl intervals that cover at least the given number of seconds, smallest first
+_INTERVALS = [(86400, "1d"), (7 * 86400, "1w"), (30 * 86400, "1m")]
+
+
+def _path(wallet):
+    return os.path.join(STORE_DIR, f"{wallet.lower()}.bin")
+
+
+def _read_point(f, index):
+    """Read the (t, p) pair at `index` of an open series file; negative indexes count from the end."""
+    f.seek(index * _POINT.size, os.SEEK_SET if index >= 0 else os.SEEK_END)
+    return _POINT.unpack(f.read(_POINT.size))
+
+
+def count(wallet):
+    """Return the number of stored points for `wallet`."""
+    try:
+        return os.path.getsize(_path(wallet)) // _POINT.size
+    except FileNotFoundError:
+        return 0
+
+
+def bounds(wallet):
+    """
+    Returns the first and last stored points of a wallet's PnL history, in the shape returned by /user-pnl.
+
+    Args:
+        wallet (str): The proxy wallet.
+
+    Returns:
+        list: `[{"t": ..., "p": ...}, {"t": ..., "p": ...}]`, or [] if fewer than two points are stored.
+    """
+    if count(wallet) < 2:
+        return []
+    with open(_path(wallet), "rb") as f:
+        (t0, p0), (t1, p1) = _read_point(f, 0), _read_point(f, -1)
+    return [{"t": t0, "p": p0}, {"t": t1, "p": p1}]
+
+
+def last_timestamp(wallet):
+    """Return the timestamp of the newest stored point for `wallet`, or None if nothing is stored."""
+    if count(wallet) == 0:
+        return None
+    with open(_path(wallet), "rb") as f:
+        return _read_point(f, -1)[0]
+
+
+def growth(wallet):
+    """
+    Returns the PnL change per day between the first and last stored points, or None if fewer than two are stored.
+    """
+    points = bounds(wallet)
+    if not points or points[1]["t"] == points[0]["t"]:
+        return None
+    return (points[1]["p"] - points[0]["p"]) / ((points[1]["t"] - points[0]["t"]) / 86400)
+
+
+def interval_since(timestamp):
+    """
+    Returns the smallest /user-pnl `interval` that reaches back to `timestamp`, or "max" for a wallet with no history.
+    """
+    if timestamp is None:
+        return "max"
+    age = time.time() - timestamp
+    for seconds, interval in _INTERVALS:
+        if age < seconds:
+            return interval
+    return "max"
+
+
+def append(wallet, points):
+    """
+    Appends the points of a /user-pnl response that are newer than the stored tail.
+
+    Args:
+        wallet (str): The proxy wallet.
+        points (list[dict]): PnL points with "t" and "p" keys, oldest first.
+
+    Returns:
+        int: The number of points appended.
+    """
+    last_t = last_timestamp(wallet)
+    new = array("d")
+    for point in points:
+        if last_t is None or point["t"] > last_t:
+            new.extend((point["t"], point["p"]))
+            last_t = point["t"]
+    if new:
+        os.makedirs(STORE_DIR, exist_ok=True)
+        with open(_path(wallet), "ab") as f:
+            new.tofile(f)
+    return len(new) // 2
@@ -0,0 +1,248 @@
+import abc
+import asyncio
+import json
+import time
+from collections import OrderedDict
+
+import fast_json
+import search
+import stats
+
+
+def parse_prices(market):
+    """Returns a market's outcome prices as floats, or None if it has none."""
+    prices = fast_json.outcome_prices(market)
+    return list(prices) if prices else None
+
+
+class PriceSource(abc.ABC):
+    """Interface of a price source: an async generator of (condition_id, prices) updates for the watched markets."""
+
+    @abc.abstractmethod
+    def stream(self, watched):
+        """
+        Returns an async iterator of (condition_id, prices) updates, usually as an async generator method.
+
+        Args:
+            watched (Callable[[], list[str]]): Returns the condition IDs currently watched. Sources that push prices
+                for their own set of markets may ignore it.
+        """
+
+
+class PollingSource(PriceSource):
+    """Polls the Gamma API for the prices of every watched market, 50 markets per request, every `interval` seconds."""
+
+    def __init__(self, interval=30, batch_size=50):
+        self.interval = interval
+        self.batch_size = batch_size
+
+    async def stream(self, watched):
+        while True:
+            condition_ids = watched()
+            if condition_ids:
+                markets = await search.get_markets_by_condition_ids(condition_ids, batch_size=self.batch_size)
+                for condition_id, market in markets.items():
+                    prices = parse_prices(market)
+                    if prices is not None:
+                        yield condition_id, prices
+            await asyncio.sleep(self.interval)
+
+
+class ReplaySource(PriceSource):
+    """
+    Replays recorded price updates from a JSON-lines file, for testing without the live APIs.
+
+    Each line is {"t": <unix time>, "conditionId": <id>, "prices": [<yes>, <no>]}. Updates are emitted with the
+    recorded gaps between them divided by `speed` (0 emits them all at once).
+    """
+
+    def __init__(self, path, speed=1.0, loop=False):
+        """
+        Args:
+            path (str): Path of the JSON-lines file.
+            speed (float, optional): Replay speed multiplier; 0 for no delays.
+            loop (bool, optional): Start over at the end of the file instead of stopping.
+        """
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+
+    def _read(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    async def stream(self, watched):
+        while True:
+            updates = await asyncio.to_thread(self._read)
+            previous = None
+            for update in updates:
+                if previous is not None and self.speed:
+                    await asyncio.sleep(max(0.0, (update["t"] - previous) / self.speed))
+                previous = update["t"]
+                yield update["conditionId"], [float(p) for p in update["prices"]]
+            if not self.loop:
+                return
+
+
+class PriceFeed:
+    """
+    Tracks the outcome prices of watched markets and queues a market for an immediate rescan when, compared with its
+    prices at its last scan, an outcome price crosses into or out of the share price band or moves by at least
+    `move_threshold`.
+
+    Markets are watched once they have been analyzed; the least recently analyzed markets are dropped beyond
+    `max_watched`. Queued rescans are handed out by `next_rescan`, ahead of the regular scan order.
+    """
+
+    def __init__(self, source, band, move_threshold=0.05, cooldown=300, max_watched=500):
+        """
+        Args:
+            source (PriceSource): Where price updates come from.
+            band (Callable[[], tuple[float, float]]): Returns the current (min_share_price, max_share_price).
+            move_threshold (float, optional): Absolute price change that triggers a rescan.
+            cooldown (float, optional): Minimum seconds between two triggered rescans of the same market.
+            max_watched (int, optional): Maximum number of watched markets.
+        """
+        self.source = source
+        self.band = band
+        self.move_threshold = move_threshold
+        self.cooldown = cooldown
+        self.max_watched = max_watched
+        self._watched = OrderedDict()  # conditionId -> {"market", "prices" at last scan, "triggered"}
+        self._rescans = OrderedDict()  # conditionId -> market, in trigger order
+        self._task = None
+
+    def watched(self):
+        """Returns the condition IDs of the watched markets."""
+        return list(self._watched)
+
+    def watch(self, market):
+        """Starts (or resets) tracking a market from the prices it was just scanned at."""
+        prices = parse_prices(market)
+        if prices is None:
+            return
+        condition_id = market["conditionId"]
+        entry = self._watched.pop(condition_id, None)
+        self._watched[condition_id] = {
+            "market": market,
+            "prices": prices,
+            "triggered": entry["triggered"] if entry else 0,
+        }
+        while len(self._watched) > self.max_watched:
+            self._watched.popitem(last=False)
+
+    def unwatch(self, condition_id):
+        self._watched.pop(condition_id, None)
+        self._rescans.pop(condition_id, None)
+
+    def _trigger_reason(self, reference, prices):
+        low, high = self.band()
+        for old, new in zip(reference, prices):
+            if (low <= old <= high) != (low <= new <= high):
+                return "band"
+        if max(abs(new - old) for old, new in zip(reference, prices)) >= self.move_threshold:
+            return "move"
+        return None
+
+    def observe(self, condition_id, prices):
+        """
+        Applies one price update, queuing the market for a rescan if it triggers one.
+
+        Returns:
+            str or None: Why the market was queued ("band" or "move"), or None.
+        """
+        entry = self._watched.get(condition_id)
+        if entry is None:
+            return None
+        # hand the rescan the latest prices so change detection sees the market as changed
+        market = {**entry["market"], "outcomePrices": json.dumps([str(p) for p in prices])}
+        if condition_id in self._rescans:  # already queued; rescan it at the newest prices
+            self._rescans[condition_id] = entry["market"] = market
+            return None
+        reason = self._trigger_reason(entry["prices"], prices)
+        now = time.time()
+        if reason is None or now - entry["triggered"] < self.cooldown:
+            return None
+
+        entry["market"] = market
+        entry["prices"] = prices
+        entry["triggered"] = now
+        self._rescans[condition_id] = entry["market"]
+        stats.incr("price_triggers_total", reason)
+        return reason
+
+    def next_rescan(self, skip=()):
+        """Returns the next market queued for a rescan whose conditionId is not in `skip`, or None."""
+        while self._rescans:
+            condition_id, market = self._rescans.popitem(last=False)
+            if condition_id not in skip:
+                return market
+        return None
+
+    async def _run(self):
+        while True:
+            try:
+                async for condition_id, prices in self.source.stream(self.watched):
+                    self.observe(condition_id, prices)
+                return  # the source ran out of updates
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Price feed error: {e}")
+                await asyncio.sleep(5)
+
+    def start(self):
+        """Starts consuming the price source on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def make_source(settings):
+    """
+    Builds the price source named by "price_feed_source": "poll" (default), "replay" (reads "price_feed_replay_path"
+    at "price_feed_replay_speed") or "off" / None.
+    """
+    name = settings.get("price_feed_source", "poll")
+    if name == "poll":
+        return PollingSource(interval=settings.get("price_feed_interval", 30))
+    if name == "replay":
+        return ReplaySource(settings["price_feed_replay_path"], speed=settings.get("price_feed_replay_speed", 1.0))
+    return None
+
+
+# Shared feed used by the scanner; None until `configure` builds one from the bot's settings
+FEED = None
+
+
+def configure(settings, band):
+    """
+    Replaces the shared feed with one built from the bot settings.
+
+    Args:
+        settings (dict): The bot configuration. Reads the "price_feed_*" and "price_move_threshold" keys.
+        band (Callable[[], tuple[float, float]]): Returns the current (min_share_price, max_share_price).
+
+    Returns:
+        PriceFeed or None: The new shared feed, or None if the feed is turned off.
+    """
+    global FEED
+    source = make_source(settings)
+    FEED = None
+    if source is not None:
+        FEED = PriceFeed(
+            source,
+            band,
+            move_threshold=settings.get("price_move_threshold", 0.05),
+            cooldown=settings.get("price_feed_cooldown", 300),
+            max_watched=settings.get("price_feed_max_watched", 500),
+        )
+    return FEED
@@ -0,0 +1,166 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+# Statuses worth retrying: timeouts, rate limiting and server-side failures. Anything else (404, 400, ...) is final.
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+# Defaults, overridden by `configure`
+_RATE = 10.0  # requests per second per host
+_BURST = 20  # requests a host can absorb at once
+_FAILURE_THRESHOLD = 5  # consecutive failures before a host's circuit opens
+_RESET_TIMEOUT = 30.0  # seconds an open circuit waits before letting a trial request through
+_BACKOFF_BASE = 1.0
+_BACKOFF_MAX = 60.0
+_SHARE = 1.0  # fraction of the rate limit this process may use, see `set_share`
+
+_BUCKETS = {}
+_BREAKERS = {}
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: allows `burst` requests at once, refilled at `rate` tokens per second."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Waits until a token is available and takes it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and requests fail fast. Once `reset_timeout`
+    seconds have passed a single trial request is let through (half-open); its success closes the circuit and its
+    failure opens it again.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        """Returns True if a request may be sent now."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.trial_in_flight or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.trial_in_flight = False
+
+    def release_trial(self):
+        """Lets another trial request through after one ended without a verdict (rate limited or cancelled)."""
+        self.trial_in_flight = False
+
+
+def configure(settings):
+    """
+    Applies the request policy settings. Existing per-host limiters and breakers are discarded.
+
+    Args:
+        settings (dict): The bot configuration. Reads "rate_limit_per_host", "rate_limit_burst",
+            "breaker_failure_threshold" and "breaker_reset_timeout".
+    """
+    global _RATE, _BURST, _FAILURE_THRESHOLD, _RESET_TIMEOUT
+    _RATE = float(settings.get("rate_limit_per_host", _RATE))
+    _BURST = int(settings.get("rate_limit_burst", _BURST))
+    _FAILURE_THRESHOLD = int(settings.get("breaker_failure_threshold", _FAILURE_THRESHOLD))
+    _RESET_TIMEOUT = float(settings.get("breaker_reset_timeout", _RESET_TIMEOUT))
+    _BUCKETS.clear()
+    _BREAKERS.clear()
+
+
+def set_share(share):
+    """
+    Limits this process to `share` of the configured per-host rate and burst, e.g. 1/N for one of N scanner
+    processes sharing the API limit. Applies to existing limiters too.
+    """
+    global _SHARE
+    _SHARE = min(1.0, max(0.01, float(share)))
+    for limiter in _BUCKETS.values():
+        limiter.rate = _RATE * _SHARE
+        limiter.burst = max(1, _BURST * _SHARE)
+        limiter.tokens = min(limiter.tokens, limiter.burst)
+
+
+def bucket(host):
+    """Return the rate limiter for `host`."""
+    if host not in _BUCKETS:
+        _BUCKETS[host] = TokenBucket(_RATE * _SHARE, max(1, _BURST * _SHARE))
+    return _BUCKETS[host]
+
+
+def breaker(host):
+    """Return the circuit breaker for `host`."""
+    if host not in _BREAKERS:
+        _BREAKERS[host] = CircuitBreaker(_FAILURE_THRESHOLD, _RESET_TIMEOUT)
+    return _BREAKERS[host]
+
+
+def parse_retry_after(value):
+    """
+    Parses a Retry-After header, given either as seconds or as an HTTP date.
+
+    Returns:
+        float or None: Seconds to wait, or None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    Returns the seconds to wait before retry number `attempt` (0-based): exponential backoff with full jitter,
+    or the server's Retry-After if it asked for longer.
+    """
+    delay = random.uniform(0, min(_BACKOFF_MAX, _BACKOFF_BASE * 2**attempt))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, _BACKOFF_MAX))
+    return delay
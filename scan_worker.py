@@ -0,0 +1,173 @@
+"""
+Headless scanner process for the sharded scan mode ('scan_mode': "sharded").
+
+Claims markets from the shared work queue under a time-limited lease, analyzes them and hands the results back to
+the bot, which flags, posts and records them. Start as many as the API rate limit allows, on the machine that holds
+the queue database; the per-host rate limit is split evenly between the running workers.
+
+    python -m scan_worker --worker-id scanner-1 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+
+import json_functs
+import pnl_store
+import request_policy
+import search
+import stats
+import wallet_cache
+import work_queue
+
+HEARTBEAT_WINDOW = 30  # seconds after its last heartbeat a worker stops counting towards the rate limit split
+
+
+async def analyze(market):
+    """
+    Analyzes one market for the coordinator.
+
+    Returns:
+        dict: The result payload: "conditionId", "market", "sheets_data", "msg" and "results" (with holder rows).
+    """
+    condition_id = market["conditionId"]
+    with stats.timer("holders_fetch"):
+        holders = await search.get_holders(condition_id)
+    with stats.timer("analysis"):
+        sheets_data, msg, results = await search.organize_market_data(condition_id, market, holders=holders)
+    return {"conditionId": condition_id, "market": market, "sheets_data": sheets_data, "msg": msg, "results": results}
+
+
+class ScanWorker:
+    """
+    Scans markets claimed from a `work_queue.WorkQueue`, up to `concurrency` at a time.
+
+    Leases are renewed every third of `lease` while a market is being analyzed. If a lease is lost anyway (the
+    worker stalled and another worker claimed the market), the analysis is abandoned.
+    """
+
+    def __init__(self, queue, worker_id, concurrency=4, lease=300, idle_delay=5):
+        """
+        Args:
+            queue (work_queue.WorkQueue): The shared work queue.
+            worker_id (str): Name of this worker, unique among the running workers.
+            concurrency (int, optional): Markets analyzed at once.
+            lease (float, optional): Seconds a claimed market stays leased without renewal.
+            idle_delay (float, optional): Seconds to wait when there is nothing to claim.
+        """
+        self.queue = queue
+        self.worker_id = worker_id
+        self.concurrency = concurrency
+        self.lease = lease
+        self.idle_delay = idle_delay
+        self.scanned = 0
+        self._tasks = {}  # conditionId -> analysis task
+        self._stopping = False
+
+    async def _scan(self, market):
+        condition_id = market["conditionId"]
+        try:
+            payload = await analyze(market)
+            if await asyncio.to_thread(self.queue.complete, self.worker_id, condition_id, payload):
+                self.scanned += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Scan of {condition_id} failed: {e}")
+            await asyncio.to_thread(self.queue.release, self.worker_id, condition_id, e)
+        finally:
+            self._tasks.pop(condition_id, None)
+
+    async def _renew_leases(self):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            held = list(self._tasks)
+            if not held:
+                continue
+            renewed = await asyncio.to_thread(self.queue.renew, self.worker_id, held, self.lease)
+            for condition_id in set(held) - renewed:
+                task = self._tasks.get(condition_id)
+                if task is not None:
+                    print(f"Lost the lease on {condition_id}; abandoning it")
+                    task.cancel()
+
+    async def run(self):
+        """Claims and scans markets until `stop` is called, then finishes the markets in progress."""
+        renewer = asyncio.create_task(self._renew_leases())
+        try:
+            while not self._stopping:
+                workers = await asyncio.to_thread(self.queue.heartbeat, self.worker_id, HEARTBEAT_WINDOW)
+                request_policy.set_share(1 / max(1, workers))
+
+                claimed = []
+                free = self.concurrency - len(self._tasks)
+                if free > 0 and search.host_available(search.BASE_DATA):  # leave the queue alone during an outage
+                    claimed = await asyncio.to_thread(self.queue.claim, self.worker_id, self.lease, free)
+                for market in claimed:
+                    self._tasks[market["conditionId"]] = asyncio.create_task(self._scan(market))
+
+                if self._tasks:
+                    await asyncio.wait(
+                        list(self._tasks.values()), timeout=self.idle_delay, return_when=asyncio.FIRST_COMPLETED
+                    )
+                else:
+                    await asyncio.sleep(self.idle_delay)
+            if self._tasks:
+                await asyncio.wait(list(self._tasks.values()))
+        finally:
+            renewer.cancel()
+            await asyncio.gather(renewer, return_exceptions=True)
+
+    def stop(self):
+        """Stops claiming markets; `run` returns once the markets in progress are done."""
+        self._stopping = True
+
+
+async def _main(args):
+    settings = json_functs.read()
+
+    # per-process caches: the PnL store and the wallet cache file are not safe to share between processes
+    pnl_store.STORE_DIR = os.path.join(pnl_store.STORE_DIR, args.worker_id)
+    wallet_cache.configure(settings, file_path=f"storage/wallet_cache.{args.worker_id}.json")
+    search.configure_concurrency(settings.get("max_concurrency"), settings.get("max_per_host"))
+    request_policy.configure(settings)
+    await search.open_session(
+        limit=settings.get("http_limit", 100),
+        limit_per_host=settings.get("http_limit_per_host", 20),
+        total_timeout=settings.get("http_total_timeout", 30),
+        connect_timeout=settings.get("http_connect_timeout", 10),
+    )
+
+    queue = work_queue.open_queue({**settings, **({"work_queue_db": args.queue} if args.queue else {})})
+    worker = ScanWorker(
+        queue,
+        args.worker_id,
+        concurrency=args.concurrency or settings.get("scan_workers", 4),
+        lease=args.lease or settings.get("work_queue_lease", 300),
+    )
+    print(f"Scanner {args.worker_id} claiming markets from {queue.db_path}")
+    try:
+        await worker.run()
+    finally:
+        await search.close_session()
+        wallet_cache.CACHE.save()
+        queue.close()
+        print(f"Scanner {args.worker_id} stopped after {worker.scanned} markets")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}", help="unique worker name")
+    parser.add_argument("--queue", help="work queue database (default: 'work_queue_db' from config.json)")
+    parser.add_argument("--concurrency", type=int, help="markets analyzed at once (default: 'scan_workers')")
+    parser.add_argument("--lease", type=float, help="lease length in seconds (default: 'work_queue_lease')")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
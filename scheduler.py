@@ -0,0 +1,183 @@
+import asyncio
+import heapq
+import math
+import time
+from datetime import datetime
+
+import fast_json
+import market_cursor
+
+# Default score weights, overridden by the "weight_*" settings
+DEFAULT_WEIGHTS = {
+    "weight_volume": 1.0,  # per power of ten of market volume
+    "weight_movement": 1.0,  # per cent the YES price moved since the market was last scanned
+    "weight_end_date": 1.0,  # up to 10 points as the end date approaches
+    "weight_staleness": 0.5,  # per hour since the market was last scanned
+}
+NEVER_SCANNED_HOURS = 7 * 24  # staleness credited to a market that has not been scanned yet
+
+
+def _yes_price(market):
+    prices = fast_json.outcome_prices(market)
+    return prices[0] if prices else None
+
+
+def _days_left(market, now):
+    try:
+        end = datetime.fromisoformat(str(market.get("endDate")).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+    return max(0.0, (end - now) / 86400)
+
+
+def score(entry, weights, now):
+    """
+    Returns the priority of a market; higher is scanned sooner.
+
+    Args:
+        entry (dict): The scheduler's entry for the market ("market", "last_scan", "scanned_price").
+        weights (dict): Score weights, keyed like `DEFAULT_WEIGHTS`.
+        now (float): Current unix time.
+    """
+    market = entry["market"]
+    try:
+        volume = float(str(market.get("volume") or 0).replace(",", ""))
+    except ValueError:
+        volume = 0.0
+    price, scanned_price = _yes_price(market), entry["scanned_price"]
+    movement = abs(price - scanned_price) * 100 if price is not None and scanned_price is not None else 0.0
+    days_left = _days_left(market, now)
+    urgency = 10 / (1 + days_left) if days_left is not None else 0.0
+    staleness = (now - entry["last_scan"]) / 3600 if entry["last_scan"] else NEVER_SCANNED_HOURS
+
+    return (
+        weights["weight_volume"] * math.log10(max(volume, 1))
+        + weights["weight_movement"] * movement
+        + weights["weight_end_date"] * urgency
+        + weights["weight_staleness"] * staleness
+    )
+
+
+class MarketScheduler:
+    """
+    Hands out markets in priority order instead of sweeping them by offset.
+
+    The market universe (every active market above `min_volume`) is re-read page by page every `refresh_interval`
+    seconds, in the background once the first read is done. Each market is scored by volume, how far its price moved
+    since it was last scanned, how close its end date is and how long ago it was last scanned, so hot markets come
+    around often and cold ones rarely. A market is never handed out again within `min_rescan` seconds; the scores are
+    recomputed as soon as a scanned market becomes due again, so a hot market is back at the front once its
+    `min_rescan` has passed instead of waiting for every other market to be scanned first.
+    """
+
+    def __init__(self, min_volume, refresh_interval=900, min_rescan=600, page_size=100):
+        """
+        Args:
+            min_volume (int): Minimum market volume passed to the Gamma API.
+            refresh_interval (float, optional): Seconds between re-reads of the market universe.
+            min_rescan (float, optional): Minimum seconds between two scans of the same market.
+            page_size (int, optional): Number of markets requested per call when reading the universe.
+        """
+        self.min_volume = min_volume
+        self.refresh_interval = refresh_interval
+        self.min_rescan = min_rescan
+        self.page_size = page_size
+        self.weights = dict(DEFAULT_WEIGHTS)
+        self.entries = {}  # conditionId -> {"market", "last_scan", "scanned_price"}
+        self.urgent = []  # conditionIds to hand out before anything else
+        self._heap = []
+        self._next_due = math.inf  # earliest time a market missing from the heap becomes due again
+        self._refreshed = 0
+        self._refresh_task = None
+
+    async def refresh(self):
+        """Re-reads the market universe, keeping the scan history of markets that are still active."""
+        cursor = market_cursor.MarketCursor(self.min_volume, 0, page_size=self.page_size)
+        seen = {}
+        while True:
+            market = await cursor.next()
+            if market is None:
+                break
+            seen[market["conditionId"]] = market
+        if not cursor.exhausted:  # a page request failed; keep the current universe
+            return
+
+        for condition_id, market in seen.items():
+            entry = self.entries.get(condition_id)
+            if entry is None:
+                self.entries[condition_id] = {"market": market, "last_scan": 0, "scanned_price": None}
+            else:
+                entry["market"] = market
+        for condition_id in set(self.entries) - set(seen):
+            del self.entries[condition_id]
+        self._refreshed = time.time()
+        self._heap = []  # rebuild with the new prices
+
+    def _rebuild(self, now):
+        """Scores every market that is due for a scan into a max-heap."""
+        self._heap = []
+        self._next_due = math.inf
+        for condition_id, entry in self.entries.items():
+            due = entry["last_scan"] + self.min_rescan
+            if now >= due:
+                self._heap.append((-score(entry, self.weights, now), condition_id))
+            else:
+                self._next_due = min(self._next_due, due)
+        heapq.heapify(self._heap)
+
+    def configure(self, settings):
+        """Applies the current bot settings (min_volume and score weights)."""
+        if settings.get("min_volume") != self.min_volume:
+            self.min_volume = settings.get("min_volume")
+            self.entries, self._heap, self._refreshed = {}, [], 0
+        for key, default in DEFAULT_WEIGHTS.items():
+            weight = settings.get(key)
+            self.weights[key] = float(weight) if weight is not None else default
+
+    def prioritize(self, market):
+        """
+        Queues a market to be handed out next, ahead of the priority order and regardless of `min_rescan` (e.g. after
+        a price alert). The market's entry is updated with the given market, so its new prices count towards its score.
+        """
+        condition_id = market["conditionId"]
+        if condition_id not in self.entries:
+            self.entries[condition_id] = {"market": market, "last_scan": 0, "scanned_price": None}
+        else:
+            self.entries[condition_id]["market"] = market
+        if condition_id not in self.urgent:
+            self.urgent.append(condition_id)
+
+    async def next(self, skip=()):
+        """
+        Returns the highest-priority market that is due for a scan, skipping any whose conditionId is in `skip`.
+
+        Returns:
+            dict or None: The market, or None if no market is due right now.
+        """
+        now = time.time()
+        if not self.entries or self._refreshed == 0:
+            await self.refresh()
+        elif now - self._refreshed >= self.refresh_interval and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self.refresh())
+
+        while self.urgent:
+            condition_id = self.urgent.pop(0)
+            if condition_id in self.entries and condition_id not in skip:
+                return self._hand_out(condition_id, now)
+
+        if not self._heap or now >= self._next_due:
+            self._rebuild(now)
+        while self._heap:
+            _, condition_id = heapq.heappop(self._heap)
+            entry = self.entries.get(condition_id)
+            if entry is None or condition_id in skip or now - entry["last_scan"] < self.min_rescan:
+                continue
+            return self._hand_out(condition_id, now)
+        return None
+
+    def _hand_out(self, condition_id, now):
+        entry = self.entries[condition_id]
+        entry["last_scan"] = now
+        entry["scanned_price"] = _yes_price(entry["market"])
+        self._next_due = min(self._next_due, now + self.min_rescan)
+        return entry["market"]
@@ -1,28 +1,245 @@
 import aiohttp
+import analytics
 import asyncio
-import helper_functs
-import json
+import bot_classifier
+import fast_json
+import loop_watchdog
+import pnl_store
+import request_policy
+import stats
+import time
+import wallet_cache
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+try:  # aiohttp decodes brotli responses when a brotli package is installed
+    import brotli  # noqa: F401
+
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+
+        ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
 
 # Base API endpoints
 BASE_GAMMA = "https://gamma-api.polymarket.com"
 BASE_DATA = "https://data-api.polymarket.com"
 BASE_PNL = "https://user-pnl-api.polymarket.com"
 
+class FetchError(Exception):
+    """A request an analysis depends on failed, so the analysis would be incomplete and must not be reported."""
+
+
+# Shared HTTP session, opened once by the bot and reused by every request in this module
+_SESSION = None
+
+# Bounded concurrency: one global limit on in-flight requests plus one limit per API host
+_MAX_CONCURRENCY = 32
+_MAX_PER_HOST = 16
+_GLOBAL_SEM = None
+_HOST_SEMS = {}
+
+# Conditional requests: responses of these endpoint paths are kept with their ETag / Last-Modified validators and
+# revalidated, so an unchanged payload costs a 304 instead of a full transfer
+_REVALIDATE = {"/holders", "/markets"}
+_HTTP_CACHE = OrderedDict()  # (url, query) -> (etag, last_modified, body)
+_HTTP_CACHE_SIZE = 1000
+
+# Per-wallet fetches in progress, (wallet, field) -> task, so concurrent cache misses share one request
+_PENDING = {}
+
+
+async def open_session(limit=100, limit_per_host=20, total_timeout=30, connect_timeout=10, keepalive_timeout=60, dns_cache_ttl=300):
+    """
+    Opens the shared aiohttp session used for every Polymarket API call. Safe to call more than once.
+
+    Args:
+        limit (int, optional): Maximum number of open connections across all hosts.
+        limit_per_host (int, optional): Maximum number of open connections to a single host.
+        total_timeout (float, optional): Total seconds allowed for a single request, including reading the body.
+        connect_timeout (float, optional): Seconds allowed to acquire a connection and connect to the host.
+        keepalive_timeout (float, optional): Seconds an idle connection is kept alive for reuse.
+        dns_cache_ttl (int, optional): Seconds resolved host addresses are cached for.
+
+    Returns:
+        aiohttp.ClientSession: The shared session.
+    """
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        connector = aiohttp.TCPConnector(
+            limit=limit,
+            limit_per_host=limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            ttl_dns_cache=dns_cache_ttl,
+        )
+        timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+        _SESSION = aiohttp.ClientSession(
+            connector=connector, timeout=timeout, headers={"Accept-Encoding": ACCEPT_ENCODING}
+        )
+    return _SESSION
+
+
+async def close_session():
+    """Closes the shared aiohttp session, releasing all pooled connections."""
+    global _SESSION
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
+
+
+def configure_concurrency(max_concurrency=None, max_per_host=None):
+    """
+    Sets the limits on concurrent in-flight API requests. Takes effect for requests started after the call.
+
+    Args:
+        max_concurrency (int, optional): Maximum number of requests in flight across all hosts.
+        max_per_host (int, optional): Maximum number of requests in flight to a single API host.
+    """
+    global _MAX_CONCURRENCY, _MAX_PER_HOST, _GLOBAL_SEM, _HOST_SEMS
+    if max_concurrency:
+        _MAX_CONCURRENCY = int(max_concurrency)
+    if max_per_host:
+        _MAX_PER_HOST = int(max_per_host)
+    _GLOBAL_SEM = None
+    _HOST_SEMS = {}
+
+
+def configure_http_cache(endpoints=None, max_entries=None):
+    """
+    Sets which responses are cached for revalidation. Clears the cache.
+
+    Args:
+        endpoints (Iterable[str], optional): Endpoint paths (e.g. "/holders") whose responses are revalidated.
+        max_entries (int, optional): Maximum number of cached responses; the least recently used are dropped.
+    """
+    global _REVALIDATE, _HTTP_CACHE_SIZE
+    if endpoints is not None:
+        _REVALIDATE = set(endpoints)
+    if max_entries is not None:
+        _HTTP_CACHE_SIZE = int(max_entries)
+    _HTTP_CACHE.clear()
+
+
+def _remember(key, headers, body):
+    """Cache a response body under `key` if the server sent a validator for it."""
+    etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+    if not etag and not last_modified:
+        return
+    _HTTP_CACHE[key] = (etag, last_modified, body)
+    _HTTP_CACHE.move_to_end(key)
+    while len(_HTTP_CACHE) > _HTTP_CACHE_SIZE:
+        _HTTP_CACHE.popitem(last=False)
+
+
+def _semaphores(url):
+    """Return the (global, per-host) semaphores that bound a request to `url`, creating them on first use."""
+    global _GLOBAL_SEM
+    if _GLOBAL_SEM is None:
+        _GLOBAL_SEM = asyncio.Semaphore(_MAX_CONCURRENCY)
+    host = urlsplit(url).netloc
+    if host not in _HOST_SEMS:
+        _HOST_SEMS[host] = asyncio.Semaphore(_MAX_PER_HOST)
+    return _GLOBAL_SEM, _HOST_SEMS[host]
+
+
+def _query(params):
+    """
+    Convert keyword params to query pairs. List values become repeated keys (e.g. condition_ids=a&condition_ids=b)
+    and None values are left out.
+    """
+    return [
+        (k, str(item))
+        for k, v in params.items()
+        if v is not None
+        for item in (v if isinstance(v, (list, tuple)) else [v])
+    ]
+
 
 async def _get(url, retries=5, **params):
-    """Helper to send GET requests asynchronously and return parsed JSON. Retries on failure."""
+    """
+    Helper to send GET requests asynchronously and return parsed JSON.
+    Requests are rate limited per host, and transient failures (timeouts, connection errors, 408/429/5xx) are retried
+    with exponential backoff and jitter, honoring Retry-After. Other error statuses are not retried. While a host's
+    circuit breaker is open, requests to it fail immediately.
+    Responses of the endpoints set with `configure_http_cache` are revalidated with If-None-Match / If-Modified-Since
+    and served from the local cache on a 304.
+    Returns None if the request did not succeed.
+    """
+    # Fall back to a default session if the bot has not opened one (e.g. when used outside of main.py)
+    session = _SESSION if _SESSION is not None and not _SESSION.closed else await open_session()
+    host, endpoint = urlsplit(url)[1:3]
+    global_sem, host_sem = _semaphores(url)
+    breaker = request_policy.breaker(host)
+    query = _query(params)
+    cache_key = (url, tuple(query)) if endpoint in _REVALIDATE else None
+
     for attempt in range(retries):
+        trial = breaker.state == "half-open"
+        if not breaker.allow():
+            stats.incr("api_circuit_open_total", endpoint)
+            print(f"API request skipped, circuit open for {host}: {url}")
+            return None
+
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params={k: str(v) for k, v in params.items()}) as resp:
-                    resp.raise_for_status()
-                    return await resp.json()
-        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-            if attempt < retries - 1:
-                await asyncio.sleep(100)  # Wait before retrying
-            else:
-                print(f"API request failed after {retries} attempts: {e}")
-                return None  # Or handle as appropriate for your app
+            retry_after = None
+            cached = _HTTP_CACHE.get(cache_key) if cache_key else None
+            headers = {}
+            if cached is not None:
+                if cached[0]:
+                    headers["If-None-Match"] = cached[0]
+                if cached[1]:
+                    headers["If-Modified-Since"] = cached[1]
+            await request_policy.bucket(host).acquire()
+            try:
+                # Only hold the concurrency slots while the request is in flight, not while waiting to retry
+                async with global_sem, host_sem:
+                    start = time.perf_counter()
+                    try:
+                        async with session.get(url, params=query, headers=headers) as resp:
+                            resp.raise_for_status()
+                            if resp.status == 304 and cached is not None:
+                                stats.incr("api_not_modified_total", endpoint)
+                                _HTTP_CACHE.move_to_end(cache_key)
+                                body = cached[2]
+                            else:
+                                body = await resp.read()
+                                if cache_key:
+                                    _remember(cache_key, resp.headers, body)
+                    finally:
+                        stats.observe("api_request_seconds", endpoint, time.perf_counter() - start)
+                breaker.record_success()
+                try:
+                    return fast_json.loads(body) if body.strip() else None
+                except ValueError as e:  # not JSON; retrying will not help
+                    stats.incr("api_errors_total", endpoint)
+                    print(f"API response is not valid JSON ({e}): {url}")
+                    return None
+            except aiohttp.ClientResponseError as e:
+                stats.incr("api_errors_total", endpoint)
+                if e.status not in request_policy.RETRYABLE_STATUSES:
+                    breaker.record_success()  # the host answered; the request itself is bad
+                    print(f"API request failed with status {e.status}: {url}")
+                    return None
+                if e.status != 429:  # being rate limited does not mean the host is down
+                    breaker.record_failure()
+                retry_after = request_policy.parse_retry_after(e.headers.get("Retry-After") if e.headers else None)
+                error = e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                stats.incr("api_errors_total", endpoint)
+                breaker.record_failure()
+                error = e
+        finally:
+            if trial:  # a 429, a cancellation or an early return ends the trial without a verdict
+                breaker.release_trial()
+
+        if attempt < retries - 1:
+            await asyncio.sleep(request_policy.backoff_delay(attempt, retry_after))
+        else:
+            print(f"API request failed after {retries} attempts: {error}")
+    return None
 
 
 async def get_market(min_volume, offset, condition_ids=None):
@@ -40,9 +257,43 @@ async def get_market(min_volume, offset, condition_ids=None):
         return markets[0]
 
 
+async def get_markets(min_volume, offset, limit=100):
+    """
+    Fetch a page of up to `limit` active, open markets with at least `min_volume`, skipping `offset` entries.
+    Returns None if the request failed and an empty list once the offset is past the last market.
+    """
+    return await _get(f"{BASE_GAMMA}/markets", limit=limit, offset=offset, active="true", closed="false", volume_num_min=min_volume)
+
+
+async def get_markets_by_condition_ids(condition_ids, batch_size=50, closed=None):
+    """
+    Fetch many markets by condition ID with one Gamma request per `batch_size` IDs.
+    Pass closed=True to look up resolved markets.
+    Returns a dict mapping each found conditionId to its market.
+    """
+    condition_ids = list(condition_ids)
+    closed = None if closed is None else str(bool(closed)).lower()
+    batches = [condition_ids[i : i + batch_size] for i in range(0, len(condition_ids), batch_size)]
+    pages = await asyncio.gather(
+        *(_get(f"{BASE_GAMMA}/markets", condition_ids=batch, limit=len(batch), closed=closed) for batch in batches)
+    )
+    return {market["conditionId"]: market for page in pages if page for market in page if market.get("conditionId")}
+
+
+def host_available(base_url):
+    """Returns False while the circuit breaker of the API host at `base_url` is open and requests to it fail fast."""
+    return request_policy.breaker(urlsplit(base_url).netloc).state != "open"
+
+
 async def get_holders(condition_id):
-    """Return two lists of proxy wallets for the holders of a given market."""
+    """
+    Return two lists of proxy wallets for the holders of a given market.
+    Raises:
+        FetchError: If the holders could not be fetched.
+    """
     groups = await _get(f"{BASE_DATA}/holders", market=condition_id)
+    if groups is None:
+        raise FetchError(f"Could not fetch the holders of {condition_id}")
     return [[h["proxyWallet"] for h in g["holders"]] for g in groups]
 
 
@@ -57,11 +308,110 @@ async def get_position(user, condition_id):
     return 0, 0
 
 
-async def get_market_data(condition_id):
+async def _fill(wallet, field, fetch):
+    value = await fetch()
+    wallet_cache.CACHE.set(wallet, field, value)
+    return value
+
+
+async def _cached(wallet, field, fetch):
+    """
+    Return the cached `field` for `wallet`, calling `fetch()` and caching its result on a miss.
+    Concurrent misses for the same wallet and field, e.g. from markets sharing a holder, wait for a single fetch.
+    """
+    value = wallet_cache.CACHE.get(wallet, field)
+    if value is not None:
+        return value
+    key = (wallet, field)
+    task = _PENDING.get(key)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = _PENDING[key] = asyncio.ensure_future(_fill(wallet, field, fetch))
+        task.add_done_callback(lambda done: _PENDING.pop(key, None) if _PENDING.get(key) is done else None)
+    # a cancelled caller must not cancel the fetch the other callers are waiting for
+    return await asyncio.shield(task)
+
+
+async def _fetch_pnl_bounds(user):
+    """
+    Return the first and last points of a user's PnL history, or [] if there are fewer than two.
+    Only the tail of the history newer than what `pnl_store` already holds is fetched.
+    """
+    interval = pnl_store.interval_since(pnl_store.last_timestamp(user))
+    pnl_history = await _get(f"{BASE_PNL}/user-pnl", user_address=user, interval=interval, fidelity="12h")
+    if pnl_history is None:
+        return None
+    pnl_store.append(user, pnl_history)
+    return pnl_store.bounds(user)
+
+
+async def _fetch_position(user, condition_id):
+    """Return (currentValue, cashPnl) for a user in a market, (0, 0) if none exists, or None on failure."""
+    data = await _get(f"{BASE_DATA}/positions", user=user, market=condition_id)
+    if data is None:
+        return None
+    return (data[0]["currentValue"], data[0]["cashPnl"]) if data else (0, 0)
+
+
+async def _fetch_account(user):
+    """Return a user's total account value, or None if it could not be fetched."""
+    account = await _get(f"{BASE_DATA}/value", user=user)
+    return account[0]["value"] if account else None
+
+
+async def _fetch_trade_at(user, offset):
+    """Return a list holding the user's trade at `offset` (newest first), [] past the last trade, or None on failure."""
+    return await _get(f"{BASE_DATA}/activity", user=user, limit=1, offset=offset, sortDirection="DESC", type="TRADE")
+
+
+async def get_wallet_metrics(user, condition_id):
+    """
+    Fetches the per-wallet endpoints concurrently and computes the metrics for one holder of a market.
+    Account value, PnL history bounds and bot classification are served from `wallet_cache` when fresh;
+    only the market position is always fetched.
+    Args:
+        user (str): The holder's proxy wallet.
+        condition_id (str): The market the holder's position is looked up in.
+    Returns:
+        dict or None: The holder's "growth_rates", "PNLs", "pos_size", "account_size" and "is_bot" values,
+            or None if the holder has insufficient PnL history.
+    Raises:
+        FetchError: If one of the holder's requests failed.
+    """
+    with stats.timer("wallet_fetch"):
+        pnl_bounds, position, account, is_bot = await asyncio.gather(
+            _cached(user, "pnl", lambda: _fetch_pnl_bounds(user)),
+            _fetch_position(user, condition_id),
+            _cached(user, "account", lambda: _fetch_account(user)),
+            _cached(user, "bot", lambda: bot_classifier.classify(user, _fetch_trade_at)),
+        )
+
+    fetched = {"PnL history": pnl_bounds, "position": position, "account value": account, "bot activity": is_bot}
+    failed = [name for name, value in fetched.items() if value is None]
+    if failed:
+        raise FetchError(f"Could not fetch the {', '.join(failed)} of {user}")
+    if not pnl_bounds:  # Not enough data to compute metrics for this user
+        return None
+
+    curr_val, cash_pnl = position
+    start, end = pnl_bounds
+    days = (end["t"] - start["t"]) / 86400
+    pnl_diff = (end["p"] - start["p"]) - cash_pnl
+
+    return {
+        "growth_rates": round(pnl_diff / days),
+        "PNLs": round(end["p"] - cash_pnl),
+        "pos_size": round(curr_val),
+        "account_size": round(account),
+        "is_bot": is_bot,
+    }
+
+
+async def get_market_data(condition_id, holders=None):
     """
     Asynchronously retrieves and computes market data metrics for user groups associated with a given condition.
     Args:
         condition_id (str or int): The identifier for the market condition to query user groups.
+        holders (list[list[str]], optional): Holder wallets per group, if already fetched with `get_holders`.
     Returns:
         dict: A dictionary with the following keys, each mapping to a list of lists (one per group):
             - "growth_rates": List of lists containing the daily growth rates for each user in each group.
@@ -69,98 +419,86 @@ async def get_market_data(condition_id):
             - "pos_size": List of lists containing the current position size for each user in each group.
             - "account_size": List of lists containing the account size for each user in each group.
             - "is_bot": List of lists containing boolean values indicating if each user in each group is likely a bot.
+            - "wallets": List of lists containing the proxy wallet of each user in each group.
+    Raises:
+        FetchError: If a holder's requests failed; a market is never analyzed from a partial set of holders.
     Notes:
         - Users with insufficient PnL history (less than 2 entries) are skipped.
+        - Per-wallet account value, PnL history and bot classification are reused from `wallet_cache` while fresh.
         - The function aggregates metrics per group, as returned by `get_holders(condition_id)`.
-        - Bot activity is determined by checking if a user has 500 trades within a 50-day span.
+        - Every wallet in every group is fetched concurrently, bounded by `configure_concurrency`;
+          groups and users keep the order returned by `get_holders`.
+        - Bot activity is determined by checking if a user has 500 trades within a 50-day span (see `bot_classifier`).
     """
     keys = ["growth_rates", "PNLs", "pos_size", "account_size", "is_bot"]
-    data = {k: [] for k in keys}
+    data = {k: [] for k in keys + ["wallets"]}
 
-    for group in await get_holders(condition_id):
-        group_metrics = {k: [] for k in keys}
-        for user in group:
-            pnl_history = await _get(f"{BASE_PNL}/user-pnl", user_address=user, interval="max", fidelity="12h")
+    groups = holders
+    if groups is None:
+        with stats.timer("holders_fetch"):
+            groups = await get_holders(condition_id)
+    group_results = await asyncio.gather(
+        *(asyncio.gather(*(get_wallet_metrics(user, condition_id) for user in group)) for group in groups)
+    )
 
-            if len(pnl_history) < 2:  # Not enough data to compute metrics for this user
+    for group, wallets in zip(groups, group_results):
+        group_metrics = {k: [] for k in keys + ["wallets"]}
+        for user, metrics in zip(group, wallets):
+            if metrics is None:
                 continue
-
-            curr_val, cash_pnl = await get_position(user, condition_id)
-            start, end = pnl_history[0], pnl_history[-1]
-            days = (end["t"] - start["t"]) / 86400
-            pnl_diff = (end["p"] - start["p"]) - cash_pnl
-
-            # Compute metrics
-            group_metrics["growth_rates"].append(round(pnl_diff / days))
-            group_metrics["PNLs"].append(round(end["p"] - cash_pnl))
-            group_metrics["pos_size"].append(round(curr_val))
-
-            # Get account size
-            account = (await _get(f"{BASE_DATA}/value", user=user))[0]["value"]
-            group_metrics["account_size"].append(round(account))
-
-            # Determine bot activity by trade span
-            trades = await _get(f"{BASE_DATA}/activity", user=user, limit=500, sortDirection="DESC", type="TRADE")
-            span_days = (trades[0]["timestamp"] - trades[-1]["timestamp"]) / 86400
-            group_metrics["is_bot"].append(len(trades) == 500 and span_days < 50)
+            group_metrics["wallets"].append(user)
+            for k in keys:
+                group_metrics[k].append(metrics[k])
 
         # Append each metric list for this group
-        for k in keys:
+        for k in keys + ["wallets"]:
             data[k].append(group_metrics[k])
 
+    await loop_watchdog.offload(wallet_cache.CACHE.maybe_save)
     return data
 
 
-async def organize_market_data(condition_id, market):
+async def organize_market_data(condition_id, market, holders=None):
     """
     Organizes and computes market data statistics for a given condition and market.
     Args:
         condition_id (str): The unique identifier for the market condition.
         market (dict): The market data dictionary containing relevant fields.
+        holders (list[list[str]], optional): Holder wallets per outcome, if already fetched with `get_holders`.
     Returns:
         tuple:
             sheets_data (list): A list of processed market statistics formatted for Google Sheets.
             msg (str): A formatted message string summarizing key market statistics.
-            results (dict): A dictionary containing computed statistics and extracted market information.
+            results (dict): A dictionary containing computed statistics and extracted market information, plus
+                "holders": one [wallet, side, growth, pnl, pos_size, account, is_bot] row per holder (side 0 = yes).
     Raises:
         ValueError: If the market data is invalid or None.
+        FetchError: If a request the analysis depends on failed.
     The function performs the following:
         - Retrieves and processes market data for the specified condition.
-        - Computes scaled averages, proportions, and bot counts for 'yes' and 'no' outcomes.
+        - Computes scaled averages, proportions, and bot counts for 'yes' and 'no' outcomes with `analytics`.
         - Extracts and formats market information such as volume, prices, question, ticker, and resolve date.
         - Prepares a summary message and a list of statistics for external use (e.g., Google Sheets).
     """
     if not market or not isinstance(market, dict):
         raise ValueError("Market data is invalid or None.")
 
-    md = await get_market_data(condition_id)
-    (gr_y, gr_n), (pnl_y, pnl_n), (ps_y, ps_n), (acc_y, acc_n), (bot_y, bot_n) = (
-        md[k] for k in ("growth_rates", "PNLs", "pos_size", "account_size", "is_bot")
-    )
+    md = await get_market_data(condition_id, holders=holders)
 
     # compute results
     results = {
-        "Scaled Growth Avg": {
-            "yes": round(await helper_functs.scaled_avg(gr_y, ps_y)),
-            "no": round(await helper_functs.scaled_avg(gr_n, ps_n)),
-        },
-        "Scaled PNL Avg": {
-            "yes": round(await helper_functs.scaled_avg(pnl_y, ps_y)),
-            "no": round(await helper_functs.scaled_avg(pnl_n, ps_n)),
-        },
-        "Avg Prop of Account": {
-            "yes": round(await helper_functs.avg_prop(ps_y, acc_y), 3),
-            "no": round(await helper_functs.avg_prop(ps_n, acc_n), 3),
-        },
-        "Number of Bots": {
-            "yes": sum(bot_y) if bot_y is not None else "N/A",
-            "no": sum(bot_n) if bot_n is not None else "N/A",
-        },
+        **analytics.market_stats(md),
         "volume": round(float(str(market.get("volume", "0")).replace(",", ""))) if market.get("volume") else "N/A",
-        "prices": json.loads(market.get("outcomePrices", "[]")),
+        "prices": list(fast_json.outcome_prices(market) or ()),
         "question": market.get("question", "N/A"),
         "ticker": market.get("events", [{}])[0].get("ticker", "N/A") if market.get("events") else "N/A",
         "resolves": market.get("endDate", "N/A"),
+        "holders": [
+            [wallet, side, md["growth_rates"][side][i], md["PNLs"][side][i], md["pos_size"][side][i],
+             md["account_size"][side][i], bool(md["is_bot"][side][i])]
+            for side, wallets in enumerate(md["wallets"])
+            for i, wallet in enumerate(wallets)
+        ],
     }
 
     # Prepare data for Google sheets:
@@ -185,8 +523,12 @@ async def organize_market_data(condition_id, market):
         results["Number of Bots"]["no"],
     ]
 
-    # build message
-    msg = (
+    return sheets_data, format_message(results), results
+
+
+def format_message(results):
+    """Return the Discord summary of a market analysis built from its `results`."""
+    return (
         f"**{results['question']}**\n"
         f"<https://polymarket.com/event/{results['ticker']}>\n"
         f"```Volume: ${round(results['volume'])}{((10 - len(str(results['volume']))) * ' ')}   YES:      NO:\n"
@@ -196,7 +538,19 @@ async def organize_market_data(condition_id, market):
         f"• Prop of Account:    {results['Avg Prop of Account']['yes']}{((10 - len(str(results['Avg Prop of Account']['yes']))) * ' ')}{results['Avg Prop of Account']['no']}\n"
         f"• Number of Bots:     {results['Number of Bots']['yes']}{((10 - len(str(results['Number of Bots']['yes']))) * ' ')}{results['Number of Bots']['no']}```"
     )
-    return sheets_data, msg, results
+
+
+def with_current_prices(market, sheets_data, results):
+    """
+    Returns copies of a stored analysis with the market's current share prices. Fingerprints round prices, so a
+    reused analysis may carry prices on the other side of a flagging threshold.
+    Returns:
+        tuple: (sheets_data, msg, results), as returned by `organize_market_data` without the "holders" rows.
+    """
+    results = {**results, "prices": list(fast_json.outcome_prices(market) or ())}
+    sheets_data = list(sheets_data)
+    sheets_data[5], sheets_data[6] = results["prices"][0], results["prices"][1]
+    return sheets_data, format_message(results), results
 
 
 async def flag_market(results, settings):
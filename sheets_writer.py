@@ -0,0 +1,177 @@
+import asyncio
+import random
+import time
+
+import gspread
+import requests
+from oauth2client.service_account import ServiceAccountCredentials
+
+import stats
+
+SCOPES = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+KEY_PATH = "storage/sheets_key.json"
+SPREADSHEET_URL = "https://docs.google.com/spreadsheets/d/13DQJk0G1Dgw8Jcae0vQbqhzrNXjShquQByw0mQMAeDE/edit?gid=0#gid=0"
+TOP_ROW = 3  # first row below the header rows
+
+# Google API statuses worth retrying: quota exceeded and transient server errors
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# Network failures worth retrying; any other error drops the batch
+NETWORK_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout, ConnectionError, TimeoutError)
+
+# Outcomes of a write
+WRITTEN, RETRY, DROPPED = "written", "retry", "dropped"
+
+
+class SheetsWriter:
+    """
+    Batches rows destined for the top of the Google Sheet and writes them off the event loop.
+
+    The service account is authorized and the worksheet opened once, on the first write. Queued rows are flushed in a
+    single `insert_rows` request from a worker thread once `batch_size` rows are waiting or `flush_interval` seconds
+    have passed since the last flush, whichever comes first. Batches that failed with a quota, server or network
+    error are kept for the next flush; batches the API rejected for any other reason are logged and dropped. At most
+    `max_queued` rows are kept, the oldest being dropped first.
+    """
+
+    def __init__(
+        self, key_path=KEY_PATH, url=SPREADSHEET_URL, batch_size=20, flush_interval=30, max_retries=5, max_queued=1000
+    ):
+        """
+        Args:
+            key_path (str, optional): Path to the Google service-account key file.
+            url (str, optional): URL of the spreadsheet; rows go to its first worksheet.
+            batch_size (int, optional): Number of queued rows that triggers an immediate flush.
+            flush_interval (float, optional): Maximum seconds a queued row waits before being flushed.
+            max_retries (int, optional): Attempts per flush before the rows are put back in the queue.
+            max_queued (int, optional): Maximum number of rows waiting to be written.
+        """
+        self.key_path = key_path
+        self.url = url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.max_queued = max_queued
+        self._rows = []
+        self._sheet = None
+        self._wakeup = None
+        self._task = None
+        self._stopping = False
+
+    def enqueue(self, row):
+        """Queues `row` to be inserted at the top of the sheet with the next flush."""
+        self._rows.append(row)
+        self._trim()
+        if len(self._rows) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _trim(self):
+        """Drops the oldest queued rows beyond `max_queued`."""
+        excess = len(self._rows) - self.max_queued
+        if excess > 0:
+            del self._rows[:excess]
+            stats.incr("sheets_rows_dropped_total", "queue_full", excess)
+            print(f"Google Sheets queue full, dropped the {excess} oldest rows")
+
+    def _worksheet(self):
+        """Return the worksheet handle, authorizing and opening the spreadsheet on first use."""
+        if self._sheet is None:
+            creds = ServiceAccountCredentials.from_json_keyfile_name(self.key_path, SCOPES)
+            client = gspread.authorize(creds)
+            self._sheet = client.open_by_url(self.url).sheet1
+        return self._sheet
+
+    def _write(self, rows):
+        """
+        Insert `rows` (oldest first) above the existing rows in one request, newest on top. Runs in a worker thread.
+
+        Returns:
+            str: WRITTEN, RETRY if the rows should be kept for the next flush, or DROPPED if retrying will not help.
+        """
+        for attempt in range(self.max_retries):
+            try:
+                self._worksheet().insert_rows(rows[::-1], row=TOP_ROW, value_input_option="USER_ENTERED")
+                return WRITTEN
+            except gspread.exceptions.APIError as e:
+                status = getattr(e.response, "status_code", None)
+                if status not in RETRYABLE_STATUSES:
+                    print(f"Google Sheets rejected {len(rows)} rows with status {status}, dropping them: {e}")
+                    return DROPPED
+                if attempt == self.max_retries - 1:
+                    print(f"Google Sheets write of {len(rows)} rows failed: {e}")
+                    return RETRY
+                time.sleep(random.uniform(0, min(60, 2 ** (attempt + 1))))
+            except NETWORK_ERRORS as e:  # keep the rows for the next flush
+                print(f"Google Sheets write of {len(rows)} rows failed: {e}")
+                return RETRY
+            except Exception as e:  # credentials, malformed rows, ...; retrying would fail the same way
+                print(f"Google Sheets write of {len(rows)} rows failed, dropping them: {e}")
+                return DROPPED
+        return RETRY
+
+    async def flush(self):
+        """
+        Writes every queued row to the sheet. Rows that failed with a retryable error are kept for the next flush;
+        rejected rows are dropped.
+        """
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+        with stats.timer("sheets_write"):
+            outcome = await asyncio.to_thread(self._write, rows)
+        if outcome == WRITTEN:
+            return
+        stats.incr("stage_errors_total", "sheets_write")
+        if outcome == RETRY:
+            self._rows = rows + self._rows
+            self._trim()
+        else:
+            stats.incr("sheets_rows_dropped_total", "rejected", len(rows))
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        """Starts the background flush task on the running event loop."""
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the background flush task and flushes whatever is still queued."""
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task  # lets an in-progress flush finish
+            self._task = None
+        await self.flush()
+
+
+# Shared writer used by the scanner; replaced by `configure` with the bot's settings
+WRITER = SheetsWriter()
+
+
+def configure(settings):
+    """
+    Replaces the shared writer with one built from the bot settings.
+
+    Args:
+        settings (dict): The bot configuration. Reads "sheets_batch_size", "sheets_flush_interval" and
+            "sheets_max_queued".
+
+    Returns:
+        SheetsWriter: The new shared writer.
+    """
+    global WRITER
+    WRITER = SheetsWriter(
+        batch_size=settings.get("sheets_batch_size", 20),
+        flush_interval=settings.get("sheets_flush_interval", 30),
+        max_queued=settings.get("sheets_max_queued", 1000),
+    )
+    return WRITER
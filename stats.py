@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import wallet_cache
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is +Inf
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_LOCK = threading.Lock()  # the Sheets writer records from a worker thread
+_COUNTERS = {}  # (name, label) -> count
+_HISTOGRAMS = {}  # (name, label) -> {"buckets": [...], "sum": float, "count": int}
+_STARTED = time.time()
+
+
+def incr(name, label="", amount=1):
+    """Adds `amount` to the counter `name` for `label`."""
+    with _LOCK:
+        _COUNTERS[(name, label)] = _COUNTERS.get((name, label), 0) + amount
+
+
+def observe(name, label, seconds):
+    """Records a duration in the latency histogram `name` for `label`."""
+    with _LOCK:
+        hist = _HISTOGRAMS.get((name, label))
+        if hist is None:
+            hist = _HISTOGRAMS[(name, label)] = {"buckets": [0] * (len(BUCKETS) + 1), "sum": 0.0, "count": 0}
+        index = next((i for i, bound in enumerate(BUCKETS) if seconds <= bound), len(BUCKETS))
+        hist["buckets"][index] += 1
+        hist["sum"] += seconds
+        hist["count"] += 1
+
+
+@contextmanager
+def timer(stage):
+    """
+    Times the enclosed block as pipeline stage `stage`, counting it as an error if it raises.
+
+    Usage:
+        with stats.timer("analysis"):
+            ...
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        incr("stage_errors_total", stage)
+        raise
+    finally:
+        observe("stage_seconds", stage, time.perf_counter() - start)
+
+
+def _quantile(hist, q):
+    """Estimate a quantile from histogram buckets as the upper bound of the bucket that contains it."""
+    target = q * hist["count"]
+    seen = 0
+    for i, n in enumerate(hist["buckets"]):
+        seen += n
+        if seen >= target and n:
+            return BUCKETS[i] if i < len(BUCKETS) else float("inf")
+    return 0
+
+
+def render_prometheus():
+    """Returns every metric in the Prometheus text exposition format."""
+    lines = []
+    with _LOCK:
+        counters = sorted(_COUNTERS.items())
+        histograms = sorted((k, {**v, "buckets": list(v["buckets"])}) for k, v in _HISTOGRAMS.items())
+
+    for name in sorted({name for (name, _), _ in counters}):
+        lines.append(f"# TYPE polybotscan_{name} counter")
+        for (n, label), value in counters:
+            if n == name:
+                lines.append(f'polybotscan_{name}{{name="{label}"}} {value}')
+
+    for name in sorted({name for (name, _), _ in histograms}):
+        lines.append(f"# TYPE polybotscan_{name} histogram")
+        for (n, label), hist in histograms:
+            if n != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(list(BUCKETS) + ["+Inf"], hist["buckets"]):
+                cumulative += count
+                lines.append(f'polybotscan_{name}_bucket{{name="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'polybotscan_{name}_sum{{name="{label}"}} {round(hist["sum"], 6)}')
+            lines.append(f'polybotscan_{name}_count{{name="{label}"}} {hist["count"]}')
+
+    cache = wallet_cache.CACHE.stats()
+    lines.append("# TYPE polybotscan_wallet_cache_hit_rate gauge")
+    for field, values in cache["fields"].items():
+        lines.append(f'polybotscan_wallet_cache_hit_rate{{name="{field}"}} {values["hit_rate"]}')
+    lines.append("# TYPE polybotscan_wallet_cache_wallets gauge")
+    lines.append(f"polybotscan_wallet_cache_wallets {cache['wallets']}")
+    lines.append("# TYPE polybotscan_uptime_seconds gauge")
+    lines.append(f"polybotscan_uptime_seconds {round(time.time() - _STARTED)}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(file_path):
+    """Writes `render_prometheus()` to `file_path` (e.g. for a node_exporter textfile collector)."""
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, file_path)
+
+
+def summary():
+    """Returns a short fixed-width text summary of API calls, pipeline stages and cache hit rates for Discord."""
+    with _LOCK:
+        counters = dict(_COUNTERS)
+        histograms = {k: {**v, "buckets": list(v["buckets"])} for k, v in _HISTOGRAMS.items()}
+
+    uptime = round((time.time() - _STARTED) / 60)
+    lines = [f"Uptime: {uptime} min", "", "Endpoint          calls   errors   avg(s)   p95(s)"]
+    for (name, label), hist in sorted(histograms.items()):
+        if name != "api_request_seconds":
+            continue
+        errors = counters.get(("api_errors_total", label), 0)
+        avg = hist["sum"] / hist["count"] if hist["count"] else 0
+        lines.append(f"{label:<17} {hist['count']:<7} {errors:<8} {avg:<8.3f} {_quantile(hist, 0.95)}")
+
+    lines += ["", "Stage             count   errors   avg(s)   p95(s)"]
+    for (name, label), hist in sorted(histograms.items()):
+        if name != "stage_seconds":
+            continue
+        errors = counters.get(("stage_errors_total", label), 0)
+        avg = hist["sum"] / hist["count"] if hist["count"] else 0
+        lines.append(f"{label:<17} {hist['count']:<7} {errors:<8} {avg:<8.3f} {_quantile(hist, 0.95)}")
+
+    cache = wallet_cache.CACHE.stats()
+    lines += ["", f"Wallet cache: {cache['wallets']} wallets"]
+    for field, values in cache["fields"].items():
+        lines.append(f"  {field:<8} hit rate {values['hit_rate']:<6} ({values['hits']} hits, {values['misses']} misses)")
+    return "```" + "\n".join(lines) + "```"
+
+
+def reset():
+    """Clears every metric."""
+    global _STARTED
+    with _LOCK:
+        _COUNTERS.clear()
+        _HISTOGRAMS.clear()
+        _STARTED = time.time()
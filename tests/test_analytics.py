@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import analytics
+
+
+# Reference per-holder implementations the vectorized engine replaced
+def scaled_avg(vals, sizes):
+    if (sum(sizes) * len(vals)) == 0:
+        return 0
+    return sum(v * s for v, s in zip(vals, sizes)) / (sum(sizes) * len(vals))
+
+
+def avg_prop(sizes, accounts):
+    if sum(accounts) == 0:
+        return 0
+    return sum(s / a for s, a in zip(sizes, accounts) if a != 0) / len(sizes)
+
+
+def reference_stats(market_data):
+    growth, pnl, size, account, bots = (
+        market_data[k] for k in ("growth_rates", "PNLs", "pos_size", "account_size", "is_bot")
+    )
+    sides = {"yes": 0, "no": 1}
+    return {
+        "Scaled Growth Avg": {k: round(scaled_avg(growth[i], size[i])) for k, i in sides.items()},
+        "Scaled PNL Avg": {k: round(scaled_avg(pnl[i], size[i])) for k, i in sides.items()},
+        "Avg Prop of Account": {k: round(avg_prop(size[i], account[i]), 3) for k, i in sides.items()},
+        "Number of Bots": {k: sum(bots[i]) for k, i in sides.items()},
+    }
+
+
+def random_market(rng, holders):
+    def group(n):
+        return {
+            "growth_rates": [rng.randint(-500, 5000) for _ in range(n)],
+            "PNLs": [rng.randint(-10**6, 10**6) for _ in range(n)],
+            "pos_size": [rng.randint(0, 10**5) for _ in range(n)],
+            "account_size": [rng.choice([0, rng.randint(1, 10**7)]) for _ in range(n)],
+            "is_bot": [rng.random() < 0.2 for _ in range(n)],
+        }
+
+    yes, no = group(holders[0]), group(holders[1])
+    return {k: [yes[k], no[k]] for k in yes}
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_reference_implementation(seed):
+    rng = random.Random(seed)
+    market_data = random_market(rng, (rng.randint(0, 20), rng.randint(0, 20)))
+    assert analytics.market_stats(market_data) == reference_stats(market_data)
+
+
+def test_batched_stats_match_per_market_stats():
+    rng = random.Random(0)
+    markets = [random_market(rng, (rng.randint(0, 20), rng.randint(0, 20))) for _ in range(10)]
+    table = analytics.concat_tables(analytics.holder_table(m) for m in markets)
+    assert analytics.compute_stats(table, n_markets=len(markets)) == [reference_stats(m) for m in markets]
+
+
+def test_zero_accounts_give_int_zero():
+    market_data = random_market(random.Random(1), (3, 3))
+    market_data["account_size"] = [[0, 0, 0], [0, 0, 0]]
+    result = analytics.market_stats(market_data)["Avg Prop of Account"]
+    assert result == {"yes": 0, "no": 0}
+    assert type(result["yes"]) is int
@@ -0,0 +1,65 @@
+import asyncio
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("aiohttp")
+
+import backtest
+import history
+import search
+
+
+def snapshots(rows):
+    columns = {name: [row.get(name) for row in rows] for name in history.SNAPSHOT_COLUMNS}
+    return backtest._to_arrays(columns)
+
+
+def row(condition_id, t, yes_price, growth_yes, growth_no):
+    return {
+        "condition_id": condition_id, "time": t, "yes_price": yes_price, "no_price": round(1 - yes_price, 2),
+        "growth_yes": growth_yes, "growth_no": growth_no,
+        "pnl_yes": 0, "pnl_no": 0, "bots_yes": 0, "bots_no": 0, "prop_yes": 0, "prop_no": 0,
+    }
+
+
+def test_growth_only_grid_flags_what_flag_market_flags():
+    rng = random.Random(0)
+    rows = [row(f"c{i}", 0, rng.choice([0.03, 0.2, 0.5, 0.7, 0.9]), rng.randint(0, 800), rng.randint(0, 800)) for i in range(200)]
+    resolutions = {r["condition_id"]: "YES" for r in rows}
+    grid = backtest.settings_grid(min_share_price=[0.05], max_share_price=[0.75], min_growth_rate_diff=[0, 100, 400])
+    result = backtest.backtest(snapshots(rows), resolutions, grid)
+
+    for g, growth in enumerate((0, 100, 400)):
+        settings = {"min_share_price": 0.05, "max_share_price": 0.75, "min_growth_rate_diff": growth}
+        flags = [
+            asyncio.run(search.flag_market({
+                "prices": [r["yes_price"], r["no_price"]],
+                "Scaled Growth Avg": {"yes": r["growth_yes"], "no": r["growth_no"]},
+            }, settings))
+            for r in rows
+        ]
+        assert result["trades"][g] == sum(f is not None for f in flags)
+        assert result["wins"][g] == sum(f == "YES" for f in flags)
+
+
+def test_market_is_traded_once_at_its_first_flagging_snapshot():
+    rows = [
+        row("a", 1, 0.5, 0, 0),  # no flag yet
+        row("a", 2, 0.4, 500, 0),  # flags YES at 0.4
+        row("a", 3, 0.6, 500, 0),  # would flag again
+    ]
+    grid = backtest.settings_grid(min_share_price=[0.05], max_share_price=[0.75], min_growth_rate_diff=[100])
+    result = backtest.backtest(snapshots(rows), {"a": "YES"}, grid)
+
+    assert result["trades"][0] == 1 and result["wins"][0] == 1
+    assert result["total_return"][0] == pytest.approx(1 / 0.4 - 1)
+
+
+def test_unresolved_markets_are_ignored():
+    rows = [row("a", 1, 0.4, 500, 0)]
+    grid = backtest.settings_grid(min_share_price=[0.05], max_share_price=[0.75], min_growth_rate_diff=[100])
+    result = backtest.backtest(snapshots(rows), {}, grid)
+
+    assert result["markets"] == 0 and result["trades"][0] == 0
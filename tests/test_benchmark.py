@@ -0,0 +1,50 @@
+import argparse
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+import pnl_store
+import request_policy
+import search
+import wallet_cache
+from bench import benchmark
+
+
+@pytest.fixture(autouse=True)
+def restore_scanner_state(monkeypatch):
+    """`benchmark.run` points the scanner at the mock API; put the module state back afterwards."""
+    for name in ("BASE_GAMMA", "BASE_DATA", "BASE_PNL", "_HOST_SEMS", "_HTTP_CACHE", "_PENDING"):
+        monkeypatch.setattr(search, name, getattr(search, name))
+    for name in ("_RATE", "_BURST", "_FAILURE_THRESHOLD", "_RESET_TIMEOUT", "_BUCKETS", "_BREAKERS"):
+        monkeypatch.setattr(request_policy, name, getattr(request_policy, name))
+    monkeypatch.setattr(wallet_cache, "CACHE", wallet_cache.CACHE)
+    monkeypatch.setattr(pnl_store, "STORE_DIR", pnl_store.STORE_DIR)
+
+
+def bench_args(**overrides):
+    args = dict(
+        fixtures=None, markets=6, workers=3, passes=2, latency=0, jitter=0, error_rate=0.0, rate_429=0.0,
+        rate_limit=1000, seed=0, json=False,
+    )
+    return argparse.Namespace(**{**args, **overrides})
+
+
+def test_cold_and_warm_sweeps_scan_every_market():
+    report = asyncio.run(asyncio.wait_for(benchmark.run(bench_args()), timeout=60))
+
+    cold, warm = report["passes"]
+    assert (cold["pass"], warm["pass"]) == ("cold", "warm")
+    for sweep in (cold, warm):
+        assert sweep["markets"] == 6 and sweep["errors"] == 0
+        assert sweep["calls_by_endpoint"]["/holders"] == 6
+    # the warm sweep reuses cached wallet data
+    assert warm["api_calls"] < cold["api_calls"]
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert benchmark.percentile(values, 50) == 50
+    assert benchmark.percentile(values, 99) == 99
+    assert benchmark.percentile([], 50) == 0
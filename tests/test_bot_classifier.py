@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+import bot_classifier
+
+DAY = 86400
+NOW = 1_700_000_000
+
+
+def trades(count, span_days):
+    """`count` trades, newest first, evenly spaced so that any 500 consecutive trades span `span_days` days."""
+    step = span_days * DAY / 499
+    return [{"timestamp": round(NOW - i * step)} for i in range(count)]
+
+
+def old_rule(history):
+    """The original classification: download the last 500 trades and compare the first and last timestamps."""
+    page = history[:500]
+    return len(page) == 500 and (page[0]["timestamp"] - page[-1]["timestamp"]) / DAY < 50
+
+
+def classify(history):
+    calls = []
+
+    async def fetch_trade(wallet, offset):
+        calls.append(offset)
+        return history[offset : offset + 1]
+
+    return asyncio.run(bot_classifier.classify("w", fetch_trade)), calls
+
+
+@pytest.mark.parametrize("count", [0, 499, 500, 2000])
+@pytest.mark.parametrize("span_days", [10, 49.9, 50, 400])
+def test_matches_the_500_trade_rule(count, span_days):
+    history = trades(count, span_days)
+    verdict, calls = classify(history)
+
+    assert verdict == old_rule(history)
+    assert calls == ([499] if count < 500 else [499, 0])
+
+
+def test_failed_probe_is_not_a_verdict():
+    async def fetch_trade(wallet, offset):
+        return None if offset == 0 else [{"timestamp": NOW}]
+
+    assert asyncio.run(bot_classifier.classify("w", fetch_trade)) is None
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+import bulk_scan
+
+
+class FlakyCursor:
+    """Hands out `markets`, failing the first `failures` reads like a Gamma outage."""
+
+    def __init__(self, markets, failures):
+        self.markets = list(markets)
+        self.failures = failures
+        self.exhausted = False
+
+    async def next(self):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("gamma down")
+        if not self.markets:
+            self.exhausted = True
+            return None
+        return self.markets.pop(0)
+
+
+class MemoryWriter:
+    def __init__(self):
+        self.rows = []
+
+    def done(self):
+        return set()
+
+    def write(self, row, holders):
+        self.rows.append(row)
+
+    def close(self):
+        pass
+
+
+def run_scan(monkeypatch, markets, failures=0, broken=()):
+    cursor = FlakyCursor(markets, failures)
+    monkeypatch.setattr(bulk_scan.market_cursor, "MarketCursor", lambda *args, **kwargs: cursor)
+
+    async def organize_market_data(condition_id, market):
+        if condition_id in broken:
+            raise ValueError("bad market")
+        stats = {name: {"yes": 1, "no": 2} for name in bulk_scan.STATS.values()}
+        return None, None, {**stats, "prices": [0.5, 0.5], "holders": []}
+
+    async def flag_market(results, settings):
+        return None
+
+    monkeypatch.setattr(bulk_scan.search, "organize_market_data", organize_market_data)
+    monkeypatch.setattr(bulk_scan.search, "flag_market", flag_market)
+    writer = MemoryWriter()
+    scan = bulk_scan.bulk_scan(writer, {"min_volume": 0}, workers=2, log=lambda msg: None, retry_delay=0.01)
+    counts = asyncio.run(asyncio.wait_for(scan, timeout=10))
+    return counts, writer
+
+
+def test_discovery_errors_are_retried_not_counted(monkeypatch):
+    markets = [{"conditionId": f"c{i}"} for i in range(5)]
+    counts, writer = run_scan(monkeypatch, markets, failures=3)
+
+    assert counts == {"skipped": 0, "written": 5, "failed": 0}
+    assert sorted(row["condition_id"] for row in writer.rows) == [f"c{i}" for i in range(5)]
+
+
+def test_failed_analyses_are_counted(monkeypatch):
+    markets = [{"conditionId": f"c{i}"} for i in range(5)]
+    counts, writer = run_scan(monkeypatch, markets, broken={"c1", "c3"})
+
+    assert counts == {"skipped": 0, "written": 3, "failed": 2}
+
+
+def test_discovery_waits_while_the_data_api_is_down(monkeypatch):
+    outage = iter([False] * 3)
+    monkeypatch.setattr(bulk_scan.search, "host_available", lambda base: next(outage, True))
+    markets = [{"conditionId": f"c{i}"} for i in range(3)]
+    counts, writer = run_scan(monkeypatch, markets)
+
+    assert counts == {"skipped": 0, "written": 3, "failed": 0}
+
+
+def test_duplicate_listings_are_scanned_once(monkeypatch):
+    markets = [{"conditionId": "a"}, {"conditionId": "a"}, {"conditionId": "b"}, {"conditionId": "a"}]
+    counts, writer = run_scan(monkeypatch, markets)
+
+    assert counts == {"skipped": 2, "written": 2, "failed": 0}
+    assert sorted(row["condition_id"] for row in writer.rows) == ["a", "b"]
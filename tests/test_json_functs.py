@@ -0,0 +1,65 @@
+import json
+import threading
+
+import pytest
+
+import json_functs
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"offset": 0, "markets": ["a"]}))
+    monkeypatch.setattr(json_functs, "WRITE_DELAY", 60)  # only write on flush()
+    yield str(path)
+    json_functs.flush()
+    json_functs._STORE.pop(str(path), None)
+
+
+def test_read_returns_a_copy(config):
+    json_functs.read("markets", file_path=config).append("b")
+    json_functs.read(file_path=config)["offset"] = 5
+
+    assert json_functs.read("markets", file_path=config) == ["a"]
+    assert json_functs.read("offset", file_path=config) == 0
+
+
+def test_flush_writes_pending_changes(config):
+    json_functs.update("offset", 7, file_path=config)
+    json_functs.flush()
+
+    with open(config, encoding="utf-8") as f:
+        assert json.load(f)["offset"] == 7
+
+
+def test_reads_and_updates_do_not_wait_for_disk(config, monkeypatch):
+    syncing, release = threading.Event(), threading.Event()
+    fsync = json_functs.os.fsync
+
+    def slow_fsync(fd):
+        syncing.set()
+        release.wait(5)
+        fsync(fd)
+
+    monkeypatch.setattr(json_functs.os, "fsync", slow_fsync)
+    json_functs.update("offset", 1, file_path=config)
+    writer = threading.Thread(target=json_functs.flush)
+    writer.start()
+    assert syncing.wait(5)
+
+    done = threading.Event()
+
+    def touch():
+        json_functs.read("offset", file_path=config)
+        json_functs.update("offset", 2, file_path=config)
+        done.set()
+
+    threading.Thread(target=touch).start()
+    assert done.wait(1)  # not blocked behind the fsync
+    release.set()
+    writer.join()
+
+    assert json_functs._STORE[config]["dirty"]  # the later change still has to be written
+    json_functs.flush()
+    with open(config, encoding="utf-8") as f:
+        assert json.load(f)["offset"] == 2
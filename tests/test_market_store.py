@@ -0,0 +1,36 @@
+import json
+
+import market_store
+
+
+def test_changes_survive_reopening(tmp_path):
+    path = str(tmp_path / "flagged.journal")
+    markets = market_store.MarketSet(path)
+    markets.add("a")
+    markets.add("b")
+    markets.remove("a")
+    markets.close()
+
+    assert set(market_store.MarketSet(path)) == {"b"}
+
+
+def test_migrates_legacy_json_list(tmp_path):
+    legacy = tmp_path / "flagged.json"
+    legacy.write_text(json.dumps({"markets": ["a", "b", ""]}))
+    markets = market_store.MarketSet(str(tmp_path / "flagged.journal"), legacy_path=str(legacy))
+
+    assert "a" in markets and "b" in markets
+    assert len(markets) == 2
+
+
+def test_journal_is_compacted(tmp_path):
+    path = tmp_path / "flagged.journal"
+    markets = market_store.MarketSet(str(path), compact_slack=2)
+    for i in range(10):
+        markets.add(f"c{i}")
+        markets.remove(f"c{i}")
+    markets.add("kept")
+    markets.close()
+
+    assert len(path.read_text().splitlines()) <= 2 * 1 + 2 + 2
+    assert set(market_store.MarketSet(str(path))) == {"kept"}
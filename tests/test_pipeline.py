@@ -0,0 +1,132 @@
+import asyncio
+
+import pipeline
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=10))
+
+
+def test_publishes_every_analyzed_market():
+    markets = [{"conditionId": f"c{i}"} for i in range(10)]
+    published = []
+
+    async def discover():
+        return markets.pop(0) if markets else None
+
+    async def analyze(market):
+        await asyncio.sleep(0.001)
+        return market["conditionId"]
+
+    async def publish(result):
+        published.append(result)
+
+    async def scenario():
+        scan = pipeline.ScanPipeline(discover, analyze, publish, workers=3, idle_delay=0.01)
+        scan.start()
+        while len(published) < 10:
+            await asyncio.sleep(0.01)
+        await scan.stop()
+        return scan
+
+    scan = run(scenario())
+    assert sorted(published) == sorted(f"c{i}" for i in range(10))
+    assert not scan.is_running()
+    assert scan.in_flight == set()
+
+
+def test_stop_while_discovery_waits_on_full_queue_forgets_the_market():
+    counter = iter(range(1000))
+
+    async def discover():
+        return {"conditionId": f"c{next(counter)}"}
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def analyze(market):
+            await gate.wait()
+            return None
+
+        async def publish(result):
+            pass
+
+        scan = pipeline.ScanPipeline(discover, analyze, publish, workers=1, queue_size=1, idle_delay=0.01)
+        scan.start()
+        await asyncio.sleep(0.1)  # one market is analyzed, one queued, and discovery waits to queue a third
+        assert len(scan.in_flight) == 3
+        stopping = asyncio.create_task(scan.stop())
+        await asyncio.sleep(0.01)
+        gate.set()
+        await stopping
+        return scan
+
+    scan = run(scenario())
+    assert scan.in_flight == set()
+
+
+def test_restarted_pipeline_rescans_market_cancelled_at_stop():
+    seen = []
+
+    async def scenario():
+        gate = asyncio.Event()
+        ids = iter(["c1", "c2", "c3"])
+
+        async def discover():
+            await asyncio.sleep(0)
+            return {"conditionId": next(ids, "c3")}
+
+        async def analyze(market):
+            await gate.wait()
+            seen.append(market["conditionId"])
+            return None
+
+        async def publish(result):
+            pass
+
+        scan = pipeline.ScanPipeline(discover, analyze, publish, workers=1, queue_size=1, idle_delay=0.01)
+        scan.start()
+        await asyncio.sleep(0.1)
+        stopping = asyncio.create_task(scan.stop())
+        await asyncio.sleep(0.01)
+        gate.set()
+        await stopping
+        assert "c3" not in seen  # discovery was waiting to queue it when stopped
+
+        scan.start()
+        while "c3" not in seen:
+            await asyncio.sleep(0.01)
+        await scan.stop()
+
+    run(scenario())
+    assert "c3" in seen
+
+
+def test_analysis_errors_are_reported_and_scanning_continues():
+    markets = [{"conditionId": "bad"}, {"conditionId": "good"}]
+    errors, published = [], []
+
+    async def discover():
+        return markets.pop(0) if markets else None
+
+    async def analyze(market):
+        if market["conditionId"] == "bad":
+            raise ValueError("boom")
+        return market["conditionId"]
+
+    async def publish(result):
+        published.append(result)
+
+    async def on_error(stage, error):
+        errors.append(stage)
+
+    async def scenario():
+        scan = pipeline.ScanPipeline(discover, analyze, publish, on_error=on_error, workers=1, idle_delay=0.01)
+        scan.start()
+        while not published:
+            await asyncio.sleep(0.01)
+        await scan.stop()
+
+    run(scenario())
+    assert errors == ["analysis"]
+    assert published == ["good"]
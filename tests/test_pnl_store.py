@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+import pnl_store
+
+DAY = 86400
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(pnl_store, "STORE_DIR", str(tmp_path))
+
+
+def points(*pairs):
+    return [{"t": t, "p": p} for t, p in pairs]
+
+
+def test_append_skips_points_already_stored():
+    assert pnl_store.append("w", points((0, 0), (DAY, 10), (2 * DAY, 20))) == 3
+    # an overlapping refresh: only points newer than the stored tail are added
+    assert pnl_store.append("w", points((DAY, 10), (2 * DAY, 20), (3 * DAY, 35))) == 1
+    assert pnl_store.append("w", points((2 * DAY, 20), (3 * DAY, 35))) == 0
+
+    assert pnl_store.count("w") == 4
+    assert pnl_store.last_timestamp("w") == 3 * DAY
+
+
+def test_wallets_are_case_insensitive():
+    pnl_store.append("0xAbC", points((0, 0), (DAY, 5)))
+    assert pnl_store.count("0xabc") == 2
+
+
+def test_bounds_need_two_points():
+    assert pnl_store.bounds("w") == []
+    assert pnl_store.last_timestamp("w") is None
+    pnl_store.append("w", points((0, 1)))
+    assert pnl_store.bounds("w") == []
+    assert pnl_store.growth("w") is None
+
+    pnl_store.append("w", points((DAY, 3), (2 * DAY, 7)))
+    assert pnl_store.bounds("w") == points((0, 1), (2 * DAY, 7))
+
+
+@pytest.mark.parametrize(
+    "age, interval",
+    [(None, "max"), (3600, "1d"), (2 * DAY, "1w"), (10 * DAY, "1m"), (40 * DAY, "max")],
+)
+def test_interval_since(monkeypatch, age, interval):
+    monkeypatch.setattr(pnl_store.time, "time", lambda: 100 * DAY)
+    assert pnl_store.interval_since(None if age is None else 100 * DAY - age) == interval
+
+
+def test_incremental_growth_matches_full_history():
+    rng = random.Random(7)
+    history = points(*((i * 3600, rng.uniform(-500, 500)) for i in range(1000)))
+
+    # fetch the history in overlapping chunks, like repeated scans with a short interval
+    start = 0
+    while start < len(history):
+        end = min(len(history), start + rng.randint(1, 80))
+        pnl_store.append("w", history[max(0, start - 10) : end])
+        start = end
+
+    first, last = history[0], history[-1]
+    assert pnl_store.count("w") == len(history)
+    assert pnl_store.bounds("w") == [first, last]
+    expected = (last["p"] - first["p"]) / ((last["t"] - first["t"]) / DAY)
+    assert pnl_store.growth("w") == pytest.approx(expected)
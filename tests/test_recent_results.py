@@ -0,0 +1,37 @@
+import time
+
+import pytest
+
+pytest.importorskip("discord")
+
+import main
+
+
+@pytest.fixture
+def recent(monkeypatch):
+    monkeypatch.setattr(main, "RECENT_RESULTS", {})
+    monkeypatch.setattr(main.json_functs, "read", lambda key=None, **kwargs: 3600)
+    return main.RECENT_RESULTS
+
+
+def test_results_older_than_reuse_age_are_evicted(recent):
+    recent["old"] = (time.time() - 7200, "stale")
+    main.remember_result("new", "fresh")
+    assert list(recent) == ["new"]
+
+
+def test_size_is_bounded(recent, monkeypatch):
+    monkeypatch.setattr(main, "RECENT_RESULTS_MAX", 3)
+    for i in range(5):
+        main.remember_result(f"c{i}", "msg")
+    assert list(recent) == ["c2", "c3", "c4"]
+
+
+def test_reanalyzed_market_moves_to_the_end(recent, monkeypatch):
+    monkeypatch.setattr(main, "RECENT_RESULTS_MAX", 2)
+    main.remember_result("a", "1")
+    main.remember_result("b", "1")
+    main.remember_result("a", "2")
+    main.remember_result("c", "1")
+    assert list(recent) == ["a", "c"]
+    assert recent["a"][1] == "2"
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+import request_policy
+
+
+def open_breaker(threshold=2, reset_timeout=0.0):
+    breaker = request_policy.CircuitBreaker(threshold, reset_timeout)
+    for _ in range(threshold):
+        breaker.record_failure()
+    return breaker
+
+
+def test_breaker_opens_after_threshold_failures():
+    breaker = request_policy.CircuitBreaker(3, 60)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_success_resets_failure_count():
+    breaker = request_policy.CircuitBreaker(2, 60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_one_trial_through():
+    breaker = open_breaker()
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()  # the trial is still in flight
+
+
+def test_trial_success_closes_circuit():
+    breaker = open_breaker()
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_trial_failure_reopens_circuit():
+    breaker = open_breaker(reset_timeout=60)
+    breaker.opened_at -= 60  # pretend the reset timeout has passed
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_released_trial_lets_another_through():
+    breaker = open_breaker()
+    assert breaker.allow()
+    breaker.release_trial()
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+
+
+class _Response:
+    def __init__(self, status):
+        self.status = status
+        self.headers = {}
+
+    def raise_for_status(self):
+        import aiohttp
+        from yarl import URL
+
+        if self.status >= 400:
+            info = aiohttp.RequestInfo(URL("https://api.test"), "GET", {}, URL("https://api.test"))
+            raise aiohttp.ClientResponseError(info, (), status=self.status, headers={})
+
+    async def read(self):
+        return b"{}"
+
+
+class _Request:
+    def __init__(self, session):
+        self.session = session
+
+    async def __aenter__(self):
+        status = self.session.statuses.pop(0)
+        if status is None:  # hang until cancelled
+            await asyncio.Event().wait()
+        return _Response(status)
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _Session:
+    closed = False
+
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+
+    def get(self, url, **kwargs):
+        return _Request(self)
+
+
+@pytest.fixture
+def search(monkeypatch):
+    pytest.importorskip("aiohttp")
+    import search
+
+    request_policy.configure({"breaker_failure_threshold": 1, "breaker_reset_timeout": 0})
+    monkeypatch.setattr(request_policy, "backoff_delay", lambda attempt, retry_after=None: 0)
+    search.configure_concurrency()
+    yield search
+    search._SESSION = None
+    request_policy.configure({})
+
+
+def test_rate_limited_trial_does_not_wedge_breaker(search):
+    url = "https://api.test/markets"
+    search._SESSION = _Session([502, 429, 200])
+
+    assert asyncio.run(search._get(url, retries=1)) is None  # 502 opens the circuit
+    assert asyncio.run(search._get(url, retries=1)) is None  # the half-open trial is rate limited
+    breaker = request_policy.breaker("api.test")
+    assert not breaker.trial_in_flight
+    assert asyncio.run(search._get(url, retries=1)) == {}
+    assert breaker.state == "closed"
+
+
+def test_cancelled_trial_does_not_wedge_breaker(search):
+    url = "https://api.test/markets"
+    search._SESSION = _Session([502, None, 200])
+
+    async def run():
+        assert await search._get(url, retries=1) is None
+        task = asyncio.create_task(search._get(url, retries=1))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return await search._get(url, retries=1)
+
+    assert asyncio.run(run()) == {}
+    assert request_policy.breaker("api.test").state == "closed"
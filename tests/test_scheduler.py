@@ -0,0 +1,66 @@
+import asyncio
+from collections import Counter
+
+import scheduler
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(monkeypatch, volumes, min_rescan=300):
+    clock = Clock()
+    monkeypatch.setattr(scheduler.time, "time", clock)
+    order = scheduler.MarketScheduler(0, refresh_interval=10**9, min_rescan=min_rescan)
+    for condition_id, volume in volumes.items():
+        market = {"conditionId": condition_id, "volume": volume, "outcomePrices": '["0.5", "0.5"]'}
+        order.entries[condition_id] = {"market": market, "last_scan": 0, "scanned_price": None}
+    order._refreshed = clock.now  # skip reading the universe from the API
+    return order, clock
+
+
+def test_hot_market_is_scanned_more_often(monkeypatch):
+    volumes = {f"c{i}": 1_000 for i in range(9)}
+    volumes["hot"] = 1e9
+    order, clock = make_scheduler(monkeypatch, volumes, min_rescan=120)
+
+    counts = Counter()
+    for _ in range(100):
+        market = asyncio.run(order.next())
+        if market is not None:
+            counts[market["conditionId"]] += 1
+        clock.now += 60
+
+    coldest = max(count for condition_id, count in counts.items() if condition_id != "hot")
+    assert counts["hot"] >= 40  # back as soon as it is due, every other call
+    assert counts["hot"] > 3 * coldest
+    assert len(counts) == 10  # cold markets still come around
+
+
+def test_market_is_not_handed_out_within_min_rescan(monkeypatch):
+    order, clock = make_scheduler(monkeypatch, {"a": 1_000}, min_rescan=300)
+
+    assert asyncio.run(order.next())["conditionId"] == "a"
+    clock.now += 299
+    assert asyncio.run(order.next()) is None
+    clock.now += 1
+    assert asyncio.run(order.next())["conditionId"] == "a"
+
+
+def test_prioritized_market_comes_first(monkeypatch):
+    order, clock = make_scheduler(monkeypatch, {"a": 1e9, "b": 1_000})
+
+    assert asyncio.run(order.next())["conditionId"] == "a"
+    order.prioritize({"conditionId": "a", "volume": 1e9, "outcomePrices": '["0.9", "0.1"]'})
+    assert asyncio.run(order.next())["conditionId"] == "a"  # ahead of "b" despite min_rescan
+    assert order.entries["a"]["scanned_price"] == 0.9
+
+
+def test_skipped_markets_are_not_handed_out(monkeypatch):
+    order, clock = make_scheduler(monkeypatch, {"a": 1e9, "b": 1_000})
+
+    assert asyncio.run(order.next(skip={"a"}))["conditionId"] == "b"
@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+import pnl_store
+import search
+import wallet_cache
+
+DAY = 86400
+MARKET = {
+    "conditionId": "m",
+    "question": "Q?",
+    "volume": "1000",
+    "outcomePrices": '["0.4", "0.6"]',
+    "endDate": "2030-01-01",
+}
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """Routes `search._get` to per-endpoint handlers, with fresh wallet caches and PnL store."""
+    monkeypatch.setattr(pnl_store, "STORE_DIR", str(tmp_path / "pnl"))
+    monkeypatch.setattr(wallet_cache, "CACHE", wallet_cache.WalletCache())
+    handlers = {
+        "/holders": lambda **q: [{"holders": [{"proxyWallet": "w1"}, {"proxyWallet": "w2"}]}, {"holders": []}],
+        "/user-pnl": lambda **q: [{"t": 0, "p": 0}, {"t": 10 * DAY, "p": 1000}],
+        "/positions": lambda **q: [{"currentValue": 100, "cashPnl": 0}],
+        "/value": lambda **q: [{"value": 1000}],
+        "/activity": lambda **q: [],
+    }
+
+    async def fake_get(url, retries=5, **params):
+        out = handlers[url[url.rindex("/") :]](**params)
+        return await out if asyncio.iscoroutine(out) else out
+
+    monkeypatch.setattr(search, "_get", fake_get)
+    return handlers
+
+
+def analyze():
+    return asyncio.run(search.organize_market_data("m", MARKET))
+
+
+def test_analysis_of_healthy_holders(api):
+    _, _, results = analyze()
+    assert results["Scaled Growth Avg"] == {"yes": 50, "no": 0}
+    assert [row[0] for row in results["holders"]] == ["w1", "w2"]
+
+
+@pytest.mark.parametrize("endpoint", ["/user-pnl", "/positions", "/value", "/activity"])
+def test_failed_wallet_request_fails_the_analysis(api, endpoint):
+    api[endpoint] = lambda **q: None
+    with pytest.raises(search.FetchError):
+        analyze()
+
+
+def test_short_pnl_history_skips_only_that_holder(api):
+    def pnl(user_address, **q):
+        return [{"t": 0, "p": 0}] if user_address == "w1" else [{"t": 0, "p": 0}, {"t": DAY, "p": 10}]
+
+    api["/user-pnl"] = pnl
+    _, _, results = analyze()
+    assert [row[0] for row in results["holders"]] == ["w2"]
+
+
+def test_concurrent_misses_share_one_fetch(api):
+    calls = []
+    value = api["/value"]
+
+    async def slow_value(**q):
+        calls.append(q["user"])
+        await asyncio.sleep(0.01)
+        return value(**q)
+
+    api["/value"] = slow_value
+
+    async def two_markets():
+        await asyncio.gather(
+            search.organize_market_data("m", MARKET),
+            search.organize_market_data("m2", {**MARKET, "conditionId": "m2"}),
+        )
+
+    asyncio.run(two_markets())
+    assert sorted(calls) == ["w1", "w2"]
+
+
+def test_failed_holders_request_fails_the_analysis(api):
+    api["/holders"] = lambda **q: None
+    with pytest.raises(search.FetchError):
+        analyze()
+
+
+def test_host_unavailable_while_its_circuit_is_open(monkeypatch):
+    monkeypatch.setattr(search.request_policy, "_BREAKERS", {})
+    monkeypatch.setattr(search.request_policy, "_RESET_TIMEOUT", 30.0)
+    breaker = search.request_policy.breaker("data-api.polymarket.com")
+    assert search.host_available(search.BASE_DATA)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert not search.host_available(search.BASE_DATA)
+    breaker.opened_at -= breaker.reset_timeout  # half-open: a trial request may go through
+    assert search.host_available(search.BASE_DATA)
+
+
+def test_reused_analysis_gets_current_prices(api):
+    sheets_data, msg, results = analyze()
+    results.pop("holders")
+    moved = {**MARKET, "outcomePrices": '["0.751", "0.249"]'}
+
+    new_sheets, new_msg, new_results = search.with_current_prices(moved, sheets_data, results)
+    assert new_results["prices"] == [0.751, 0.249]
+    assert new_sheets[5:7] == [0.751, 0.249]
+    assert "$0.751" in new_msg
+    assert new_sheets[:5] == sheets_data[:5] and new_sheets[7:] == sheets_data[7:]
+    assert results["prices"] == [0.4, 0.6]  # the stored analysis is left untouched
+
+    settings = {"min_share_price": 0.05, "max_share_price": 0.75, "min_growth_rate_diff": 10}
+    assert asyncio.run(search.flag_market(results, settings)) == "YES"
+    assert asyncio.run(search.flag_market(new_results, settings)) is None
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+gspread = pytest.importorskip("gspread")
+requests = pytest.importorskip("requests")
+
+import sheets_writer
+
+
+class _Response:
+    def __init__(self, status):
+        self.status_code = status
+        self.text = ""
+
+    def json(self):
+        return {"error": {"code": self.status_code, "message": "error", "status": "ERROR"}}
+
+
+class _Sheet:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.inserted = []
+
+    def insert_rows(self, rows, row, value_input_option):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.inserted.extend(rows)
+
+
+def make_writer(monkeypatch, errors, **kwargs):
+    monkeypatch.setattr(sheets_writer.time, "sleep", lambda seconds: None)
+    writer = sheets_writer.SheetsWriter(max_retries=2, **kwargs)
+    writer._sheet = _Sheet(errors)
+    return writer
+
+
+def api_error(status):
+    return gspread.exceptions.APIError(_Response(status))
+
+
+def test_rejected_batch_is_dropped(monkeypatch):
+    writer = make_writer(monkeypatch, [api_error(400)])
+    writer.enqueue(["bad"])
+    asyncio.run(writer.flush())
+    assert writer._rows == []
+
+    writer.enqueue(["good"])
+    asyncio.run(writer.flush())
+    assert writer._sheet.inserted == [["good"]]
+
+
+def test_unexpected_error_drops_batch(monkeypatch):
+    writer = make_writer(monkeypatch, [ValueError("malformed")])
+    writer.enqueue(["bad"])
+    asyncio.run(writer.flush())
+    assert writer._rows == []
+
+
+@pytest.mark.parametrize("error", [api_error(429), api_error(503), requests.exceptions.ConnectionError("down")])
+def test_transient_failure_keeps_batch(monkeypatch, error):
+    writer = make_writer(monkeypatch, [error, error])
+    writer.enqueue(["row"])
+    asyncio.run(writer.flush())
+    assert writer._rows == [["row"]]
+
+    while writer._rows:
+        asyncio.run(writer.flush())
+    assert writer._sheet.inserted == [["row"]]
+
+
+def test_queue_keeps_newest_rows(monkeypatch):
+    writer = make_writer(monkeypatch, [requests.exceptions.Timeout("slow")], batch_size=100, max_queued=3)
+    for i in range(5):
+        writer.enqueue([i])
+    assert writer._rows == [[2], [3], [4]]
+
+    asyncio.run(writer.flush())  # fails and requeues
+    writer.enqueue([5])
+    assert writer._rows == [[3], [4], [5]]
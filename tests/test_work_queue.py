@@ -0,0 +1,96 @@
+import pytest
+
+import work_queue
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(work_queue.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    queue = work_queue.WorkQueue(str(tmp_path / "queue.db"), max_attempts=2, retry_delay=60)
+    yield queue
+    queue.close()
+
+
+def market(condition_id):
+    return {"conditionId": condition_id, "question": condition_id}
+
+
+def test_claimed_market_is_not_claimed_twice(queue):
+    queue.enqueue([market("a")])
+    assert queue.claim("w1", lease=300) == [market("a")]
+    assert queue.claim("w2", lease=300) == []
+
+
+def test_expired_lease_can_be_claimed_by_another_worker(queue, clock):
+    queue.enqueue([market("a")])
+    queue.claim("w1", lease=300)
+    clock.now += 301
+    assert queue.claim("w2", lease=300) == [market("a")]
+
+    assert not queue.complete("w1", "a", {"conditionId": "a"})  # w1 lost its lease
+    assert queue.complete("w2", "a", {"conditionId": "a", "worker": "w2"})
+    assert queue.take_result() == {"conditionId": "a", "worker": "w2"}
+    assert queue.pending() == 0
+
+
+def test_renewed_lease_does_not_expire(queue, clock):
+    queue.enqueue([market("a")])
+    queue.claim("w1", lease=300)
+    clock.now += 200
+    assert queue.renew("w1", ["a"], lease=300) == {"a"}
+    clock.now += 200
+    assert queue.claim("w2", lease=300) == []
+    assert queue.renew("w2", ["a"], lease=300) == set()
+
+
+def test_market_is_given_up_after_max_attempts(queue, clock):
+    queue.enqueue([market("a")])
+    queue.claim("w1", lease=300)
+    clock.now += 301
+    queue.claim("w2", lease=300)
+    clock.now += 301
+
+    assert queue.claim("w3", lease=300) == []
+    result = queue.take_result()
+    assert result["conditionId"] == "a" and "error" in result
+    assert queue.pending() == 0
+
+
+def test_released_market_waits_retry_delay(queue, clock):
+    queue.enqueue([market("a")])
+    queue.claim("w1", lease=300)
+    queue.release("w1", "a", "timeout")
+    assert queue.claim("w2", lease=300) == []
+    clock.now += 60
+    assert queue.claim("w2", lease=300) == [market("a")]
+
+    queue.release("w2", "a", "timeout")  # second attempt fails too
+    assert queue.take_result()["error"] == "timeout"
+
+
+def test_higher_priority_is_claimed_first(queue):
+    queue.enqueue([market("low")])
+    queue.enqueue([market("high")], priority=5)
+    assert queue.claim("w1", lease=300) == [market("high")]
+
+
+def test_active_workers_follow_heartbeats(queue, clock):
+    assert queue.heartbeat("w1", window=60) == 1
+    clock.now += 30
+    assert queue.heartbeat("w2", window=60) == 2
+    clock.now += 45
+    assert queue.active_workers(window=60) == ["w2"]
@@ -0,0 +1,156 @@
+import json
+import os
+import time
+from collections import OrderedDict
+
+# Default time-to-live (seconds) per cached wallet field, since each changes at a different rate
+DEFAULT_TTLS = {
+    "account": 60 * 60,  # /value account size
+    "pnl": 6 * 60 * 60,  # first and last /user-pnl points (history is sampled every 12h)
+    "bot": 7 * 24 * 60 * 60,  # bot classification from /activity
+}
+
+
+class WalletCache:
+    """
+    Bounded, LRU-evicted cache of per-wallet metrics keyed by proxy wallet.
+
+    Each wallet holds one entry per field ("account", "pnl", "bot"), stamped with the time it was stored.
+    An entry older than its field's TTL counts as a miss. When more than `max_size` wallets are cached,
+    the least recently used wallet is evicted.
+    """
+
+    def __init__(self, max_size=5000, ttls=None, file_path=None, save_interval=300):
+        """
+        Args:
+            max_size (int, optional): Maximum number of wallets kept in memory.
+            ttls (dict, optional): Overrides for `DEFAULT_TTLS`, in seconds.
+            file_path (str, optional): JSON file the cache is persisted to. None disables persistence.
+            save_interval (float, optional): Minimum seconds between automatic saves from `maybe_save`.
+        """
+        self.max_size = max_size
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.file_path = file_path
+        self.save_interval = save_interval
+        self.hits = {field: 0 for field in self.ttls}
+        self.misses = {field: 0 for field in self.ttls}
+        self._entries = OrderedDict()
+        self._dirty = False
+        self._last_save = time.time()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, wallet, field):
+        """
+        Returns the cached value of `field` for `wallet`, or None on a miss or expired entry.
+
+        Args:
+            wallet (str): The proxy wallet.
+            field (str): One of the keys of `ttls`.
+
+        Returns:
+            Any: The cached value, or None.
+        """
+        entry = self._entries.get(wallet, {}).get(field)
+        if entry is None or time.time() - entry[0] > self.ttls[field]:
+            self.misses[field] += 1
+            return None
+        self._entries.move_to_end(wallet)
+        self.hits[field] += 1
+        return entry[1]
+
+    def set(self, wallet, field, value):
+        """
+        Stores `value` as the current `field` for `wallet`, evicting the least recently used wallet if full.
+
+        Args:
+            wallet (str): The proxy wallet.
+            field (str): One of the keys of `ttls`.
+            value (Any): A JSON-serializable value. None is not cached.
+        """
+        if value is None:
+            return
+        # replace rather than mutate the wallet's entry, so a save running on a worker thread sees a consistent copy
+        self._entries[wallet] = {**self._entries.get(wallet, {}), field: (time.time(), value)}
+        self._entries.move_to_end(wallet)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        self._dirty = True
+
+    def stats(self):
+        """Returns the number of cached wallets and the hits, misses and hit rate of each field."""
+        fields = {}
+        for field in self.ttls:
+            total = self.hits[field] + self.misses[field]
+            fields[field] = {
+                "hits": self.hits[field],
+                "misses": self.misses[field],
+                "hit_rate": round(self.hits[field] / total, 3) if total else 0,
+            }
+        return {"wallets": len(self._entries), "fields": fields}
+
+    def load(self):
+        """Loads persisted entries from `file_path`, dropping any that have already expired."""
+        if not self.file_path or not os.path.exists(self.file_path):
+            return
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Could not load wallet cache from {self.file_path}: {e}")
+            return
+
+        now = time.time()
+        for wallet, fields in data.items():
+            fresh = {k: tuple(v) for k, v in fields.items() if k in self.ttls and now - v[0] <= self.ttls[k]}
+            if fresh:
+                self._entries[wallet] = fresh
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def save(self):
+        """Writes all entries to `file_path`, replacing the previous file atomically."""
+        if not self.file_path:
+            return
+        # may run on a worker thread (see loop_watchdog.offload): write a copy and clear the flag before writing
+        entries = dict(self._entries)
+        self._dirty = False
+        self._last_save = time.time()
+        tmp_path = f"{self.file_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.file_path)
+
+    def maybe_save(self):
+        """Saves the cache if it has changed and `save_interval` seconds have passed since the last save."""
+        if self._dirty and time.time() - self._last_save >= self.save_interval:
+            self.save()
+
+
+# Shared cache used by search.py; replaced by `configure` with the bot's settings
+CACHE = WalletCache()
+
+
+def configure(settings, file_path="storage/wallet_cache.json"):
+    """
+    Replaces the shared cache with one built from the bot settings and loads any persisted entries.
+
+    Args:
+        settings (dict): The bot configuration. Reads "wallet_cache_size", "wallet_cache_account_ttl",
+            "wallet_cache_pnl_ttl", "wallet_cache_bot_ttl" and "wallet_cache_persist".
+        file_path (str, optional): JSON file the cache is persisted to, if persistence is enabled.
+
+    Returns:
+        WalletCache: The new shared cache.
+    """
+    global CACHE
+    ttls = {
+        "account": settings.get("wallet_cache_account_ttl", DEFAULT_TTLS["account"]),
+        "pnl": settings.get("wallet_cache_pnl_ttl", DEFAULT_TTLS["pnl"]),
+        "bot": settings.get("wallet_cache_bot_ttl", DEFAULT_TTLS["bot"]),
+    }
+    file_path = file_path if settings.get("wallet_cache_persist", True) else None
+    CACHE = WalletCache(max_size=settings.get("wallet_cache_size", 5000), ttls=ttls, file_path=file_path)
+    CACHE.load()
+    return CACHE
@@ -0,0 +1,262 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS markets (
+    condition_id TEXT PRIMARY KEY,
+    market TEXT NOT NULL,
+    priority REAL NOT NULL DEFAULT 0,
+    enqueued REAL NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS markets_claim ON markets (available_at, priority, enqueued);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    condition_id TEXT NOT NULL,
+    worker TEXT NOT NULL,
+    time REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    worker TEXT PRIMARY KEY,
+    heartbeat REAL NOT NULL
+);
+"""
+
+
+class WorkQueue:
+    """
+    SQLite-backed queue of markets shared by the coordinating bot and any number of scanner processes.
+
+    The coordinator enqueues markets and takes finished results; workers claim markets under a time-limited lease,
+    renew the lease while they work, and complete the market with its result (or release it on failure). A market
+    whose lease expires, e.g. because its worker crashed, can be claimed again by another worker. Every state change
+    is a single transaction, so the database file can be shared by processes on the same machine.
+    """
+
+    def __init__(self, db_path, max_attempts=3, retry_delay=60):
+        """
+        Args:
+            db_path (str): Path to the SQLite database file, created if it does not exist.
+            max_attempts (int, optional): Claims of a market after which a failing market is given up on.
+            retry_delay (float, optional): Seconds a released market waits before it can be claimed again.
+        """
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._lock = threading.Lock()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def _transaction(self, fn):
+        """Run `fn(conn)` in an immediate (write-locked) transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                out = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return out
+
+    @staticmethod
+    def _give_up(conn, condition_id, worker, error, now):
+        """Remove a market from the queue and hand the coordinator an error result for it instead."""
+        conn.execute("DELETE FROM markets WHERE condition_id = ?", (condition_id,))
+        payload = {"conditionId": condition_id, "worker": worker, "error": str(error)}
+        conn.execute(
+            "INSERT INTO results (condition_id, worker, time, payload) VALUES (?, ?, ?, ?)",
+            (condition_id, worker or "", now, json.dumps(payload)),
+        )
+
+    # ——— Coordinator side ———
+    def enqueue(self, markets, priority=0):
+        """
+        Adds markets to the queue. Markets already queued or leased are left as they are.
+
+        Returns:
+            int: The number of markets added.
+        """
+        now = time.time()
+        rows = [(m["conditionId"], json.dumps(m), priority, now, now) for m in markets]
+        return self._transaction(
+            lambda conn: conn.executemany(
+                "INSERT OR IGNORE INTO markets (condition_id, market, priority, enqueued, available_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            ).rowcount
+        )
+
+    def pending(self):
+        """Returns the number of markets queued or being worked on."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM markets").fetchone()[0]
+
+    def take_result(self):
+        """
+        Removes and returns the oldest finished result.
+
+        Returns:
+            dict or None: The payload a worker completed a market with, or None if there is none.
+        """
+
+        def take(conn):
+            row = conn.execute("SELECT id, payload FROM results ORDER BY id LIMIT 1").fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM results WHERE id = ?", (row[0],))
+            return json.loads(row[1])
+
+        return self._transaction(take)
+
+    def active_workers(self, window):
+        """Returns the ids of workers that sent a heartbeat within the last `window` seconds."""
+        with self._lock:
+            rows = self._conn.execute("SELECT worker FROM workers WHERE heartbeat >= ?", (time.time() - window,))
+            return [r[0] for r in rows.fetchall()]
+
+    # ——— Worker side ———
+    def heartbeat(self, worker, window):
+        """
+        Records that `worker` is alive.
+
+        Returns:
+            int: The number of workers (including this one) alive within the last `window` seconds.
+        """
+        now = time.time()
+
+        def beat(conn):
+            conn.execute("INSERT OR REPLACE INTO workers (worker, heartbeat) VALUES (?, ?)", (worker, now))
+            return conn.execute("SELECT COUNT(*) FROM workers WHERE heartbeat >= ?", (now - window,)).fetchone()[0]
+
+        return self._transaction(beat)
+
+    def claim(self, worker, lease, limit=1):
+        """
+        Leases up to `limit` available markets to `worker` for `lease` seconds, highest priority and oldest first.
+        Markets whose previous lease expired are claimable again, unless they have already been claimed
+        `max_attempts` times; those are given up on and reported to the coordinator as error results.
+
+        Returns:
+            list[dict]: The claimed markets.
+        """
+        now = time.time()
+
+        def claim(conn):
+            abandoned = conn.execute(
+                "SELECT condition_id, lease_owner FROM markets WHERE lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            ).fetchall()
+            for condition_id, owner in abandoned:
+                self._give_up(conn, condition_id, owner, "lease expired on every attempt", now)
+            rows = conn.execute(
+                "SELECT condition_id, market FROM markets "
+                "WHERE available_at <= ? AND (lease_owner IS NULL OR lease_expires < ?) "
+                "ORDER BY priority DESC, enqueued LIMIT ?",
+                (now, now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE markets SET lease_owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE condition_id = ?",
+                [(worker, now + lease, r[0]) for r in rows],
+            )
+            return [json.loads(r[1]) for r in rows]
+
+        return self._transaction(claim)
+
+    def renew(self, worker, condition_ids, lease):
+        """
+        Extends the leases `worker` holds on `condition_ids` by `lease` seconds from now.
+
+        Returns:
+            set[str]: The condition IDs whose lease was renewed; the others were lost to another worker.
+        """
+        expires = time.time() + lease
+
+        def renew(conn):
+            renewed = set()
+            for condition_id in condition_ids:
+                cur = conn.execute(
+                    "UPDATE markets SET lease_expires = ? WHERE condition_id = ? AND lease_owner = ?",
+                    (expires, condition_id, worker),
+                )
+                if cur.rowcount:
+                    renewed.add(condition_id)
+            return renewed
+
+        return self._transaction(renew)
+
+    def complete(self, worker, condition_id, payload):
+        """
+        Removes a market `worker` has leased from the queue and stores its result, in one transaction.
+
+        Returns:
+            bool: False if the lease had been lost (the result is discarded).
+        """
+
+        def complete(conn):
+            cur = conn.execute(
+                "DELETE FROM markets WHERE condition_id = ? AND lease_owner = ?", (condition_id, worker)
+            )
+            if not cur.rowcount:
+                return False
+            conn.execute(
+                "INSERT INTO results (condition_id, worker, time, payload) VALUES (?, ?, ?, ?)",
+                (condition_id, worker, time.time(), json.dumps(payload)),
+            )
+            return True
+
+        return self._transaction(complete)
+
+    def release(self, worker, condition_id, error):
+        """
+        Gives back a market `worker` failed to scan. It becomes claimable again after `retry_delay` seconds, or, once
+        it has been claimed `max_attempts` times, is removed and reported to the coordinator as an error result.
+        """
+        now = time.time()
+
+        def release(conn):
+            row = conn.execute(
+                "SELECT attempts FROM markets WHERE condition_id = ? AND lease_owner = ?", (condition_id, worker)
+            ).fetchone()
+            if row is None:
+                return
+            if row[0] >= self.max_attempts:
+                self._give_up(conn, condition_id, worker, error, now)
+            else:
+                conn.execute(
+                    "UPDATE markets SET lease_owner = NULL, lease_expires = NULL, available_at = ? "
+                    "WHERE condition_id = ?",
+                    (now + self.retry_delay, condition_id),
+                )
+
+        self._transaction(release)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_queue(settings):
+    """
+    Opens the work queue named by the bot settings.
+
+    Args:
+        settings (dict): The bot configuration. Reads "work_queue_db", "work_queue_max_attempts" and
+            "work_queue_retry_delay".
+    """
+    return WorkQueue(
+        settings.get("work_queue_db", "storage/work_queue.db"),
+        max_attempts=settings.get("work_queue_max_attempts", 3),
+        retry_delay=settings.get("work_queue_retry_delay", 60),
+    )